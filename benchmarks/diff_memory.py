@@ -0,0 +1,71 @@
+"""Peak memory of preparing a huge staged diff for the prompt.
+
+python -m benchmarks.diff_memory --size-mb 100
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import core.generator as generator
+from core.diff import DiffBuffer, parse_diff
+
+FILE_TEMPLATE = (
+    "diff --git a/data/file{index}.txt b/data/file{index}.txt\n"
+    "index 1111111..2222222 100644\n"
+    "--- a/data/file{index}.txt\n"
+    "+++ b/data/file{index}.txt\n"
+    "@@ -1,{count} +1,{count} @@\n"
+)
+
+
+def synthetic_diff(size_mb: int, lines_per_file: int = 400) -> bytes:
+    line = "+" + "generated content for the benchmark " * 2 + "\n"
+    chunks = []
+    total = 0
+    index = 0
+    while total < size_mb * 1024 * 1024:
+        header = FILE_TEMPLATE.format(index=index, count=lines_per_file)
+        chunk = (header + line * lines_per_file).encode()
+        chunks.append(chunk)
+        total += len(chunk)
+        index += 1
+    return b"".join(chunks)
+
+
+def text_path(raw: bytes) -> str:
+    diff = raw.decode("utf-8", "replace").strip()
+    return generator._prepare_diff(diff, parse_diff(diff))
+
+
+def buffer_path(raw: bytes) -> str:
+    prompt, _ = generator._prepare_buffer(DiffBuffer(raw))
+    return prompt
+
+
+def measure(run: Callable[[bytes], str], raw: bytes) -> Tuple[float, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    prompt = run(raw)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, len(prompt)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100)
+    options = parser.parse_args()
+
+    raw = synthetic_diff(options.size_mb)
+    print(f"diff size: {len(raw) / 1024 / 1024:.1f} MB")
+    print(f"{'path':<8} {'peak MB':>10} {'seconds':>10} {'prompt':>8}")
+    for name, run in (("text", text_path), ("buffer", buffer_path)):
+        peak, elapsed, length = measure(run, raw)
+        print(f"{name:<8} {peak:>10.1f} {elapsed:>10.2f} {length:>8}")
+
+
+if __name__ == "__main__":
+    main()
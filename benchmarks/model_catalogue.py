@@ -0,0 +1,102 @@
+"""CPU time and peak memory of ranking a large /models catalogue.
+
+python -m benchmarks.model_catalogue --models 5000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+from unittest.mock import MagicMock, patch
+
+from core.models import ModelConfig, OpenRouterRawModel, Provider
+from core.utils import is_chat_model
+
+FAMILIES = ["llama", "mistral", "gemma", "qwen", "deepseek", "phi", "gpt", "claude"]
+
+
+def synthetic_catalogue(count: int, free_every: int = 6) -> bytes:
+    models = []
+    for index in range(count):
+        family = FAMILIES[index % len(FAMILIES)]
+        suffix = ":free" if index % free_every == 0 else ""
+        models.append(
+            {
+                "id": f"vendor{index % 40}/{family}-{index}b{suffix}",
+                "name": f"Vendor {family.title()} {index}B chat",
+                "description": "A generated model description. " * 20,
+                "context_length": 4096 * (1 + index % 64),
+                "pricing": {"prompt": "0" if suffix else "0.000002"},
+                "architecture": {"modality": "text->text", "tokenizer": family},
+            }
+        )
+    return json.dumps({"data": models}).encode()
+
+
+def _provider() -> Provider[OpenRouterRawModel]:
+    cache_file = MagicMock()
+    cache_file.load_models.return_value = []
+    return Provider(
+        name="openrouter",
+        api_base="https://openrouter.ai/api/v1",
+        api_key="benchmark",
+        raw_model_cls=OpenRouterRawModel,
+        cache_file=cache_file,
+    )
+
+
+def eager_path(raw: bytes) -> List[ModelConfig]:
+    provider = _provider()
+    models = [
+        OpenRouterRawModel.from_dict(data).to_model_config()
+        for data in json.loads(raw)["data"]
+    ]
+    free = [m for m in models if m.is_free and is_chat_model(m)]
+    free.sort(key=provider._calculate_model_score, reverse=True)
+    return free[:8]
+
+
+def streaming_path(raw: bytes) -> List[ModelConfig]:
+    response = MagicMock()
+    response.status_code = 200
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda chunk_size: (
+        raw[i : i + chunk_size] for i in range(0, len(raw), chunk_size)
+    )
+
+    with patch("requests.get", return_value=response):
+        return _provider().get_top_models(filter_fn=is_chat_model)["free"]
+
+
+def measure(
+    run: Callable[[bytes], List[ModelConfig]], raw: bytes
+) -> Tuple[float, float, List[str]]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    models = run(raw)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, [m.model_id for m in models]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=5000)
+    options = parser.parse_args()
+
+    raw = synthetic_catalogue(options.models)
+    print(f"catalogue: {options.models} models, {len(raw) / 1024 / 1024:.1f} MB")
+    print(f"{'path':<10} {'peak MB':>10} {'seconds':>10}")
+    results = []
+    for name, run in (("eager", eager_path), ("streaming", streaming_path)):
+        peak, elapsed, ids = measure(run, raw)
+        results.append(ids)
+        print(f"{name:<10} {peak:>10.1f} {elapsed:>10.2f}")
+    if results[0] != results[1]:
+        raise SystemExit("the two paths ranked the catalogue differently")
+
+
+if __name__ == "__main__":
+    main()
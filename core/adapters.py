@@ -1,26 +1,43 @@
+import json
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Type
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import HTTPAdapter
 
+from core.circuit import CircuitBreaker
+from core.constants import REQUEST_TIMEOUT
+from core.deadline import Deadline, DeadlineRetry
+from core.diff import parse_diff
 from core.exceptions import (
+    CircuitOpenError,
+    DeadlineExceededError,
     MissingAPIKeyError,
     ModelGenerationError,
     ProviderAPIError,
+    ProviderUnavailableError,
     UnsupportedProviderError,
 )
+from core.heuristic import generate_heuristic_message
 from core.models import ModelConfig
 from core.prompt import get_commit_instruction
+from core.ratelimit import RateLimiter, parse_retry_after
+from core.telemetry import ModelTelemetry
+from core.templates import TemplateLike
 
 
 class ModelAdapter(ABC):
+    requires_api_key = True
 
     def __init__(self, config: ModelConfig):
         self.config = config
+        self.deadline = Deadline()
+        # The model that wrote the last message; None for the heuristic.
+        self.last_model_id: Optional[str] = None
         self.api_key = self._get_api_key()
-        if not self.api_key:
+        if self.requires_api_key and not self.api_key:
             raise MissingAPIKeyError(
                 f"API key for provider '{self.config.provider}' not found. "
                 f"Make sure environment variable GITK_{self.config.provider.upper()}_API_KEY is set."
@@ -31,10 +48,19 @@ class ModelAdapter(ABC):
         self,
         diff: str,
         detailed: bool,
-        commit_template: Optional[str],
+        commit_template: Optional[TemplateLike],
         instruction: Optional[str],
     ) -> str: ...
 
+    def stream_commit_message(
+        self,
+        diff: str,
+        detailed: bool = False,
+        commit_template: Optional[TemplateLike] = None,
+        instruction: Optional[str] = None,
+    ) -> Iterator[str]:
+        yield self.generate_commit_message(diff, detailed, commit_template, instruction)
+
     def _get_api_key(self) -> Optional[str]:
         env_var = f"GITK_{self.config.provider.upper()}_API_KEY"
         return os.getenv(env_var)
@@ -43,7 +69,7 @@ class ModelAdapter(ABC):
         self,
         diff: str,
         detailed: bool = False,
-        commit_template: Optional[str] = None,
+        commit_template: Optional[TemplateLike] = None,
         instruction: Optional[str] = None,
     ) -> str:
         try:
@@ -58,7 +84,27 @@ class ModelAdapter(ABC):
             raise ModelGenerationError("Failed to build prompt", cause=e) from e
 
 
+def iter_sse_content(response: requests.Response) -> Iterator[str]:
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+
+        try:
+            choice = json.loads(payload)["choices"][0]
+        except (KeyError, IndexError, ValueError) as e:
+            raise ModelGenerationError("Invalid streaming chunk", cause=e) from e
+
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            yield content
+
+
 class OpenRouterAdapter(ModelAdapter):
+    MAX_THROTTLE_RETRIES = 3
 
     def __init__(self, config: ModelConfig) -> None:
         super().__init__(config)
@@ -67,17 +113,24 @@ class OpenRouterAdapter(ModelAdapter):
             "Content-Type": "application/json",
         }
         self.session = self._create_retryable_session()
+        self.rate_limiter = RateLimiter.for_provider(self.config.provider)
+        self.telemetry = ModelTelemetry.default()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._throttled = False
+        self._attempt_started = 0.0
 
     def _create_retryable_session(self) -> requests.Session:
         session = requests.Session()
 
-        retries = Retry(
+        retries = DeadlineRetry(
             total=5,
             backoff_factor=1,
             status_forcelist=[408, 500, 502, 503, 504],
             allowed_methods=["POST"],
             raise_on_status=False,
             respect_retry_after_header=True,
+            deadline=lambda: self.deadline,
+            attempt_timeout=REQUEST_TIMEOUT,
         )
 
         adapter = HTTPAdapter(
@@ -93,51 +146,288 @@ class OpenRouterAdapter(ModelAdapter):
         self,
         diff: str,
         detailed: bool = False,
-        commit_template: Optional[str] = None,
+        commit_template: Optional[TemplateLike] = None,
         instruction: Optional[str] = None,
     ) -> str:
 
-        data = {
-            "model": self.config.model_id,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": self._build_prompt(
-                        diff, detailed, commit_template, instruction
-                    ),
-                }
-            ],
-            "temperature": self.config.temperature,
+        prompt = self._build_prompt(diff, detailed, commit_template, instruction)
+        last_error: Optional[ProviderUnavailableError] = None
+
+        for model_id in self._candidate_models():
+            breaker = self._breaker(model_id)
+            if not breaker.allow_request():
+                continue
+
+            try:
+                response = self._post_chat_completion(
+                    {
+                        "model": model_id,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": self.config.temperature,
+                    }
+                )
+            except DeadlineExceededError:
+                # Out of time, not the model's fault: leave its circuit alone.
+                raise
+            except ProviderUnavailableError as e:
+                self._record_request(model_id, error=True)
+                breaker.record_failure()
+                last_error = e
+                continue
+            except ProviderAPIError:
+                # Bad keys, permissions or exhausted quota: not the model's score.
+                raise
+
+            self._record_request(model_id)
+            breaker.record_success()
+            message = self._parse_response(response)
+            self.last_model_id = model_id
+            return message
+
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError(
+            f"{self.config.provider}: provider marked unavailable, "
+            "skipping request until the cooldown expires"
+        )
+
+    def _candidate_models(self) -> List[str]:
+        models = [self.config.model_id]
+        if self.config.fallback_model_id:
+            models.append(self.config.fallback_model_id)
+        return models
+
+    def _record_request(self, model_id: str, error: bool = False) -> None:
+        # Only the last HTTP attempt counts; rate-limit waits are our own.
+        self.telemetry.record_request(
+            self.config.provider,
+            model_id,
+            latency=time.monotonic() - self._attempt_started,
+            error=error,
+            throttled=self._throttled,
+        )
+
+    def _breaker(self, model_id: str) -> CircuitBreaker:
+        if model_id not in self._breakers:
+            self._breakers[model_id] = CircuitBreaker.for_model(
+                self.config.provider, model_id
+            )
+        return self._breakers[model_id]
+
+    def _parse_response(self, response: requests.Response) -> str:
+        try:
+            result = response.json()
+            return result["choices"][0]["message"]["content"].strip()
+        except (KeyError, ValueError) as e:
+            raise ModelGenerationError("Invalid API response format", cause=e) from e
+
+    def _post_chat_completion(self, data: Dict[str, Any]) -> requests.Response:
+        throttled = 0
+        self._throttled = False
+
+        while True:
+            self.rate_limiter.acquire(deadline=self.deadline)
+            timeout = self.deadline.timeout(REQUEST_TIMEOUT)
+            self._attempt_started = time.monotonic()
+            try:
+                response = self.session.post(
+                    f"{self.config.api_base}/chat/completions",
+                    headers=self.headers,
+                    json=data,
+                    timeout=timeout,
+                )
+                if (
+                    response.status_code == 429
+                    and throttled < self.MAX_THROTTLE_RETRIES
+                ):
+                    throttled += 1
+                    self._throttled = True
+                    self.rate_limiter.record_throttle(
+                        parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                    continue
+                response.raise_for_status()
+            except requests.exceptions.Timeout as e:
+                if timeout < REQUEST_TIMEOUT:
+                    # The deadline shortened this attempt, the model did not
+                    # time out on its own.
+                    raise DeadlineExceededError(
+                        f"Request budget of {self.deadline.budget:g}s exhausted",
+                        cause=e,
+                    ) from e
+                raise self._provider_error(e) from e
+            except requests.exceptions.RequestException as e:
+                raise self._provider_error(e) from e
+
+            self.rate_limiter.record_success()
+            return response
+
+    def _provider_error(
+        self, error: requests.exceptions.RequestException
+    ) -> ProviderAPIError:
+        if error.response is None:
+            return ProviderUnavailableError(
+                "Network error - check connection", cause=error
+            )
+
+        if error.response.status_code == 429:
+            self._throttled = True
+            self.rate_limiter.record_throttle(
+                parse_retry_after(error.response.headers.get("Retry-After"))
+            )
+
+        error_messages = {
+            401: "Authentication failed - check API key",
+            429: "Rate limit exceeded",
+            403: "Access denied - check API key permissions",
         }
+        message = error_messages.get(
+            error.response.status_code, "Unexpected error during API request"
+        )
+        if error.response.status_code >= 500:
+            return ProviderUnavailableError(
+                f"{self.config.provider}: {message}", cause=error
+            )
+        return ProviderAPIError(f"{self.config.provider}: {message}", cause=error)
+
+    def __del__(self) -> None:
+        if hasattr(self, "session"):
+            self.session.close()
+
+
+class LocalAdapter(ModelAdapter):
+    requires_api_key = False
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 120
+
+    def __init__(self, config: ModelConfig) -> None:
+        super().__init__(config)
+        self.headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if self.api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+        self.session = self._create_keepalive_session()
+        self.telemetry = ModelTelemetry.default()
+
+    def _create_keepalive_session(self) -> requests.Session:
+        session = requests.Session()
+
+        retries = DeadlineRetry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["POST"],
+            raise_on_status=False,
+            deadline=lambda: self.deadline,
+            attempt_timeout=self.CONNECT_TIMEOUT + self.READ_TIMEOUT,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retries)
+
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def generate_commit_message(
+        self,
+        diff: str,
+        detailed: bool = False,
+        commit_template: Optional[TemplateLike] = None,
+        instruction: Optional[str] = None,
+    ) -> str:
+        message = "".join(
+            self.stream_commit_message(diff, detailed, commit_template, instruction)
+        ).strip()
+        self.last_model_id = self.config.model_id
+        return message
+
+    def stream_commit_message(
+        self,
+        diff: str,
+        detailed: bool = False,
+        commit_template: Optional[TemplateLike] = None,
+        instruction: Optional[str] = None,
+    ) -> Iterator[str]:
+        prompt = self._build_prompt(diff, detailed, commit_template, instruction)
+        timeout = (
+            self.deadline.timeout(self.CONNECT_TIMEOUT),
+            self.deadline.timeout(self.READ_TIMEOUT),
+        )
+        started = time.monotonic()
+        ttft: Optional[float] = None
 
         try:
-            response = self.session.post(
+            with self.session.post(
                 f"{self.config.api_base}/chat/completions",
                 headers=self.headers,
-                json=data,
-                timeout=30,
-            )
-            response.raise_for_status()
+                json=self._build_payload(prompt),
+                stream=True,
+                timeout=timeout,
+            ) as response:
+                response.raise_for_status()
+
+                chunks: Iterator[str]
+                if response.headers.get("Content-Type", "").startswith(
+                    "application/json"
+                ):
+                    chunks = iter([self._parse_message(response)])
+                else:
+                    chunks = iter_sse_content(response)
+
+                for chunk in chunks:
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    if self.deadline.expired():
+                        raise DeadlineExceededError(
+                            f"local: generation exceeded its {self.deadline.budget:g}s budget"
+                        )
+                    yield chunk
+
         except requests.exceptions.RequestException as e:
+            self._record_request(started, ttft, error=True)
             if e.response is None:
-                raise ProviderAPIError(
-                    "Network error - check connection", cause=e
+                raise ProviderUnavailableError(
+                    f"Local model server unreachable at {self.config.api_base}",
+                    cause=e,
                 ) from e
+            raise ProviderAPIError(
+                f"local: server returned HTTP {e.response.status_code}", cause=e
+            ) from e
+        except (ModelGenerationError, DeadlineExceededError):
+            self._record_request(started, ttft, error=True)
+            raise
 
-            error_messages = {
-                401: "Authentication failed - check API key",
-                429: "Rate limit exceeded",
-                403: "Access denied - check API key permissions",
-            }
-            message = error_messages.get(
-                e.response.status_code, "Unexpected error during API request"
-            )
-            raise ProviderAPIError(f"{self.config.provider}: {message}", cause=e) from e
+        self._record_request(started, ttft)
+
+    def _record_request(
+        self, started: float, ttft: Optional[float], error: bool = False
+    ) -> None:
+        self.telemetry.record_request(
+            self.config.provider,
+            self.config.model_id,
+            latency=time.monotonic() - started,
+            ttft=ttft,
+            error=error,
+        )
 
+    def _build_payload(self, prompt: str) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "model": self.config.model_id,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.config.temperature,
+            "stream": True,
+            # llama.cpp reuses the KV cache of the shared prompt prefix.
+            "cache_prompt": True,
+        }
+        if self.config.keep_alive:
+            data["keep_alive"] = self.config.keep_alive
+        if self.config.num_threads:
+            data["options"] = {"num_thread": self.config.num_threads}
+            data["n_threads"] = self.config.num_threads
+        return data
+
+    def _parse_message(self, response: requests.Response) -> str:
         try:
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-        except (KeyError, ValueError) as e:
+            return response.json()["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, ValueError) as e:
             raise ModelGenerationError("Invalid API response format", cause=e) from e
 
     def __del__(self) -> None:
@@ -145,8 +435,30 @@ class OpenRouterAdapter(ModelAdapter):
             self.session.close()
 
 
+class HeuristicAdapter(ModelAdapter):
+    requires_api_key = False
+
+    def generate_commit_message(
+        self,
+        diff: str,
+        detailed: bool = False,
+        commit_template: Optional[TemplateLike] = None,
+        instruction: Optional[str] = None,
+    ) -> str:
+        try:
+            return generate_heuristic_message(parse_diff(diff), detailed)
+        except ValueError as e:
+            raise ModelGenerationError(
+                "Failed to derive commit message from diff", cause=e
+            ) from e
+
+
 class ModelFactory:
-    ADAPTERS = {"openrouter": OpenRouterAdapter}
+    ADAPTERS: Dict[str, Type[ModelAdapter]] = {
+        "openrouter": OpenRouterAdapter,
+        "local": LocalAdapter,
+        "heuristic": HeuristicAdapter,
+    }
 
     @classmethod
     def create_adapter(cls, config: ModelConfig) -> ModelAdapter:
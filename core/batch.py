@@ -0,0 +1,59 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from core.constants import MAX_PARALLEL_GENERATIONS
+from core.models import ModelConfig
+
+
+@dataclass
+class BatchItem:
+    label: str
+    diff: str
+    paths: List[str] = field(default_factory=list)
+    cwd: Optional[Path] = None
+    message: str = ""
+    error: Optional[str] = None
+    # Set only when a model wrote the message, not the cache or heuristic.
+    model: Optional[ModelConfig] = None
+
+    @property
+    def title(self) -> str:
+        return self.message.strip().split("\n", 1)[0] if self.message else ""
+
+
+def generate_pipelined(
+    items: Sequence[BatchItem],
+    generate: Callable[[BatchItem], str],
+    max_workers: int = MAX_PARALLEL_GENERATIONS,
+) -> Iterator[BatchItem]:
+    # Yields items in order while later ones are still being generated, so
+    # reviewing or committing item N overlaps with generating N+1.
+    if not items:
+        return
+
+    def run(item: BatchItem) -> BatchItem:
+        if item.error:
+            return item
+        try:
+            item.message = generate(item)
+        except Exception as e:
+            item.error = str(e)
+        return item
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(items), max_workers)))
+    futures: List[Future] = [executor.submit(run, item) for item in items]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def generate_all(
+    items: Sequence[BatchItem],
+    generate: Callable[[BatchItem], str],
+    max_workers: int = MAX_PARALLEL_GENERATIONS,
+) -> List[BatchItem]:
+    return list(generate_pipelined(items, generate, max_workers))
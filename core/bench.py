@@ -0,0 +1,126 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from core.adapters import ModelFactory
+from core.constants import BENCH_CHARS_PER_TOKEN, MAX_PARALLEL_GENERATIONS
+from core.exceptions import BaseError
+from core.models import ModelConfig
+from core.templates import TemplateLike
+from core.utils import clean_message
+
+SAMPLE_DIFF = """diff --git a/app/session.py b/app/session.py
+index 3b18e51..a9c2f04 100644
+--- a/app/session.py
++++ b/app/session.py
+@@ -1,15 +1,24 @@
+ import time
++from typing import Optional
+
+-SESSION_TTL = 3600
++SESSION_TTL = 8 * 3600
++IDLE_TIMEOUT = 30 * 60
+
+
+ class Session:
+     def __init__(self, user_id: str) -> None:
+         self.user_id = user_id
+         self.created_at = time.time()
++        self.last_seen = self.created_at
+
+-    def is_expired(self) -> bool:
+-        return time.time() - self.created_at > SESSION_TTL
++    def touch(self) -> None:
++        self.last_seen = time.time()
++
++    def is_expired(self, now: Optional[float] = None) -> bool:
++        now = time.time() if now is None else now
++        if now - self.last_seen > IDLE_TIMEOUT:
++            return True
++        return now - self.created_at > SESSION_TTL
+diff --git a/tests/test_session.py b/tests/test_session.py
+index 5d0a7b2..e41c9d8 100644
+--- a/tests/test_session.py
++++ b/tests/test_session.py
+@@ -8,3 +8,9 @@ def test_new_session_is_not_expired():
+ def test_session_expires_after_ttl():
+     session = Session("u1")
+     assert session.is_expired(session.created_at + 9 * 3600)
++
++
++def test_idle_session_expires():
++    session = Session("u1")
++    session.touch()
++    assert session.is_expired(session.last_seen + 31 * 60)
+"""
+
+
+@dataclass
+class BenchResult:
+    model: ModelConfig
+    latency: Optional[float] = None
+    ttft: Optional[float] = None
+    output: str = ""
+    error: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if self.error or self.latency is None or not self.output:
+            return None
+        # Throughput of the streamed part when there was one.
+        duration = self.latency - (self.ttft or 0.0)
+        if duration <= 0:
+            duration = self.latency
+        if duration <= 0:
+            return None
+        return len(self.output) / BENCH_CHARS_PER_TOKEN / duration
+
+
+def bench_model(
+    model: ModelConfig,
+    diff: str,
+    template: Optional[TemplateLike] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> BenchResult:
+    started = clock()
+    ttft: Optional[float] = None
+    chunks: List[str] = []
+
+    try:
+        adapter = ModelFactory.create_adapter(model)
+        for chunk in adapter.stream_commit_message(diff, commit_template=template):
+            if ttft is None:
+                ttft = clock() - started
+            chunks.append(chunk)
+    except BaseError as e:
+        return BenchResult(model, error=str(e))
+
+    return BenchResult(
+        model,
+        latency=clock() - started,
+        ttft=ttft,
+        output=clean_message("".join(chunks)),
+    )
+
+
+def race_models(
+    models: Sequence[ModelConfig],
+    diff: str,
+    template: Optional[TemplateLike] = None,
+    max_workers: int = MAX_PARALLEL_GENERATIONS,
+    bench: Callable[..., BenchResult] = bench_model,
+) -> List[BenchResult]:
+    if not models:
+        return []
+
+    workers = max(1, min(len(models), max_workers))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda model: bench(model, diff, template), models))
+
+
+def pick_winner(results: Sequence[BenchResult]) -> Optional[BenchResult]:
+    finished = [r for r in results if not r.error and r.output and r.latency]
+    if not finished:
+        return None
+    return min(finished, key=lambda r: r.latency or 0.0)
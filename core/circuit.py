@@ -0,0 +1,101 @@
+import logging
+import time
+from enum import Enum
+from typing import Any, Callable, Dict
+
+from core.config.backends import StateStore, get_backend
+from core.exceptions import CacheFileError
+
+logger = logging.getLogger("gitk")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+
+    def __init__(
+        self,
+        state_file: StateStore,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        probe_timeout: float = 45.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.state_file = state_file
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+
+    @classmethod
+    def for_model(cls, provider: str, model_id: str, **kwargs: Any) -> "CircuitBreaker":
+        return cls(get_backend().state(f"{provider}_{model_id}_circuit"), **kwargs)
+
+    @property
+    def state(self) -> CircuitState:
+        try:
+            data = self.state_file.load()
+        except CacheFileError:
+            return CircuitState.CLOSED
+        return CircuitState(data.get("state", CircuitState.CLOSED.value))
+
+    def allow_request(self) -> bool:
+        try:
+            with self.state_file.transaction() as data:
+                return self._allow(data, self._clock())
+        except CacheFileError:
+            return True
+
+    def record_success(self) -> None:
+        try:
+            with self.state_file.transaction() as data:
+                if data.get("state") != CircuitState.CLOSED.value:
+                    logger.info("Circuit closed for %s", self.state_file.name)
+                data.clear()
+                data["state"] = CircuitState.CLOSED.value
+        except CacheFileError:
+            pass
+
+    def record_failure(self) -> None:
+        try:
+            with self.state_file.transaction() as data:
+                now = self._clock()
+                failures = data.get("failures", 0) + 1
+                data["failures"] = failures
+
+                if (
+                    data.get("state") == CircuitState.HALF_OPEN.value
+                    or failures >= self.failure_threshold
+                ):
+                    data["state"] = CircuitState.OPEN.value
+                    data["opened_at"] = now
+                    data.pop("probe_started_at", None)
+                    logger.warning(
+                        "Circuit opened for %s after %d failures",
+                        self.state_file.name,
+                        failures,
+                    )
+        except CacheFileError:
+            pass
+
+    def _allow(self, data: Dict[str, Any], now: float) -> bool:
+        state = data.get("state", CircuitState.CLOSED.value)
+
+        if state == CircuitState.CLOSED.value:
+            return True
+
+        if state == CircuitState.OPEN.value:
+            if now < data.get("opened_at", 0.0) + self.cooldown:
+                return False
+            data["state"] = CircuitState.HALF_OPEN.value
+
+        # Only one process at a time gets to probe a recovering provider.
+        if now < data.get("probe_started_at", 0.0) + self.probe_timeout:
+            return False
+
+        data["probe_started_at"] = now
+        return True
@@ -1,5 +1,7 @@
 import argparse
 
+from core.constants import GENERATION_TIMEOUT
+
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -40,4 +42,11 @@ def parse_arguments() -> argparse.Namespace:
         help="Inline custom commit template (overrides config template)",
     )
 
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=GENERATION_TIMEOUT,
+        help="Seconds to spend on the model before the offline fallback (0: no limit)",
+    )
+
     return parser.parse_args()
@@ -1,15 +1,27 @@
 import os
 import re
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
+import click
 import questionary
 
-from core.config.files import CacheFile, EnvFile
-from core.constants import PROVIDER_INSTRUCTIONS
-from core.models import ModelConfig, OpenRouterRawModel, Provider
+from core.adapters import ModelFactory
+from core.batch import BatchItem
+from core.bench import BenchResult
+from core.config.backends import get_backend
+from core.config.files import EnvFile
+from core.constants import PROVIDER_API_BASES, PROVIDER_INSTRUCTIONS
+from core.models import (
+    LocalRawModel,
+    ModelConfig,
+    ModelSummary,
+    OpenRouterRawModel,
+    Provider,
+)
+from core.telemetry import ModelTelemetry
 from core.templates import Template, TemplateDirectory
-from core.utils import is_chat_model, qprint
+from core.utils import clean_message, is_chat_model, qprint
 
 
 class TemplatesCLI:
@@ -102,16 +114,48 @@ class TemplatesCLI:
         return name
 
 
+class ProvidersCLI:
+
+    def select_provider(self) -> str:
+        choices = [
+            questionary.Choice("OpenRouter (hosted models)", value="openrouter"),
+            questionary.Choice(
+                "Local OpenAI-compatible server (llama.cpp, Ollama, vLLM)",
+                value="local",
+            ),
+        ]
+
+        choice = questionary.select("Select a model provider:", choices=choices).ask()
+
+        if choice is None:
+            raise KeyboardInterrupt("User cancelled the operation")
+
+        return choice
+
+
 class ModelsCLI:
+    RAW_MODELS: Dict[str, Any] = {
+        "openrouter": OpenRouterRawModel,
+        "local": LocalRawModel,
+    }
+    MODEL_FILTERS: Dict[str, Optional[Callable[[ModelSummary], bool]]] = {
+        "openrouter": is_chat_model,
+        "local": None,
+    }
 
     def __init__(self, provider_name: str) -> None:
-        self.cache_file = CacheFile(provider_name)
-        self.provider = Provider[OpenRouterRawModel](
+        self.provider_name = provider_name
+        self.cache_file = get_backend().models(provider_name)
+        self.provider = Provider(
             name=provider_name,
-            api_base="https://openrouter.ai/api/v1",
-            api_key=os.getenv("GITK_OPENROUTER_API_KEY", ""),
-            raw_model_cls=OpenRouterRawModel,
+            api_base=os.getenv(
+                f"GITK_{provider_name.upper()}_API_BASE",
+                PROVIDER_API_BASES[provider_name],
+            ),
+            api_key=os.getenv(f"GITK_{provider_name.upper()}_API_KEY", ""),
+            raw_model_cls=self.RAW_MODELS[provider_name],
             cache_file=self.cache_file,
+            telemetry=ModelTelemetry.default(),
         )
 
     def select_model(self) -> ModelConfig:
@@ -131,15 +175,24 @@ class ModelsCLI:
 
         return choice
 
+    def top_models(self, count: int = 8) -> List[ModelConfig]:
+        top_models = self.provider.get_top_models(
+            filter_fn=self.MODEL_FILTERS.get(self.provider_name), free_count=count
+        )
+        return [
+            model.model_copy(update={"api_base": self.provider.api_base})
+            for model in top_models["free"]
+        ]
+
     def refresh_models_list(self) -> None:
-        self.cache_file.delete_cache()
-        self._build_model_choices()
+        self.provider.refresh_models(
+            filter_fn=self.MODEL_FILTERS.get(self.provider_name)
+        )
 
     def _build_model_choices(
         self,
     ) -> List[Union[questionary.Separator, questionary.Choice]]:
-        top_models = self.provider.get_top_models(filter_fn=is_chat_model)
-        free_models = top_models["free"]
+        free_models = self.top_models()
 
         def format_description(desc: str, length: int = 60) -> str:
             if len(desc) > length:
@@ -166,6 +219,34 @@ class ModelsCLI:
         return choices
 
 
+class BenchCLI:
+
+    def show(self, results: List[BenchResult], winner: Optional[BenchResult]) -> None:
+        width = min(max(len(r.model.name) for r in results), 30)
+
+        qprint(
+            f"\n{'Model':<{width}}  {'Latency':>8}  {'TTFT':>8}  "
+            f"{'Tok/s':>7}  {'Chars':>6}  Output"
+        )
+        for result in results:
+            name = result.model.name[:width]
+            if result.error or result.latency is None:
+                click.echo(
+                    f"{name:<{width}}  {'-':>8}  {'-':>8}  {'-':>7}  {'-':>6}  "
+                    f"FAILED: {result.error}"
+                )
+                continue
+
+            rate = result.tokens_per_second
+            title = result.output.splitlines()[0] if result.output else ""
+            marker = "  <- fastest" if result is winner else ""
+            click.echo(
+                f"{name:<{width}}  {result.latency:>7.2f}s  "
+                f"{result.ttft or result.latency:>7.2f}s  "
+                f"{rate or 0.0:>7.1f}  {len(result.output):>6}  {title}{marker}"
+            )
+
+
 class ApiKeyCLI:
     def __init__(self) -> None:
         self.env_file = EnvFile()
@@ -175,6 +256,10 @@ class ApiKeyCLI:
 
         self._show_provider_instructions(provider, model.name)
 
+        adapter_class = ModelFactory.ADAPTERS.get(provider)
+        if adapter_class is not None and not adapter_class.requires_api_key:
+            return ""
+
         env_var = self.env_file.get_env_var_name(provider)
 
         if self.env_file.key_exists(env_var):
@@ -208,3 +293,54 @@ class ApiKeyCLI:
             raise KeyboardInterrupt("User cancelled the operation")
 
         return api_key
+
+
+class ReviewCLI:
+    def review(self, items: List[BatchItem]) -> List[BatchItem]:
+        self._print_table(items)
+
+        ready = [item for item in items if not item.error]
+        if not ready:
+            return []
+
+        selected = questionary.checkbox(
+            "Select commits to create:",
+            choices=[
+                questionary.Choice(title=item.label, value=index, checked=True)
+                for index, item in enumerate(ready)
+            ],
+        ).ask()
+
+        if selected is None:
+            raise KeyboardInterrupt("User cancelled the operation")
+        if not selected:
+            return []
+
+        to_edit = questionary.checkbox(
+            "Select messages to edit (enter to skip):",
+            choices=[
+                questionary.Choice(title=ready[index].label, value=index)
+                for index in selected
+            ],
+        ).ask()
+
+        if to_edit is None:
+            raise KeyboardInterrupt("User cancelled the operation")
+
+        for index in to_edit:
+            self._edit(ready[index])
+
+        return [ready[index] for index in selected]
+
+    def _print_table(self, items: List[BatchItem]) -> None:
+        width = min(max((len(item.label) for item in items), default=0), 40)
+
+        qprint(f"\n{'#':>3}  {'Target':<{width}}  Message")
+        for number, item in enumerate(items, start=1):
+            summary = f"FAILED: {item.error}" if item.error else item.title
+            click.echo(f"{number:>3}  {item.label:<{width}}  {summary}")
+
+    def _edit(self, item: BatchItem) -> None:
+        edited = click.edit(item.message)
+        if edited is not None and edited.strip():
+            item.message = clean_message(edited)
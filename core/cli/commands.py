@@ -1,18 +1,49 @@
 import logging
 import os
 import tempfile
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import click
 
+from core.batch import BatchItem, generate_pipelined
+from core.bench import SAMPLE_DIFF, pick_winner, race_models
 from core.cli.args_parser import argparse
-from core.cli.cli import ApiKeyCLI, ModelsCLI, TemplatesCLI
+from core.cli.cli import (
+    ApiKeyCLI,
+    BenchCLI,
+    ModelsCLI,
+    ProvidersCLI,
+    ReviewCLI,
+    TemplatesCLI,
+)
 from core.config.config import GitkConfig
-from core.constants import HELP_TEXT
+from core.constants import (
+    BENCH_TOP_MODELS,
+    GENERATION_TIMEOUT,
+    HELP_TEXT,
+    PROVIDER_API_BASES,
+    WATCH_DEBOUNCE,
+)
+from core.diff import RENAME_FLAGS, DiffBuffer, parse_diff, parse_name_status
 from core.exceptions import BaseError
 from core.generator import generate_commit_message
+from core.grouping import co_change_ratios, group_files
+from core.history import HistoryIndex
+from core.indexing import find_repository_root
+from core.models import ModelConfig
+from core.multirepo import (
+    collect_staged_changes,
+    discover_repositories,
+    find_superproject,
+    stage_gitlinks,
+)
+from core.responses import ResponseCache
 from core.runner import SafeGitRunner
-from core.utils import is_safe_filename
+from core.telemetry import ModelTelemetry
+from core.templates import CompiledTemplate, Template
+from core.utils import clean_diff, is_safe_filename
+from core.watcher import IndexWatcher, PreGenerator
 
 logger = logging.getLogger("gitk")
 
@@ -26,7 +57,7 @@ def cli() -> None:
 def init() -> None:
     config = GitkConfig()
     templates_cli = TemplatesCLI()
-    models_cli = ModelsCLI("openrouter")
+    models_cli = ModelsCLI(ProvidersCLI().select_provider())
     api_key_cli = ApiKeyCLI()
 
     selected_model = models_cli.select_model()
@@ -47,6 +78,20 @@ def init() -> None:
     help="Do not ask for confirmation",
 )
 @click.option("--split", is_flag=True, help="Commit each file separately")
+@click.option(
+    "--group",
+    is_flag=True,
+    help="Commit related files together (one commit per cluster)",
+)
+@click.option(
+    "--recursive", is_flag=True, help="Also commit staged changes in submodules"
+)
+@click.option(
+    "--repos",
+    "repo_patterns",
+    multiple=True,
+    help="Glob of sibling repositories to commit (repeatable)",
+)
 @click.option(
     "--template-file",
     type=click.Path(exists=True),
@@ -54,14 +99,26 @@ def init() -> None:
 )
 @click.option("--template", type=str, help="Inline commit template")
 @click.option("--instruction", type=str, help="Additional instruction for the model")
+@click.option(
+    "--timeout",
+    type=float,
+    default=GENERATION_TIMEOUT,
+    show_default=True,
+    envvar="GITK_TIMEOUT",
+    help="Seconds to spend on the model before the offline fallback (0: no limit)",
+)
 @click.argument("extra_git_flags", nargs=-1, type=str)
 def commit(
     detailed: bool,
     no_confirm: bool,
     split: bool,
+    group: bool,
+    recursive: bool,
+    repo_patterns: Tuple[str, ...],
     template_file: Optional[str],
     template: Optional[str],
     instruction: Optional[str],
+    timeout: float,
     extra_git_flags: Tuple[str, ...],
 ) -> None:
     config = GitkConfig()
@@ -71,59 +128,140 @@ def commit(
         instruction=instruction,
         template=template,
         template_file=template_file,
+        timeout=timeout,
         init=False,
     )
 
     git_runner = SafeGitRunner()
 
-    def generate_commit(
-        diff_input: str, no_confirm: bool, file_path: Optional[str] = None
+    def write_commit(
+        commit_msg: str, paths: List[str], cwd: Optional[Path] = None
     ) -> None:
-        commit_msg = generate_commit_message(args, config, diff_input)
-
-        if no_confirm:
-            click.echo(f"Committing{' ' + file_path if file_path else ''}...")
-        else:
-            click.echo("\n--- Commit message ---")
-            click.echo(commit_msg)
-            click.echo("----------------------")
-            if not click.confirm("Do you want to continue?"):
-                click.echo(f"Skipping {file_path if file_path else 'commit'}")
-                return
-
         with tempfile.NamedTemporaryFile("w", delete=False) as tmp:
             tmp.write(commit_msg)
             tmp_path = tmp.name
 
         try:
             cmd = ["commit", "-F", tmp_path] + list(extra_git_flags)
-            if file_path:
-                if not is_safe_filename(file_path):
-                    raise ValueError(f"Unsafe filename detected: {file_path}")
-                cmd.extend(["--", file_path])
-            git_runner.run(cmd, check=True)
+            if paths:
+                for path in paths:
+                    if not is_safe_filename(path):
+                        raise ValueError(f"Unsafe filename detected: {path}")
+                cmd.extend(["--", *paths])
+            git_runner.run(cmd, check=True, cwd=cwd)
         finally:
             os.remove(tmp_path)
 
+    def generate(item: BatchItem) -> str:
+        def produced_by(model: ModelConfig) -> None:
+            item.model = model
+
+        return generate_commit_message(
+            args,
+            config,
+            item.diff,
+            cwd=item.cwd,
+            cache=ResponseCache.for_cwd(item.cwd),
+            on_model=produced_by,
+        )
+
+    def record_outcomes(outcomes: List[Tuple[ModelConfig, bool]]) -> None:
+        if not outcomes:
+            return
+        telemetry = ModelTelemetry.default()
+        for model, accepted in outcomes:
+            telemetry.record_outcome(model.provider, model.model_id, accepted)
+
+    def commit_batch(items: List[BatchItem], repos: Sequence[Path] = ()) -> None:
+        if not items:
+            click.echo("Nothing to commit.")
+            return
+
+        # Superprojects mapped to their submodules committed so far.
+        gitlinks: Dict[Path, List[Path]] = {}
+
+        def commit_item(item: BatchItem) -> None:
+            if item.cwd in gitlinks:
+                stage_gitlinks(git_runner, item.cwd, gitlinks.pop(item.cwd))
+            write_commit(item.message, item.paths, cwd=item.cwd)
+            if repos and item.cwd is not None:
+                superproject = find_superproject(git_runner, item.cwd, repos)
+                if superproject is not None:
+                    gitlinks.setdefault(superproject, []).append(item.cwd)
+
+        if no_confirm:
+            for item in generate_pipelined(items, generate):
+                if item.error:
+                    click.secho(f"Skipping {item.label}: {item.error}", fg="red")
+                    continue
+                click.echo(f"Committing {item.label}...")
+                commit_item(item)
+            return
+
+        # Later messages keep generating while earlier ones are on screen.
+        for number, item in enumerate(generate_pipelined(items, generate), start=1):
+            click.echo(f"\n--- [{number}/{len(items)}] {item.label} ---")
+            click.echo(f"Failed: {item.error}" if item.error else item.message)
+
+        accepted = ReviewCLI().review(items)
+        record_outcomes(
+            [
+                (item.model, item in accepted)
+                for item in items
+                if item.model is not None and not item.error
+            ]
+        )
+        if not accepted:
+            click.echo("Nothing selected. Skipping commit")
+            return
+
+        for item in accepted:
+            commit_item(item)
+            click.echo(f"Committed {item.label}")
+
+    if split and group:
+        raise click.UsageError("--split cannot be combined with --group")
+
+    if recursive or repo_patterns:
+        if split or group:
+            raise click.UsageError(
+                "--split/--group cannot be combined with --recursive/--repos"
+            )
+
+        repos = discover_repositories(
+            git_runner, find_repository_root(), recursive, repo_patterns
+        )
+        changes = collect_staged_changes(git_runner, repos)
+        if not changes:
+            click.echo("Nothing staged in any repository.")
+            return
+
+        commit_batch(changes, repos)
+        return
+
     if split:
         result = git_runner.run(
-            ["diff", "--cached", "--name-only"],
+            ["diff", "--cached", "--name-status", *RENAME_FLAGS],
             capture_output=True,
             text=True,
         )
-        staged_files = result.stdout.strip().splitlines()
+        staged_files = parse_name_status(result.stdout)
 
         if not staged_files:
             click.echo("Index is empty. Nothing to commit.")
             return
 
-        for file in staged_files:
-            if not is_safe_filename(file):
+        items: List[BatchItem] = []
+        for file, old_file in staged_files:
+            if not is_safe_filename(file) or (
+                old_file and not is_safe_filename(old_file)
+            ):
                 click.echo(f"Unsafe filename skipped: {file}")
                 continue
 
+            pathspec = [old_file, file] if old_file else [file]
             result = git_runner.run(
-                ["diff", "--cached", "--", file],
+                ["diff", "--cached", *RENAME_FLAGS, "--", *pathspec],
                 capture_output=True,
                 text=True,
             )
@@ -131,21 +269,222 @@ def commit(
             if not diff:
                 click.echo(f"Diff is empty for file: {file}")
                 continue
-            click.echo(f"\n--- Generating commit message for file: {file} ---")
-            generate_commit(diff, no_confirm, file)
-    else:
-        result = git_runner.run(
-            ["diff", "--cached"],
-            capture_output=True,
-            text=True,
+            items.append(BatchItem(label=file, diff=diff, paths=pathspec))
+
+        if items:
+            click.echo(f"Generating commit messages for {len(items)} files...")
+        commit_batch(items)
+        return
+
+    # Kept as bytes: huge diffs are only partially decoded for the prompt.
+    result = git_runner.run(["diff", "--cached", *RENAME_FLAGS], capture_output=True)
+    full_diff = DiffBuffer(result.stdout)
+
+    if not full_diff:
+        click.echo("Index is empty. Nothing to commit.")
+        return
+
+    if group:
+        files = parse_diff(full_diff.text())
+        unsafe = [
+            p
+            for f in files
+            for p in (f.path, f.old_path)
+            if p and not is_safe_filename(p)
+        ]
+        if unsafe:
+            raise click.UsageError(f"Unsafe filename detected: {unsafe[0]}")
+
+        co_changes = co_change_ratios(git_runner, [f.path for f in files])
+        groups = group_files(files, co_changes)
+        click.echo(
+            f"Grouped {len(files)} files into {len(groups)} commits. "
+            "Generating commit messages..."
+        )
+        commit_batch(
+            [BatchItem(label=g.label, diff=g.render(), paths=g.paths) for g in groups]
         )
-        full_diff = result.stdout.strip()
+        return
 
-        if not full_diff:
-            click.echo("Index is empty. Nothing to commit.")
+    produced: List[ModelConfig] = []
+    commit_msg = generate_commit_message(
+        args,
+        config,
+        full_diff,
+        cache=ResponseCache.for_cwd(),
+        on_model=produced.append,
+    )
+
+    if no_confirm:
+        click.echo("Committing...")
+    else:
+        click.echo("\n--- Commit message ---")
+        click.echo(commit_msg)
+        click.echo("----------------------")
+        confirmed = click.confirm("Do you want to continue?")
+        record_outcomes([(model, confirmed) for model in produced])
+        if not confirmed:
+            click.echo("Skipping commit")
             return
 
-        generate_commit(full_diff, no_confirm)
+    write_commit(commit_msg, [])
+
+
+@cli.command("index")
+@click.option("--rebuild", is_flag=True, help="Discard the index and rescan history")
+def index(rebuild: bool) -> None:
+    root = find_repository_root()
+    if root is None:
+        click.echo("Not inside a git repository.")
+        return
+
+    history = HistoryIndex.for_repository(root)
+    added = history.refresh(SafeGitRunner(), rebuild=rebuild)
+    click.secho(f"Indexed {added} new commits ({history.total} total).", fg="green")
+
+
+@cli.command("watch")
+@click.option("--detailed", is_flag=True, help="Pre-generate detailed messages")
+@click.option(
+    "--debounce",
+    type=float,
+    default=WATCH_DEBOUNCE,
+    show_default=True,
+    help="Seconds the index must stay unchanged before generating",
+)
+def watch(detailed: bool, debounce: float) -> None:
+    root = find_repository_root()
+    if root is None:
+        click.echo("Not inside a git repository.")
+        return
+
+    config = GitkConfig()
+    args = argparse.Namespace(
+        detailed=detailed,
+        instruction=None,
+        template=None,
+        template_file=None,
+        timeout=GENERATION_TIMEOUT,
+        init=False,
+    )
+    git_runner = SafeGitRunner()
+    cache = ResponseCache.for_repository(root)
+
+    def generate(diff: DiffBuffer) -> str:
+        return generate_commit_message(args, config, diff, cwd=root, cache=cache)
+
+    pregenerator = PreGenerator(git_runner, root, generate)
+    watcher = IndexWatcher.for_repository(git_runner, root, debounce)
+    click.echo("Watching the index for staged changes (Ctrl+C to stop)...")
+
+    try:
+        while True:
+            if not watcher.wait():
+                continue
+            try:
+                status = pregenerator.run_once()
+            except BaseError as e:
+                click.echo(f"Pre-generation failed: {e}", err=True)
+                continue
+            if status == "generated":
+                click.echo("Commit message ready for the staged changes.")
+            elif status == "throttled":
+                logger.info("Skipped pre-generation: watch rate limit reached")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+@cli.group("models")
+def models_group() -> None:
+    pass
+
+
+@models_group.command("bench")
+@click.option(
+    "--top",
+    "top_count",
+    type=click.IntRange(min=1),
+    default=BENCH_TOP_MODELS,
+    show_default=True,
+    help="Number of top-ranked models to race",
+)
+@click.option(
+    "--provider",
+    "provider_name",
+    type=click.Choice(sorted(PROVIDER_API_BASES)),
+    help="Provider to benchmark (defaults to the configured one)",
+)
+@click.option(
+    "--builtin",
+    is_flag=True,
+    help="Use the built-in sample diff instead of the staged changes",
+)
+def bench(top_count: int, provider_name: Optional[str], builtin: bool) -> None:
+    config = GitkConfig()
+    config.env_file.load_to_environment()
+
+    try:
+        current = config.load_config()
+    except (BaseError, FileNotFoundError):
+        current = None
+
+    if provider_name is None:
+        provider_name = current.provider if current else None
+    if provider_name not in PROVIDER_API_BASES:
+        provider_name = ProvidersCLI().select_provider()
+
+    candidates = ModelsCLI(provider_name).top_models(top_count)
+    if not candidates:
+        click.echo("No models available to benchmark.")
+        return
+
+    diff = ""
+    if not builtin:
+        result = SafeGitRunner().run(
+            ["diff", "--cached", *RENAME_FLAGS], capture_output=True, text=True
+        )
+        diff = result.stdout.strip() if result.returncode == 0 else ""
+        if not diff:
+            click.echo("Nothing staged, using the built-in sample diff.")
+
+    commit_template: Optional[CompiledTemplate] = None
+    if current:
+        try:
+            commit_template = config.templates_dir.compiled(
+                current.commit_template_path
+            )
+        except BaseError:
+            pass
+
+    click.echo(f"Racing {len(candidates)} models on the same diff...")
+    results = race_models(candidates, clean_diff(diff or SAMPLE_DIFF), commit_template)
+    winner = pick_winner(results)
+    BenchCLI().show(results, winner)
+
+    if winner is None:
+        click.secho("Every model failed.", fg="red")
+        return
+    if current and current.model_config_data.model_id == winner.model.model_id:
+        click.echo(f"{winner.model.name} is already the configured model.")
+        return
+    if not click.confirm(f"Save {winner.model.name} as the default model?"):
+        return
+
+    model = winner.model
+    if current:
+        template_path = Path(current.commit_template_path)
+        template = Template(template_path.parent, template_path.stem)
+        if current.provider == model.provider:
+            # Keep routing, fallback and the other tuned settings.
+            model = current.model_config_data.model_copy(
+                update={"model_id": model.model_id, "name": model.name}
+            )
+    else:
+        template = config.templates_dir.default_template()
+    config.save_config(model, template)
+    click.secho(f"Saved {winner.model.name} to config.", fg="green")
 
 
 @cli.group()
@@ -0,0 +1,462 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from core.config.files import CacheFile, JsonLinesFile, StateFile, atomic_write
+from core.config.paths import CacheDirectory, ConfigDirectory
+from core.constants import CACHE_BACKEND_ENV, SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_FILE
+from core.exceptions import CacheFileError
+
+if TYPE_CHECKING:
+    from core.models import ModelConfig
+
+logger = logging.getLogger("gitk")
+
+
+class StateStore(Protocol):
+    @property
+    def name(self) -> str: ...
+
+    def transaction(self, readonly: bool = False) -> ContextManager[Dict[str, Any]]: ...
+
+    def load(self) -> Dict[str, Any]: ...
+
+
+class ModelsCache(Protocol):
+    def save_models(self, models: List["ModelConfig"]) -> None: ...
+
+    def load_models(self) -> List["ModelConfig"]: ...
+
+    def age(self) -> Optional[float]: ...
+
+    def delete_cache(self) -> None: ...
+
+
+class RecordLog(Protocol):
+    def lock(self) -> ContextManager[None]: ...
+
+    def read(self) -> List[Dict[str, Any]]: ...
+
+    def append(self, record: Dict[str, Any]) -> None: ...
+
+    def rewrite(self, records: List[Dict[str, Any]]) -> None: ...
+
+
+class CacheBackend(ABC):
+    # Structured stores (state, model catalogue, record logs) plus a plain
+    # key/value space with per-read TTLs and size-bounded eviction.
+
+    @abstractmethod
+    def state(self, name: str, namespace: str = "state") -> StateStore: ...
+
+    @abstractmethod
+    def models(self, provider: str) -> ModelsCache: ...
+
+    @abstractmethod
+    def log(self, name: str, namespace: str = "indexes") -> RecordLog: ...
+
+    @abstractmethod
+    def get(
+        self, namespace: str, key: str, max_age: Optional[float] = None
+    ) -> Optional[Any]: ...
+
+    @abstractmethod
+    def put(self, namespace: str, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None: ...
+
+    @abstractmethod
+    def age(self, namespace: str, key: str) -> Optional[float]: ...
+
+    @abstractmethod
+    def evict(
+        self, namespace: str, max_entries: int, max_age: Optional[float] = None
+    ) -> None: ...
+
+
+class FileBackend(CacheBackend):
+    # The original layout: one file per entry under ~/.gitk_config/cache.
+
+    def __init__(
+        self, root: Optional[Path] = None, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.root = root
+        self._clock = clock
+
+    def _path(self, namespace: str, name: str, suffix: str = ".json") -> Path:
+        if self.root is None:
+            return CacheDirectory(namespace=namespace).get_file_path(name, suffix)
+        directory = self.root / namespace
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{name.replace('/', '_')}{suffix}"
+
+    def state(self, name: str, namespace: str = "state") -> StateFile:
+        return StateFile(name, path=self._path(namespace, name))
+
+    def models(self, provider: str) -> CacheFile:
+        if self.root is None:
+            return CacheFile(provider)
+        return CacheFile(provider, path=self._path("providers", f"{provider}_models"))
+
+    def log(self, name: str, namespace: str = "indexes") -> JsonLinesFile:
+        return JsonLinesFile(self._path(namespace, name, ".jsonl"))
+
+    def _read_entry(self, path: Path) -> Optional[Tuple[Any, float]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        except OSError as e:
+            raise CacheFileError(f"OS error reading cache entry {path}", cause=e) from e
+
+        if not isinstance(entry, dict) or "value" not in entry:
+            return None
+        return entry["value"], float(entry.get("updated_at", 0))
+
+    def get(
+        self, namespace: str, key: str, max_age: Optional[float] = None
+    ) -> Optional[Any]:
+        entry = self._read_entry(self._path(namespace, key))
+        if entry is None:
+            return None
+        value, updated_at = entry
+        if max_age is not None and self._clock() - updated_at > max_age:
+            return None
+        return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        # A put replaces the whole entry, so the rename alone is enough and no
+        # per-entry lock file is left behind for evict to miss.
+        try:
+            with atomic_write(self._path(namespace, key), locked=False) as f:
+                json.dump({"updated_at": self._clock(), "value": value}, f)
+        except OSError as e:
+            raise CacheFileError("OS error writing cache entry", cause=e) from e
+
+    def delete(self, namespace: str, key: str) -> None:
+        try:
+            self._path(namespace, key).unlink(missing_ok=True)
+        except OSError as e:
+            raise CacheFileError("OS error deleting cache entry", cause=e) from e
+
+    def age(self, namespace: str, key: str) -> Optional[float]:
+        entry = self._read_entry(self._path(namespace, key))
+        return None if entry is None else self._clock() - entry[1]
+
+    def evict(
+        self, namespace: str, max_entries: int, max_age: Optional[float] = None
+    ) -> None:
+        directory = self._path(namespace, "_").parent
+        now = self._clock()
+        entries = []
+        for path in directory.glob("*.json"):
+            entry = self._read_entry(path)
+            updated_at = entry[1] if entry else 0.0
+            if max_age is not None and now - updated_at > max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((updated_at, path))
+
+        entries.sort(reverse=True)
+        for _, path in entries[max_entries:]:
+            path.unlink(missing_ok=True)
+
+
+class SQLiteBackend(CacheBackend):
+    # Every cache in one database. WAL lets readers run alongside a writer,
+    # and BEGIN IMMEDIATE serializes writers across gitk processes.
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        );
+        CREATE INDEX IF NOT EXISTS entries_by_age ON entries (namespace, updated_at);
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            namespace TEXT NOT NULL,
+            name TEXT NOT NULL,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS records_by_log ON records (namespace, name, id);
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeout: float = SQLITE_BUSY_TIMEOUT,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._clock = clock
+        # sqlite3 connections can't be shared between threads; the catalogue
+        # refresh runs on its own thread.
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self, write: bool = True) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._connection()
+            if connection.in_transaction:
+                # Nested use (a log append under its lock) joins the outer one.
+                yield connection
+                return
+
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            raise CacheFileError(f"SQLite error in {self.path}", cause=e) from e
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def read_entry(
+        self, connection: sqlite3.Connection, namespace: str, key: str
+    ) -> Optional[Tuple[Any, float]]:
+        row = connection.execute(
+            "SELECT value, updated_at FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def write_entry(
+        self, connection: sqlite3.Connection, namespace: str, key: str, value: Any
+    ) -> None:
+        connection.execute(
+            "INSERT INTO entries (namespace, key, value, updated_at)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (namespace, key) DO UPDATE"
+            " SET value = excluded.value, updated_at = excluded.updated_at",
+            (namespace, key, json.dumps(value), self._clock()),
+        )
+
+    def state(self, name: str, namespace: str = "state") -> "SQLiteState":
+        return SQLiteState(self, namespace, name)
+
+    def models(self, provider: str) -> "SQLiteModelsCache":
+        return SQLiteModelsCache(self, provider)
+
+    def log(self, name: str, namespace: str = "indexes") -> "SQLiteLog":
+        return SQLiteLog(self, namespace, name)
+
+    def get(
+        self, namespace: str, key: str, max_age: Optional[float] = None
+    ) -> Optional[Any]:
+        with self.transaction(write=False) as connection:
+            entry = self.read_entry(connection, namespace, key)
+        if entry is None:
+            return None
+        value, updated_at = entry
+        if max_age is not None and self._clock() - updated_at > max_age:
+            return None
+        return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        with self.transaction() as connection:
+            self.write_entry(connection, namespace, key, value)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self.transaction() as connection:
+            connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+
+    def age(self, namespace: str, key: str) -> Optional[float]:
+        with self.transaction(write=False) as connection:
+            row = connection.execute(
+                "SELECT updated_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        return None if row is None else self._clock() - row[0]
+
+    def evict(
+        self, namespace: str, max_entries: int, max_age: Optional[float] = None
+    ) -> None:
+        with self.transaction() as connection:
+            if max_age is not None:
+                connection.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND updated_at < ?",
+                    (namespace, self._clock() - max_age),
+                )
+            connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM entries WHERE namespace = ?"
+                " ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_entries),
+            )
+
+
+class SQLiteState:
+
+    def __init__(self, backend: SQLiteBackend, namespace: str, name: str) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @contextmanager
+    def transaction(self, readonly: bool = False) -> Iterator[Dict[str, Any]]:
+        with self.backend.transaction(write=not readonly) as connection:
+            entry = self.backend.read_entry(connection, self.namespace, self._name)
+            state = entry[0] if entry and isinstance(entry[0], dict) else {}
+            yield state
+            if not readonly:
+                self.backend.write_entry(connection, self.namespace, self._name, state)
+
+    def load(self) -> Dict[str, Any]:
+        with self.transaction(readonly=True) as state:
+            return state
+
+
+class SQLiteModelsCache:
+    NAMESPACE = "providers"
+
+    def __init__(self, backend: SQLiteBackend, provider: str) -> None:
+        self.backend = backend
+        self.key = f"{provider}_models"
+
+    def save_models(self, models: List["ModelConfig"]) -> None:
+        self.backend.put(self.NAMESPACE, self.key, [m.model_dump() for m in models])
+
+    def load_models(self) -> List["ModelConfig"]:
+        data = self.backend.get(self.NAMESPACE, self.key)
+        if not isinstance(data, list):
+            return []
+
+        from core.models import ModelConfig
+
+        return [ModelConfig(**m) for m in data]
+
+    def age(self) -> Optional[float]:
+        return self.backend.age(self.NAMESPACE, self.key)
+
+    def delete_cache(self) -> None:
+        self.backend.delete(self.NAMESPACE, self.key)
+
+
+class SQLiteLog:
+
+    def __init__(self, backend: SQLiteBackend, namespace: str, name: str) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.name = name
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self.backend.transaction():
+            yield
+
+    def read(self) -> List[Dict[str, Any]]:
+        with self.backend.transaction(write=False) as connection:
+            rows = connection.execute(
+                "SELECT record FROM records WHERE namespace = ? AND name = ?"
+                " ORDER BY id",
+                (self.namespace, self.name),
+            ).fetchall()
+
+        records = []
+        for (raw,) in rows:
+            record = json.loads(raw)
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with self.backend.transaction() as connection:
+            self._insert(connection, [record])
+
+    def rewrite(self, records: List[Dict[str, Any]]) -> None:
+        with self.backend.transaction() as connection:
+            connection.execute(
+                "DELETE FROM records WHERE namespace = ? AND name = ?",
+                (self.namespace, self.name),
+            )
+            self._insert(connection, records)
+
+    def _insert(
+        self, connection: sqlite3.Connection, records: List[Dict[str, Any]]
+    ) -> None:
+        connection.executemany(
+            "INSERT INTO records (namespace, name, record) VALUES (?, ?, ?)",
+            [
+                (self.namespace, self.name, json.dumps(r, separators=(",", ":")))
+                for r in records
+            ],
+        )
+
+
+def create_backend(kind: str) -> CacheBackend:
+    kind = kind.strip().lower()
+    if kind == "sqlite":
+        return SQLiteBackend(
+            ConfigDirectory().config_dir() / "cache" / SQLITE_CACHE_FILE
+        )
+    if kind not in ("", "file"):
+        logger.warning("Unknown cache backend '%s', using files", kind)
+    return FileBackend()
+
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.getenv(CACHE_BACKEND_ENV, "file"))
+        return _backend
@@ -1,7 +1,12 @@
 import json
 import os
+import stat
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 
 from core.config.paths import CacheDirectory, ConfigDirectory
 from core.exceptions import CacheFileError, EnvFileError
@@ -9,6 +14,64 @@ from core.exceptions import CacheFileError, EnvFileError
 if TYPE_CHECKING:
     from core.models import ModelConfig
 
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock_handle(handle: IO[bytes]) -> None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_handle(handle: IO[bytes]) -> None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_handle(handle: IO[bytes]) -> None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_handle(handle: IO[bytes]) -> None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        _lock_handle(handle)
+        try:
+            yield
+        finally:
+            _unlock_handle(handle)
+
+
+def lock_path_for(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+
+@contextmanager
+def atomic_write(path: Path, locked: bool = True) -> Iterator[IO[str]]:
+    # Readers see either the old or the new file, never a partial one. Pass
+    # locked=False when the caller already holds lock_path_for(path): flock
+    # is per open file, so taking it twice in one process would deadlock.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    with file_lock(lock_path_for(path)) if locked else nullcontext():
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                yield handle
+                handle.flush()
+                os.fsync(handle.fileno())
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
 
 class BaseFile:
 
@@ -28,16 +91,16 @@ class BaseFile:
 
 class CacheFile(BaseFile):
 
-    def __init__(self, provider_name: str) -> None:
-        cache_dir = CacheDirectory()
-        cache_dir.ensure()
-        cache_file_path = cache_dir.get_cache_file_path(provider_name)
-        super().__init__(cache_file_path)
+    def __init__(self, provider_name: str, path: Optional[Path] = None) -> None:
+        if path is None:
+            cache_dir = CacheDirectory()
+            cache_dir.ensure()
+            path = cache_dir.get_cache_file_path(provider_name)
+        super().__init__(path)
 
     def save_models(self, models: List["ModelConfig"]) -> None:
         try:
-            self.ensure()
-            with open(self.file_path, "w", encoding="utf-8") as f:
+            with atomic_write(self.file_path) as f:
                 json.dump(
                     [m.model_dump() for m in models], f, ensure_ascii=False, indent=2
                 )
@@ -59,11 +122,10 @@ class CacheFile(BaseFile):
                 try:
                     data = json.load(f)
                 except json.JSONDecodeError as e:
+                    self.file_path.unlink()
                     raise CacheFileError(
                         f"Invalid JSON in cache file {self.file_path}", cause=e
                     ) from e
-                finally:
-                    self.file_path.unlink()
 
             from core.models import ModelConfig
 
@@ -76,6 +138,12 @@ class CacheFile(BaseFile):
         except OSError as e:
             raise CacheFileError("OS error reading cache file", cause=e) from e
 
+    def age(self) -> Optional[float]:
+        try:
+            return time.time() - self.file_path.stat().st_mtime
+        except OSError:
+            return None
+
     def delete_cache(self) -> None:
         try:
             if self.exists():
@@ -117,9 +185,11 @@ class EnvFile(BaseFile):
     def save_key(self, provider: str, api_key: str) -> None:
         try:
             env_var = self.get_env_var_name(provider)
-            env_vars = self._read_env_file()
-            env_vars[env_var] = api_key
-            self._write_env_file(env_vars)
+            # Held across the read so concurrent saves don't drop each other.
+            with file_lock(lock_path_for(self.file_path)):
+                env_vars = self._read_env_file()
+                env_vars[env_var] = api_key
+                self._write_env_file(env_vars, locked=False)
         except Exception as e:
             raise EnvFileError("Failed to save key", cause=e) from e
 
@@ -159,9 +229,9 @@ class EnvFile(BaseFile):
         except Exception as e:
             raise EnvFileError("Failed to read env file", cause=e) from e
 
-    def _write_env_file(self, env_vars: Dict[str, str]) -> None:
+    def _write_env_file(self, env_vars: Dict[str, str], locked: bool = True) -> None:
         try:
-            with open(self.file_path, "w", encoding="utf-8") as f:
+            with atomic_write(self.file_path, locked=locked) as f:
                 f.write(self.ENV_HEADER)
                 for key, value in env_vars.items():
                     f.write(f"{key}={value}\n")
@@ -174,3 +244,104 @@ class EnvFile(BaseFile):
             raise EnvFileError("OS error writing to env file", cause=e) from e
         except Exception as e:
             raise EnvFileError("Failed to write env file", cause=e) from e
+
+
+class StateFile(BaseFile):
+
+    def __init__(
+        self, name: str, namespace: str = "state", path: Optional[Path] = None
+    ) -> None:
+        if path is None:
+            path = CacheDirectory(namespace=namespace).get_file_path(name)
+        super().__init__(path)
+
+    @property
+    def name(self) -> str:
+        return self.file_path.stem
+
+    @property
+    def lock_path(self) -> Path:
+        return lock_path_for(self.file_path)
+
+    @contextmanager
+    def transaction(self, readonly: bool = False) -> Iterator[Dict[str, Any]]:
+        try:
+            self.ensure()
+            with file_lock(self.lock_path):
+                state = self._read_state()
+                yield state
+                if not readonly:
+                    self._write_state(state)
+        except PermissionError as e:
+            raise CacheFileError(
+                f"Permission denied accessing state file: {self.file_path}"
+            ) from e
+        except OSError as e:
+            raise CacheFileError("OS error accessing state file", cause=e) from e
+
+    def load(self) -> Dict[str, Any]:
+        with self.transaction(readonly=True) as state:
+            return state
+
+    def _read_state(self) -> Dict[str, Any]:
+        if not self.exists():
+            return {}
+
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # A torn or foreign file is not worth failing a commit over.
+            return {}
+
+        return data if isinstance(data, dict) else {}
+
+    def _write_state(self, state: Dict[str, Any]) -> None:
+        with atomic_write(self.file_path, locked=False) as f:
+            json.dump(state, f)
+
+
+class JsonLinesFile(BaseFile):
+
+    @property
+    def lock_path(self) -> Path:
+        return lock_path_for(self.file_path)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        self.ensure()
+        with file_lock(self.lock_path):
+            yield
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not self.exists():
+            return []
+
+        records = []
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn trailing line from an interrupted append.
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+        return records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.file_path, "a+b") as f:
+            # End a torn trailing line first, or the new record would be glued
+            # onto it and skipped with it on read.
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+
+    def rewrite(self, records: List[Dict[str, Any]]) -> None:
+        with atomic_write(self.file_path, locked=False) as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
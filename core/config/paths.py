@@ -78,11 +78,13 @@ class ConfigDirectory(BaseDirectory[ConfigDirectoryError]):
 
 class CacheDirectory(BaseDirectory[CacheDirectoryError]):
 
-    def __init__(self, config_dir: Optional[ConfigDirectory] = None) -> None:
+    def __init__(
+        self, config_dir: Optional[ConfigDirectory] = None, namespace: str = "providers"
+    ) -> None:
         if config_dir is None:
             config_dir = ConfigDirectory()
 
-        cache_path = config_dir.config_dir() / "cache" / "providers"
+        cache_path = config_dir.config_dir() / "cache" / namespace
 
         try:
             super().__init__(cache_path, CacheDirectoryError)
@@ -105,6 +107,19 @@ class CacheDirectory(BaseDirectory[CacheDirectoryError]):
                 f"Failed to get cache file path for provider '{provider_name}'", cause=e
             ) from e
 
+    def get_file_path(self, name: str, suffix: str = ".json") -> Path:
+        try:
+            safe_name = self._sanitize_filename(name)
+            if not safe_name:
+                raise ValueError(f"Invalid cache file name: '{name}'")
+
+            return self.ensure_exists() / f"{safe_name}{suffix}"
+
+        except Exception as e:
+            raise CacheDirectoryError(
+                f"Failed to get cache file path for '{name}'", cause=e
+            ) from e
+
     def _sanitize_filename(self, filename: str) -> str:
         if not filename or not filename.strip():
             return ""
@@ -71,8 +71,70 @@ Examples:
 
 """
 
+MAX_DIFF_LENGTH = 3000
+TRUNCATION_RESERVE = 200
+MAX_SOURCE_LOOKUPS = 20
+RENAME_SIMILARITY = 50
+NEAR_RENAME_SIMILARITY = 90
+DEDUP_MIN_REPEATS = 3
+MAX_PARALLEL_REPOS = 8
+MAX_PARALLEL_GENERATIONS = 4
+GENERATION_TIMEOUT = 60.0
+REQUEST_TIMEOUT = 30.0
+DEADLINE_MIN_ATTEMPT = 2.0
+
+# UTF-8 bytes per token on diffs, by model family. Rough, and on the low side
+# so estimates err towards more tokens; unknown families use the default.
+BYTES_PER_TOKEN = {
+    "gpt": 3.6,
+    "claude": 3.3,
+    "llama": 3.4,
+    "gemma": 3.5,
+    "qwen": 3.4,
+    "deepseek": 3.3,
+    "mistral": 3.0,
+    "mixtral": 3.0,
+    "phi": 3.2,
+}
+DEFAULT_BYTES_PER_TOKEN = 3.0
+ROUTING_FAST_MAX_TOKENS = 600
+ROUTING_OUTPUT_TOKENS = 512
+BENCH_TOP_MODELS = 4
+BENCH_CHARS_PER_TOKEN = 4
+
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+RESPONSE_CACHE_SIZE = 64
+MODELS_CACHE_MAX_AGE = 60 * 60
+MODELS_CACHE_SIZE = 32
+MODELS_REFRESH_EXIT_WAIT = 10.0
+CACHE_BACKEND_ENV = "GITK_CACHE_BACKEND"
+SQLITE_CACHE_FILE = "cache.sqlite3"
+SQLITE_BUSY_TIMEOUT = 5.0
+
+# Observed behaviour, in the same points as the name heuristics below.
+TELEMETRY_SMOOTHING = 0.2
+TELEMETRY_MIN_SAMPLES = 5
+TELEMETRY_MAX_MODELS = 100
+TELEMETRY_LATENCY_TARGET = 5.0
+TELEMETRY_LATENCY_WEIGHT = 8
+TELEMETRY_TTFT_TARGET = 1.5
+TELEMETRY_TTFT_WEIGHT = 4
+TELEMETRY_ERROR_WEIGHT = 15
+TELEMETRY_THROTTLE_WEIGHT = 10
+TELEMETRY_ACCEPTANCE_WEIGHT = 10
+WATCH_DEBOUNCE = 2.0
+WATCH_POLL_INTERVAL = 1.0
+WATCH_MIN_INTERVAL = 30.0
+WATCH_BURST = 2.0
+
 PROVIDER_INSTRUCTIONS = {
     "openrouter": "OpenRouter → Get your key at: https://openrouter.ai",
+    "local": "Local server → any OpenAI-compatible endpoint (llama.cpp, Ollama, vLLM)",
+}
+
+PROVIDER_API_BASES = {
+    "openrouter": "https://openrouter.ai/api/v1",
+    "local": "http://localhost:8080/v1",
 }
 
 
@@ -0,0 +1,98 @@
+import sys
+import time
+from types import TracebackType
+from typing import Any, Callable, Optional
+
+from urllib3.connectionpool import ConnectionPool
+from urllib3.exceptions import MaxRetryError
+from urllib3.response import BaseHTTPResponse
+from urllib3.util.retry import Retry
+
+from core.constants import DEADLINE_MIN_ATTEMPT
+from core.exceptions import DeadlineExceededError
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+
+class Deadline:
+    # One wall-clock budget for every attempt of a generation: retries,
+    # rate-limit waits and failover all draw from it, and whatever is left
+    # when it runs out goes to the offline fallback.
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.budget = budget if budget and budget > 0 else None
+        self._clock = clock
+        self.expires_at = None if self.budget is None else clock() + self.budget
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def fits(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def timeout(self, cap: float) -> float:
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if remaining < DEADLINE_MIN_ATTEMPT:
+            raise DeadlineExceededError(f"Request budget of {self.budget:g}s exhausted")
+        return min(cap, remaining)
+
+
+class DeadlineRetry(Retry):
+    # urllib3 retries inside a single session.post, out of the adapter's
+    # sight, and every retry reuses the timeout computed before the post.
+    # attempt_timeout is the longest that timeout can be, so a retry is only
+    # made when the backoff plus a full attempt still fits the deadline.
+
+    def __init__(
+        self,
+        *args: Any,
+        deadline: Optional[Callable[[], Deadline]] = None,
+        attempt_timeout: float = DEADLINE_MIN_ATTEMPT,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+
+    def new(self, **kw: Any) -> Self:
+        retry = super().new(**kw)
+        retry.deadline = self.deadline
+        retry.attempt_timeout = self.attempt_timeout
+        return retry
+
+    def increment(
+        self,
+        method: Optional[str] = None,
+        url: Optional[str] = None,
+        response: Optional[BaseHTTPResponse] = None,
+        error: Optional[Exception] = None,
+        _pool: Optional[ConnectionPool] = None,
+        _stacktrace: Optional[TracebackType] = None,
+    ) -> Self:
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if self.deadline is None:
+            return retry
+
+        wait = retry.get_backoff_time()
+        if response is not None and self.respect_retry_after_header:
+            wait = max(wait, retry.get_retry_after(response) or 0.0)
+        if not self.deadline().fits(wait + self.attempt_timeout):
+            # With raise_on_status=False urllib3 hands back the last response.
+            raise MaxRetryError(_pool, url or "", error)  # type: ignore[arg-type]
+        return retry
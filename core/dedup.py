@@ -0,0 +1,114 @@
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.constants import DEDUP_MIN_REPEATS
+from core.diff import FileDiff, Hunk
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+MAX_NOTE_PATHS = 5
+
+
+def hunk_fingerprint(hunk: Hunk) -> str:
+    # Tokens present on both sides cancel out, so surrounding identifiers and
+    # whitespace don't matter: `foo(a)` -> `bar(a)` and `x = foo` -> `x = bar`
+    # share a fingerprint.
+    removed = Counter(t for line in hunk.removed for t in TOKEN_PATTERN.findall(line))
+    added = Counter(t for line in hunk.added for t in TOKEN_PATTERN.findall(line))
+
+    digest = hashlib.sha1(usedforsecurity=False)
+    for side in (removed - added, added - removed):
+        digest.update(" ".join(sorted(side.elements())).encode("utf-8", "replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class _Pattern:
+    origin: Tuple[str, int]
+    hunks: int = 0
+    paths: List[str] = field(default_factory=list)
+
+
+class HunkDeduplicator:
+
+    def __init__(self, min_repeats: int = DEDUP_MIN_REPEATS) -> None:
+        self.min_repeats = min_repeats
+        self._patterns: Dict[str, _Pattern] = {}
+        self._fingerprints: Dict[Tuple[str, int], str] = {}
+
+    def observe(self, file_diff: FileDiff) -> None:
+        for index, hunk in enumerate(file_diff.hunks):
+            if not hunk.added and not hunk.removed:
+                continue
+            fingerprint = hunk_fingerprint(hunk)
+            location = (file_diff.path, index)
+            self._fingerprints[location] = fingerprint
+
+            pattern = self._patterns.setdefault(fingerprint, _Pattern(location))
+            pattern.hunks += 1
+            if file_diff.path not in pattern.paths:
+                pattern.paths.append(file_diff.path)
+
+    @property
+    def collapsed(self) -> int:
+        return sum(
+            pattern.hunks - 1
+            for pattern in self._patterns.values()
+            if pattern.hunks >= self.min_repeats
+        )
+
+    def _repeated(self, path: str, index: int) -> Optional[_Pattern]:
+        fingerprint = self._fingerprints.get((path, index))
+        if fingerprint is None:
+            return None
+        pattern = self._patterns[fingerprint]
+        return pattern if pattern.hunks >= self.min_repeats else None
+
+    def redundant(self, path: str, hunk_count: int) -> bool:
+        if hunk_count == 0:
+            return False
+        for index in range(hunk_count):
+            pattern = self._repeated(path, index)
+            if pattern is None or pattern.origin == (path, index):
+                return False
+        return True
+
+    def apply(self, file_diff: FileDiff) -> Optional[FileDiff]:
+        hunks: List[Hunk] = []
+        for index, hunk in enumerate(file_diff.hunks):
+            pattern = self._repeated(file_diff.path, index)
+            if pattern is None:
+                hunks.append(hunk)
+            elif pattern.origin == (file_diff.path, index):
+                hunks.append(replace(hunk, lines=[*hunk.lines, _note(pattern)]))
+
+        if file_diff.hunks and not hunks:
+            return None
+        return replace(file_diff, hunks=hunks)
+
+
+def _note(pattern: _Pattern) -> str:
+    names = ", ".join(pattern.paths[:MAX_NOTE_PATHS])
+    if len(pattern.paths) > MAX_NOTE_PATHS:
+        names += f" and {len(pattern.paths) - MAX_NOTE_PATHS} more"
+    return (
+        f"[same change applied in {pattern.hunks} hunks across "
+        f"{len(pattern.paths)} files: {names}]"
+    )
+
+
+def deduplicate_hunks(
+    files: Sequence[FileDiff], min_repeats: int = DEDUP_MIN_REPEATS
+) -> Tuple[List[FileDiff], int]:
+    deduplicator = HunkDeduplicator(min_repeats)
+    for file_diff in files:
+        deduplicator.observe(file_diff)
+
+    if not deduplicator.collapsed:
+        return list(files), 0
+
+    kept = [deduplicator.apply(file_diff) for file_diff in files]
+    return [f for f in kept if f is not None], deduplicator.collapsed
@@ -0,0 +1,253 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from core.constants import NEAR_RENAME_SIMILARITY, RENAME_SIMILARITY
+
+SYMBOL_PATTERN = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?(?:async\s+)?"
+    r"(?:def|class|function|func|fn|interface|struct|enum|trait|type)\s+"
+    r"(?:\([^)]*\)\s*)?(?P<name>[A-Za-z_][\w]*)"
+)
+
+RENAME_FLAGS = [
+    f"--find-renames={RENAME_SIMILARITY}%",
+    f"--find-copies={RENAME_SIMILARITY}%",
+]
+
+FILE_HEADER = b"diff --git "
+NON_WHITESPACE = re.compile(rb"\S")
+WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+RENAMES_HEADER = "Renamed or copied files:"
+
+HUNK_HEADER_PATTERN = re.compile(
+    r"^@@ -(?P<old_start>\d+)(?:,(?P<old_len>\d+))? "
+    r"\+(?P<new_start>\d+)(?:,(?P<new_len>\d+))? @@ ?(?P<context>.*)$"
+)
+
+
+@dataclass
+class Hunk:
+    header: str
+    context: str = ""
+    old_start: int = 0
+    new_start: int = 0
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def added(self) -> List[str]:
+        return [line[1:] for line in self.lines if line.startswith("+")]
+
+    @property
+    def removed(self) -> List[str]:
+        return [line[1:] for line in self.lines if line.startswith("-")]
+
+
+@dataclass
+class FileDiff:
+    path: str
+    old_path: Optional[str] = None
+    status: str = "modified"
+    similarity: Optional[int] = None
+    is_binary: bool = False
+    header: List[str] = field(default_factory=list)
+    hunks: List[Hunk] = field(default_factory=list)
+
+    @property
+    def additions(self) -> int:
+        return sum(len(hunk.added) for hunk in self.hunks)
+
+    @property
+    def deletions(self) -> int:
+        return sum(len(hunk.removed) for hunk in self.hunks)
+
+    @property
+    def extension(self) -> str:
+        name = self.path.rsplit("/", 1)[-1]
+        return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+    def added_symbols(self) -> List[str]:
+        return _symbols(line for hunk in self.hunks for line in hunk.added)
+
+    def removed_symbols(self) -> List[str]:
+        return _symbols(line for hunk in self.hunks for line in hunk.removed)
+
+    def touched_symbols(self) -> List[str]:
+        return _symbols(hunk.context for hunk in self.hunks)
+
+    def is_near_rename(self, threshold: int = NEAR_RENAME_SIMILARITY) -> bool:
+        if self.status not in ("renamed", "copied"):
+            return False
+        return self.similarity is None or self.similarity >= threshold
+
+    def render(self) -> str:
+        lines = list(self.header)
+        for hunk in self.hunks:
+            lines.append(hunk.header)
+            lines.extend(hunk.lines)
+        return "\n".join(lines)
+
+    def rename_entry(self) -> str:
+        verb = "rename" if self.status == "renamed" else "copy"
+        entry = f"{verb} {self.old_path} -> {self.path}"
+        if self.similarity is not None and self.similarity < 100:
+            entry += (
+                f" ({self.similarity}% similar, +{self.additions}/-{self.deletions})"
+            )
+        return entry
+
+
+def _symbols(lines: Iterable[str]) -> List[str]:
+    found: List[str] = []
+    for line in lines:
+        match = SYMBOL_PATTERN.match(line)
+        if match and match.group("name") not in found:
+            found.append(match.group("name"))
+    return found
+
+
+def _strip_prefix(path: str) -> str:
+    if path.startswith(("a/", "b/")):
+        return path[2:]
+    return path
+
+
+def parse_diff(diff: str) -> List[FileDiff]:
+    files: List[FileDiff] = []
+    current: Optional[FileDiff] = None
+    hunk: Optional[Hunk] = None
+
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            _, _, paths = line.partition("diff --git ")
+            old, sep, new = paths.rpartition(" b/")
+            current = FileDiff(
+                path=new if sep else _strip_prefix(paths),
+                old_path=_strip_prefix(old) if sep else None,
+                header=[line],
+            )
+            files.append(current)
+            hunk = None
+            continue
+
+        if current is None:
+            continue
+
+        if hunk is not None and line[:1] in ("+", "-", " ", "\\", ""):
+            hunk.lines.append(line)
+            continue
+
+        match = HUNK_HEADER_PATTERN.match(line)
+        if match:
+            hunk = Hunk(
+                header=line,
+                context=match.group("context").strip(),
+                old_start=int(match.group("old_start")),
+                new_start=int(match.group("new_start")),
+            )
+            current.hunks.append(hunk)
+            continue
+
+        hunk = None
+        current.header.append(line)
+
+        if line.startswith("new file mode"):
+            current.status = "added"
+        elif line.startswith("deleted file mode"):
+            current.status = "deleted"
+        elif line.startswith(("rename from ", "copy from ")):
+            current.old_path = line.split(" ", 2)[2]
+            current.status = "renamed" if line.startswith("rename") else "copied"
+        elif line.startswith(("rename to ", "copy to ")):
+            current.path = line.split(" ", 2)[2]
+        elif line.startswith("similarity index "):
+            current.similarity = int(line.rstrip("%").rsplit(" ", 1)[1])
+        elif line.startswith("Binary files ") or line == "GIT binary patch":
+            current.is_binary = True
+        elif line.startswith("+++ ") and line != "+++ /dev/null":
+            current.path = _strip_prefix(line[4:])
+
+    for file_diff in files:
+        if file_diff.status not in ("renamed", "copied"):
+            file_diff.old_path = None
+
+    return files
+
+
+def compact_renames(files: List[FileDiff]) -> str:
+    # Pure and near renames only need one line each; the content is known.
+    entries = [f.rename_entry() for f in files if f.is_near_rename()]
+    rest = [f.render() for f in files if not f.is_near_rename()]
+
+    if not entries:
+        return "\n".join(rest)
+    summary = "\n".join([RENAMES_HEADER, *entries])
+    return "\n\n".join([summary, *rest])
+
+
+def parse_name_status(output: str) -> List[Tuple[str, Optional[str]]]:
+    entries: List[Tuple[str, Optional[str]]] = []
+    for line in output.splitlines():
+        status, _, paths = line.partition("\t")
+        if not paths:
+            continue
+        if status[:1] in ("R", "C"):
+            old_path, _, new_path = paths.partition("\t")
+            entries.append((new_path, old_path if status[:1] == "R" else None))
+        else:
+            entries.append((paths, None))
+    return entries
+
+
+class DiffBuffer:
+    # Raw `git diff` output kept as one bytes object. Sections are located by
+    # offset and only the parts that reach the prompt are ever decoded.
+    __slots__ = ("_data", "_view", "_start", "_end")
+
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._view = memoryview(data)
+        first = NON_WHITESPACE.search(data)
+        self._start = first.start() if first else len(data)
+        end = len(data)
+        while end > self._start and data[end - 1] in WHITESPACE:
+            end -= 1
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __bool__(self) -> bool:
+        return self._end > self._start
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> str:
+        start = self._start + start
+        stop = self._end if end is None else min(self._end, self._start + end)
+        return str(self._view[start:stop], "utf-8", "replace")
+
+    def text(self) -> str:
+        return self.decode()
+
+    def file_spans(self) -> Iterator[Tuple[int, int]]:
+        data = self._data
+        position = data.find(FILE_HEADER, self._start, self._end)
+        while 0 <= position < self._end:
+            following = data.find(b"\n" + FILE_HEADER, position, self._end)
+            end = self._end if following < 0 else following + 1
+            yield position - self._start, end - self._start
+            position = following + 1 if following >= 0 else -1
+
+    def iter_files(self) -> Iterator[Tuple[FileDiff, Tuple[int, int]]]:
+        for start, end in self.file_spans():
+            for file_diff in parse_diff(self.decode(start, end)):
+                yield file_diff, (start, end)
+
+    def head(self, start: int, end: int, max_length: int) -> str:
+        # Cut at a line boundary so the model never sees a torn line.
+        if end - start <= max_length:
+            return self.decode(start, end)
+        # Without a newline inside the limit nothing of the section fits.
+        cut = self._data.rfind(
+            b"\n", self._start + start, self._start + start + max_length
+        )
+        return self.decode(start, cut - self._start) if cut >= 0 else ""
@@ -62,4 +62,16 @@ class UnsupportedProviderError(BaseError): ...
 class ProviderAPIError(BaseError): ...
 
 
+class RateLimitError(ProviderAPIError): ...
+
+
+class ProviderUnavailableError(ProviderAPIError): ...
+
+
+class CircuitOpenError(ProviderUnavailableError): ...
+
+
+class DeadlineExceededError(ProviderUnavailableError): ...
+
+
 class ModelGenerationError(BaseError): ...
@@ -1,24 +1,197 @@
 import argparse
+import logging
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
-from core.adapters import ModelFactory
+from core.adapters import HeuristicAdapter, ModelFactory
 from core.config.config import GitkConfig
-from core.models import Config
-from core.templates import Template
+from core.constants import MAX_DIFF_LENGTH, MAX_SOURCE_LOOKUPS
+from core.deadline import Deadline
+from core.dedup import HunkDeduplicator, deduplicate_hunks
+from core.diff import (
+    RENAMES_HEADER,
+    DiffBuffer,
+    FileDiff,
+    compact_renames,
+    parse_diff,
+)
+from core.exceptions import CacheFileError, MissingAPIKeyError, ProviderUnavailableError
+from core.history import HistoryIndex
+from core.models import Config, ModelConfig
+from core.responses import ResponseCache
+from core.routing import fit_diff, route_model
+from core.runner import SafeGitRunner
+from core.symbols import (
+    SourceLoader,
+    extract_symbol_changes,
+    format_symbol_summary,
+)
+from core.templates import TemplateLike, compile_template
 from core.utils import clean_diff, clean_message
 
+logger = logging.getLogger("gitk")
+
+
+def _with_project_conventions(
+    instruction: Optional[str], files: List[FileDiff], cwd: Optional[Path] = None
+) -> Optional[str]:
+    try:
+        history = HistoryIndex.load_for_cwd(cwd)
+    except CacheFileError:
+        return instruction
+
+    if history is None:
+        return instruction
+
+    conventions = history.conventions([f.path for f in files])
+    if not conventions:
+        return instruction
+    return f"{instruction}\n\n{conventions}" if instruction else conventions
+
+
+def _staged_source_loader(cwd: Optional[Path] = None) -> SourceLoader:
+    runner = SafeGitRunner()
+    lookups = 0
+
+    def staged_source(path: str) -> Optional[str]:
+        # Each lookup is a git process; past the cap fall back to hunk context.
+        nonlocal lookups
+        lookups += 1
+        if lookups > MAX_SOURCE_LOOKUPS:
+            return None
+        result = runner.run(
+            ["show", f":{path}"], capture_output=True, text=True, cwd=cwd
+        )
+        return result.stdout if result.returncode == 0 else None
+
+    return staged_source
+
+
+def _prepare_diff(diff: str, files: List[FileDiff], cwd: Optional[Path] = None) -> str:
+    if len(diff) <= MAX_DIFF_LENGTH:
+        return clean_diff(diff)
+
+    # Over budget: describe changed symbols first, then fit raw hunks after.
+    summary = format_symbol_summary(
+        extract_symbol_changes(files, _staged_source_loader(cwd))
+    )
+    remaining = MAX_DIFF_LENGTH - len(summary)
+    if remaining < MAX_DIFF_LENGTH // 4:
+        return clean_diff(summary)
+    return f"{summary}\n\n{clean_diff(diff, remaining)}"
+
+
+def _prepare_text(diff: str, cwd: Optional[Path] = None) -> Tuple[str, List[FileDiff]]:
+    files = parse_diff(diff)
+    prompt_files, collapsed = deduplicate_hunks(files)
+    prompt_diff = diff
+    if collapsed or any(f.is_near_rename() for f in files):
+        prompt_diff = compact_renames(prompt_files)
+    return _prepare_diff(prompt_diff, prompt_files, cwd), files
+
+
+def _read_up_to(pieces: Iterable[str], limit: int) -> str:
+    parts: List[str] = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= limit:
+            break
+    return "".join(parts)
+
+
+def _prepare_buffer(
+    buffer: DiffBuffer, cwd: Optional[Path] = None
+) -> Tuple[str, List[FileDiff]]:
+    # Same result as _prepare_text, but file sections are parsed one at a time on each pass
+    # and only the start of the prompt diff, up to the budget, is built.
+    deduplicator = HunkDeduplicator()
+    files: List[FileDiff] = []
+    has_renames = False
+    for file_diff, _ in buffer.iter_files():
+        deduplicator.observe(file_diff)
+        has_renames = has_renames or file_diff.is_near_rename()
+        files.append(
+            FileDiff(
+                path=file_diff.path,
+                old_path=file_diff.old_path,
+                status=file_diff.status,
+                similarity=file_diff.similarity,
+                is_binary=file_diff.is_binary,
+            )
+        )
+    collapsed = deduplicator.collapsed
+
+    def prompt_files() -> Iterator[FileDiff]:
+        for file_diff, _ in buffer.iter_files():
+            if not collapsed:
+                yield file_diff
+                continue
+            kept = deduplicator.apply(file_diff)
+            if kept is not None:
+                yield kept
+
+    def raw_pieces() -> Iterator[str]:
+        position = 0
+        for _, end in buffer.file_spans():
+            yield buffer.decode(position, end)
+            position = end
+        if position < len(buffer):
+            yield buffer.decode(position)
+
+    def compact_pieces() -> Iterator[str]:
+        entries = [f.rename_entry() for f in prompt_files() if f.is_near_rename()]
+        separator = "\n\n" if entries else "\n"
+        if entries:
+            yield "\n".join([RENAMES_HEADER, *entries])
+        rest = (f.render() for f in prompt_files() if not f.is_near_rename())
+        for index, section in enumerate(rest):
+            yield section if index == 0 and not entries else separator + section
+
+    compact = bool(collapsed) or has_renames
+    prompt_diff = _read_up_to(
+        compact_pieces() if compact else raw_pieces(), MAX_DIFF_LENGTH + 1
+    )
+    if len(prompt_diff) <= MAX_DIFF_LENGTH:
+        return clean_diff(prompt_diff), files
+
+    # Any prefix longer than the budget truncates exactly like the whole diff.
+    loader = _staged_source_loader(cwd)
+    summary = format_symbol_summary(
+        [extract_symbol_changes([f], loader)[0] for f in prompt_files()]
+    )
+    remaining = MAX_DIFF_LENGTH - len(summary)
+    if remaining < MAX_DIFF_LENGTH // 4:
+        return clean_diff(summary), files
+    return f"{summary}\n\n{clean_diff(prompt_diff, remaining)}", files
+
 
 def generate_commit_message(
-    args: argparse.Namespace, config: GitkConfig, diff: str
+    args: argparse.Namespace,
+    config: GitkConfig,
+    diff: Union[str, DiffBuffer],
+    cwd: Optional[Path] = None,
+    cache: Optional[ResponseCache] = None,
+    on_model: Optional[Callable[[ModelConfig], None]] = None,
 ) -> str:
-    cleaned_diff = clean_diff(diff)
+    deadline = Deadline(args.timeout)
+    if isinstance(diff, DiffBuffer) and len(diff) <= MAX_DIFF_LENGTH:
+        diff = diff.text()
+
+    if isinstance(diff, DiffBuffer):
+        cleaned_diff, files = _prepare_buffer(diff, cwd)
+    else:
+        cleaned_diff, files = _prepare_text(diff, cwd)
 
     config_model: Config = config.load_config()
     config_data = config_model.model_dump()
 
     model_config = config.load_model_config(config_data)
 
+    commit_template: TemplateLike
     if args.template:
-        template_content = args.template
+        commit_template = compile_template(args.template)
     else:
         template_path = args.template_file or config_data.get("commit_template_path")
 
@@ -27,16 +200,61 @@ def generate_commit_message(
                 "No commit template provided. Specify --template, --template-file, or set it in config."
             )
 
-        template = Template.from_file(template_path)
-        template_content = template.get_content()
+        commit_template = config.templates_dir.compiled(template_path)
 
-    adapter = ModelFactory.create_adapter(model_config)
+    instruction = _with_project_conventions(args.instruction, files, cwd)
 
-    commit_message = adapter.generate_commit_message(
-        diff=cleaned_diff,
-        detailed=args.detailed,
-        commit_template=template_content,
-        instruction=args.instruction,
+    route = route_model(
+        model_config, cleaned_diff, args.detailed, commit_template, instruction
     )
+    model_config = route.model
+    if route.overflow_tokens:
+        logger.warning(
+            "Prompt of ~%d tokens does not fit the %d-token context of %s, "
+            "trimming the diff",
+            route.prompt_tokens,
+            model_config.context_length,
+            model_config.model_id,
+        )
+        cleaned_diff = fit_diff(
+            route, cleaned_diff, args.detailed, commit_template, instruction
+        )
+
+    cache_key = ""
+    if cache is not None:
+        cache_key = ResponseCache.make_key(
+            model_config.model_id,
+            args.detailed,
+            commit_template,
+            instruction,
+            cleaned_diff,
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        adapter = ModelFactory.create_adapter(model_config)
+        adapter.deadline = deadline
+
+        commit_message = adapter.generate_commit_message(
+            diff=cleaned_diff,
+            detailed=args.detailed,
+            commit_template=commit_template,
+            instruction=instruction,
+        )
+        if cache is not None:
+            cache.put(cache_key, clean_message(commit_message))
+        if on_model is not None and adapter.last_model_id:
+            on_model(
+                model_config.model_copy(update={"model_id": adapter.last_model_id})
+            )
+    except (MissingAPIKeyError, ProviderUnavailableError) as e:
+        logger.warning("Using offline heuristic commit message: %s", e)
+        # The heuristic needs every file, not just the hunks that fit the prompt.
+        fallback_diff = diff.text() if isinstance(diff, DiffBuffer) else diff
+        commit_message = HeuristicAdapter(model_config).generate_commit_message(
+            diff=fallback_diff, detailed=args.detailed
+        )
 
     return clean_message(commit_message)
@@ -0,0 +1,231 @@
+import hashlib
+import posixpath
+import re
+import subprocess
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from core.diff import FileDiff
+from core.history import iter_commits
+from core.runner import SafeGitRunner
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+IMPORT_PATTERN = re.compile(
+    r"^\s*(?:from\s+(?P<from>[\w.]+)\s+import\s+\(?(?P<names>[\w\s,]*)"
+    r"|import\s+(?P<import>[\w.]+))"
+)
+TEST_NAME_PATTERN = re.compile(r"^(?:test_)?(?P<stem>.+?)(?:_test|\.test|\.spec)?$")
+
+MINHASH_SIZE = 32
+MINHASH_PRIME = (1 << 61) - 1
+CO_CHANGE_COMMITS = 200
+
+# Pair scores are summed; files end up in one group at GROUP_THRESHOLD.
+SAME_DIRECTORY_WEIGHT = 1.0
+TEST_PAIR_WEIGHT = 2.0
+IMPORT_WEIGHT = 2.0
+SHARED_SYMBOL_WEIGHT = 1.5
+SIMILAR_HUNKS_WEIGHT = 2.0
+CO_CHANGE_WEIGHT = 2.0
+SIMILARITY_THRESHOLD = 0.5
+GROUP_THRESHOLD = 2.0
+
+PairKey = FrozenSet[str]
+
+
+def _minhash_params() -> List[Tuple[int, int]]:
+    params = []
+    for seed in range(MINHASH_SIZE):
+        digest = hashlib.blake2b(str(seed).encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % MINHASH_PRIME or 1
+        b = int.from_bytes(digest[8:], "big") % MINHASH_PRIME
+        params.append((a, b))
+    return params
+
+
+MINHASH_PARAMS = _minhash_params()
+
+
+def minhash_signature(tokens: Set[str]) -> Tuple[int, ...]:
+    if not tokens:
+        return ()
+    hashes = [
+        int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "big")
+        for t in tokens
+    ]
+    return tuple(
+        min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_PARAMS
+    )
+
+
+def estimate_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    if not left or not right:
+        return 0.0
+    return sum(x == y for x, y in zip(left, right, strict=True)) / len(left)
+
+
+@dataclass
+class FileGroup:
+    files: List[FileDiff] = field(default_factory=list)
+
+    @property
+    def paths(self) -> List[str]:
+        paths: List[str] = []
+        for file_diff in self.files:
+            if file_diff.status == "renamed" and file_diff.old_path:
+                paths.append(file_diff.old_path)
+            paths.append(file_diff.path)
+        return paths
+
+    @property
+    def label(self) -> str:
+        names = [file_diff.path for file_diff in self.files]
+        if len(names) <= 2:
+            return ", ".join(names)
+        return f"{names[0]} (+{len(names) - 1} files)"
+
+    def render(self) -> str:
+        return "\n".join(file_diff.render() for file_diff in self.files)
+
+
+@dataclass
+class _FileFeatures:
+    directory: str
+    stem: str
+    is_test: bool
+    module: str
+    imports: Set[str]
+    symbols: Set[str]
+    tokens: Set[str]
+    signature: Tuple[int, ...]
+
+
+def _module_name(path: str) -> str:
+    if not path.endswith(".py"):
+        return ""
+    module = path[:-3].replace("/", ".")
+    return module[: -len(".__init__")] if module.endswith(".__init__") else module
+
+
+def _imported_modules(found: "re.Match[str]") -> List[str]:
+    if found.group("import"):
+        return [found.group("import")]
+    package = found.group("from")
+    names = [
+        part.split()[0] for part in found.group("names").split(",") if part.strip()
+    ]
+    # `from pkg import name` imports pkg, and pkg.name when that is a module.
+    return [package, *(f"{package}.{name}" for name in names)]
+
+
+def _features(file_diff: FileDiff) -> _FileFeatures:
+    name = posixpath.basename(file_diff.path)
+    root = name.rsplit(".", 1)[0] if "." in name.lstrip(".") else name
+    match = TEST_NAME_PATTERN.match(root)
+    stem = match.group("stem") if match else root
+
+    imports: Set[str] = set()
+    tokens: Set[str] = set()
+    for hunk in file_diff.hunks:
+        for line in hunk.lines:
+            text = line[1:]
+            found = IMPORT_PATTERN.match(text)
+            if found:
+                imports.update(_imported_modules(found))
+            if line[:1] in ("+", "-"):
+                tokens.update(TOKEN_PATTERN.findall(text))
+
+    symbols = set(file_diff.added_symbols()) | set(file_diff.touched_symbols())
+    is_test = stem != root or "/tests/" in f"/{file_diff.path}"
+
+    return _FileFeatures(
+        directory=posixpath.dirname(file_diff.path),
+        stem=stem,
+        is_test=is_test,
+        module=_module_name(file_diff.path),
+        imports=imports,
+        symbols=symbols,
+        tokens=tokens,
+        signature=minhash_signature(tokens),
+    )
+
+
+def _imports_module(importer: _FileFeatures, target: _FileFeatures) -> bool:
+    if not target.module:
+        return False
+    return target.module in importer.imports
+
+
+def _pair_score(
+    left: _FileFeatures, right: _FileFeatures, co_change: float = 0.0
+) -> float:
+    score = 0.0
+    if left.directory == right.directory:
+        score += SAME_DIRECTORY_WEIGHT
+    if left.stem == right.stem and left.is_test != right.is_test:
+        score += TEST_PAIR_WEIGHT
+    if _imports_module(left, right) or _imports_module(right, left):
+        score += IMPORT_WEIGHT
+    if left.symbols & right.tokens or right.symbols & left.tokens:
+        score += SHARED_SYMBOL_WEIGHT
+    if estimate_similarity(left.signature, right.signature) >= SIMILARITY_THRESHOLD:
+        score += SIMILAR_HUNKS_WEIGHT
+    return score + CO_CHANGE_WEIGHT * co_change
+
+
+def co_change_ratios(
+    runner: SafeGitRunner,
+    paths: Sequence[str],
+    cwd: Optional[Path] = None,
+    max_commits: int = CO_CHANGE_COMMITS,
+) -> Dict[PairKey, float]:
+    wanted = set(paths)
+    touched: Counter[str] = Counter()
+    together: Counter[PairKey] = Counter()
+
+    try:
+        for _, _, files in iter_commits(runner, "HEAD", cwd, max_count=max_commits):
+            present = sorted(wanted.intersection(files))
+            touched.update(present)
+            together.update(frozenset(pair) for pair in combinations(present, 2))
+    except subprocess.CalledProcessError:
+        # No commits yet, so there is no history to learn from.
+        return {}
+
+    ratios: Dict[PairKey, float] = {}
+    for pair, count in together.items():
+        if count < 2:
+            continue
+        ratios[pair] = count / min(touched[path] for path in pair)
+    return ratios
+
+
+def group_files(
+    files: Sequence[FileDiff],
+    co_changes: Optional[Dict[PairKey, float]] = None,
+    threshold: float = GROUP_THRESHOLD,
+) -> List[FileGroup]:
+    co_changes = co_changes or {}
+    features = [_features(file_diff) for file_diff in files]
+    parents = list(range(len(files)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for i, j in combinations(range(len(files)), 2):
+        if find(i) == find(j):
+            continue
+        co_change = co_changes.get(frozenset((files[i].path, files[j].path)), 0.0)
+        if _pair_score(features[i], features[j], co_change) >= threshold:
+            parents[find(j)] = find(i)
+
+    groups: Dict[int, FileGroup] = {}
+    for index, file_diff in enumerate(files):
+        groups.setdefault(find(index), FileGroup()).files.append(file_diff)
+    return list(groups.values())
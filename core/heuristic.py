@@ -0,0 +1,180 @@
+import posixpath
+from typing import List, Sequence
+
+from core.diff import FileDiff
+
+MAX_TITLE_LENGTH = 50
+
+DOC_EXTENSIONS = {"md", "rst", "txt", "adoc"}
+CONFIG_EXTENSIONS = {"toml", "cfg", "ini", "lock", "yaml", "yml", "json"}
+CHORE_FILES = {"dockerfile", "makefile", "setup.py", "requirements.txt"}
+CHORE_DIRS = {".github", ".gitlab", ".circleci"}
+TEST_DIRS = {"test", "tests", "__tests__", "spec"}
+
+
+def classify_path(path: str) -> str:
+    parts = path.lower().split("/")
+    name = parts[-1]
+    stem, _, extension = name.rpartition(".")
+
+    if TEST_DIRS.intersection(parts[:-1]) or name.startswith(("test_", "conftest.")):
+        return "test"
+    if stem.endswith(("_test", ".test", ".spec")):
+        return "test"
+    if parts[0] in ("docs", "doc") or extension in DOC_EXTENSIONS:
+        return "docs"
+    if name.startswith(("readme", "license", "changelog")):
+        return "docs"
+    if parts[0] in CHORE_DIRS or name in CHORE_FILES or name.startswith("."):
+        return "chore"
+    if extension in CONFIG_EXTENSIONS:
+        return "chore"
+    return "code"
+
+
+def _squash(lines: Sequence[str]) -> str:
+    return "".join("".join(line.split()) for line in lines)
+
+
+def _is_whitespace_only(file_diff: FileDiff) -> bool:
+    removed = [line for hunk in file_diff.hunks for line in hunk.removed]
+    added = [line for hunk in file_diff.hunks for line in hunk.added]
+    return bool(file_diff.hunks) and _squash(removed) == _squash(added)
+
+
+def _is_pure_move(file_diff: FileDiff) -> bool:
+    return file_diff.status in ("renamed", "copied") and not file_diff.hunks
+
+
+def _new_symbols(file_diff: FileDiff) -> List[str]:
+    removed = set(file_diff.removed_symbols())
+    return [name for name in file_diff.added_symbols() if name not in removed]
+
+
+def _dropped_symbols(file_diff: FileDiff) -> List[str]:
+    added = set(file_diff.added_symbols())
+    return [name for name in file_diff.removed_symbols() if name not in added]
+
+
+def infer_commit_type(files: Sequence[FileDiff]) -> str:
+    kinds = {classify_path(f.path) for f in files}
+
+    if kinds == {"docs"}:
+        return "docs"
+    if kinds == {"test"}:
+        return "test"
+    if kinds <= {"chore", "docs"}:
+        return "chore"
+
+    code = [f for f in files if classify_path(f.path) == "code"] or list(files)
+
+    if all(_is_pure_move(f) for f in code):
+        return "refactor"
+    if all(_is_whitespace_only(f) for f in code if not _is_pure_move(f)):
+        return "style"
+    if any(f.status == "added" or _new_symbols(f) for f in code):
+        return "feat"
+    if any(f.status == "deleted" or _dropped_symbols(f) for f in code):
+        return "refactor"
+    if sum(f.deletions for f in code) > sum(f.additions for f in code):
+        return "refactor"
+    return "fix"
+
+
+def _join_names(names: Sequence[str], limit: int = 2) -> str:
+    shown = list(names[:limit])
+    if len(names) > limit:
+        return ", ".join(shown) + f" and {len(names) - limit} more"
+    return " and ".join(shown)
+
+
+def _common_dir(paths: Sequence[str]) -> str:
+    directories = [posixpath.dirname(path) for path in paths]
+    return posixpath.commonpath(directories) if all(directories) else ""
+
+
+def _describe_file(file_diff: FileDiff) -> str:
+    name = posixpath.basename(file_diff.path)
+
+    if file_diff.status in ("renamed", "copied") and file_diff.old_path:
+        verb = "rename" if file_diff.status == "renamed" else "copy"
+        old_dir, old_name = posixpath.split(file_diff.old_path)
+        new_dir = posixpath.dirname(file_diff.path)
+        if old_dir != new_dir and old_name == name:
+            return f"move {name} to {new_dir or 'root'}"
+        return f"{verb} {old_name} to {name}"
+    if file_diff.status == "added":
+        return f"add {name}"
+    if file_diff.status == "deleted":
+        return f"remove {name}"
+
+    added = _new_symbols(file_diff)
+    if added:
+        return f"add {_join_names(added)} to {name}"
+    dropped = _dropped_symbols(file_diff)
+    if dropped:
+        return f"remove {_join_names(dropped)} from {name}"
+    touched = file_diff.touched_symbols()
+    if touched:
+        return f"update {_join_names(touched)} in {name}"
+    return f"update {name}"
+
+
+def describe_changes(files: Sequence[FileDiff]) -> str:
+    if len(files) == 1:
+        return _describe_file(files[0])
+
+    count = len(files)
+    paths = [f.path for f in files]
+    location = _common_dir(paths)
+    suffix = f" in {location}" if location else ""
+    statuses = {f.status for f in files}
+
+    if statuses == {"renamed"}:
+        return (
+            f"move {count} files to {location}" if location else f"rename {count} files"
+        )
+    if statuses == {"added"}:
+        return f"add {count} files{suffix}"
+    if statuses == {"deleted"}:
+        return f"remove {count} files{suffix}"
+
+    added = [name for f in files for name in _new_symbols(f)]
+    if added:
+        return f"add {_join_names(added)}{suffix}"
+    return f"update {count} files{suffix}"
+
+
+def build_title(commit_type: str, description: str) -> str:
+    title = f"{commit_type}: {description}"
+    if len(title) <= MAX_TITLE_LENGTH:
+        return title
+
+    cut = title[: MAX_TITLE_LENGTH + 1].rsplit(" ", 1)[0]
+    return cut if len(cut) > len(commit_type) + 2 else title[:MAX_TITLE_LENGTH]
+
+
+def build_body(files: Sequence[FileDiff]) -> str:
+    lines = []
+    for file_diff in files:
+        detail = f"- {file_diff.path}: {file_diff.status}"
+        if file_diff.hunks:
+            detail += f" (+{file_diff.additions}/-{file_diff.deletions})"
+        added = _new_symbols(file_diff)
+        if added:
+            detail += f", adds {_join_names(added, limit=4)}"
+        dropped = _dropped_symbols(file_diff)
+        if dropped:
+            detail += f", removes {_join_names(dropped, limit=4)}"
+        lines.append(detail)
+    return "\n".join(lines)
+
+
+def generate_heuristic_message(files: Sequence[FileDiff], detailed: bool) -> str:
+    if not files:
+        raise ValueError("Empty diff. No changes to analyze.")
+
+    title = build_title(infer_commit_type(files), describe_changes(files))
+    if not detailed:
+        return title
+    return f"{title}\n\n{build_body(files)}"
@@ -0,0 +1,206 @@
+import posixpath
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.indexing import IncrementalIndex, IndexStore, find_repository_root
+from core.runner import SafeGitRunner
+
+CONVENTIONAL_PATTERN = re.compile(
+    r"^(?P<type>[a-z]+)(?:\((?P<scope>[^)]+)\))?!?: (?P<description>.+)$"
+)
+TICKET_PATTERNS = {
+    "key": re.compile(r"\b([A-Z][A-Z0-9]+)-\d+\b"),
+    "issue": re.compile(r"(?<![\w&])#\d+\b"),
+}
+
+MAX_EXAMPLES_PER_SCOPE = 5
+COMMIT_SEPARATOR = "\x1e"
+FIELD_SEPARATOR = "\x1f"
+
+
+def iter_commits(
+    runner: SafeGitRunner,
+    revision_range: str,
+    cwd: Optional[Path] = None,
+    max_count: Optional[int] = None,
+) -> Iterator[Tuple[str, str, List[str]]]:
+    command = [
+        "log",
+        "--no-merges",
+        "--reverse",
+        f"--format={COMMIT_SEPARATOR}%H{FIELD_SEPARATOR}%s",
+        "--name-only",
+    ]
+    if max_count is not None:
+        command.append(f"--max-count={max_count}")
+    command.append(revision_range)
+
+    sha: Optional[str] = None
+    subject = ""
+    files: List[str] = []
+
+    for line in runner.stream_lines(command, cwd=cwd):
+        if line.startswith(COMMIT_SEPARATOR):
+            if sha is not None:
+                yield sha, subject, files
+            sha, _, subject = line[1:].partition(FIELD_SEPARATOR)
+            files = []
+        elif line:
+            files.append(line)
+
+    if sha is not None:
+        yield sha, subject, files
+
+
+class HistoryIndex(IncrementalIndex):
+    name = "history"
+
+    def __init__(self, store: IndexStore) -> None:
+        self.store = store
+        self.data: Dict[str, Any] = self.empty_state()
+
+    @classmethod
+    def for_repository(cls, root: Path) -> "HistoryIndex":
+        return cls(IndexStore(root))
+
+    @classmethod
+    def load_for_cwd(cls, cwd: Optional[Path] = None) -> Optional["HistoryIndex"]:
+        root = find_repository_root(cwd)
+        if root is None:
+            return None
+
+        index = cls.for_repository(root)
+        index.data = index.store.load(index).state
+        return index if index.total else None
+
+    @property
+    def total(self) -> int:
+        return self.data.get("commits", 0)
+
+    def refresh(self, runner: SafeGitRunner, rebuild: bool = False) -> int:
+        snapshot = self.store.refresh(self, runner, rebuild=rebuild)
+        self.data = snapshot.state
+        return snapshot.delta["commits"] if snapshot.delta else 0
+
+    def empty_state(self) -> Dict[str, Any]:
+        return {
+            "commits": 0,
+            "types": {},
+            "scopes": {},
+            "tickets": {},
+            "path_scopes": {},
+            "examples": {},
+        }
+
+    def scan(
+        self, runner: SafeGitRunner, revision_range: str, root: Path
+    ) -> Dict[str, Any]:
+        delta = self.empty_state()
+        types: Counter[str] = Counter()
+        scopes: Counter[str] = Counter()
+        tickets: Counter[str] = Counter()
+        path_scopes: Dict[str, Dict[str, int]] = delta["path_scopes"]
+        examples: Dict[str, List[str]] = delta["examples"]
+
+        for _, subject, files in iter_commits(runner, revision_range, root):
+            delta["commits"] += 1
+
+            for name, pattern in TICKET_PATTERNS.items():
+                for ticket in pattern.finditer(subject):
+                    label = f"{ticket.group(1)}-123" if name == "key" else "#123"
+                    tickets[label] += 1
+
+            match = CONVENTIONAL_PATTERN.match(subject)
+            if not match:
+                continue
+
+            types[match.group("type")] += 1
+            scope = match.group("scope") or ""
+            if scope:
+                scopes[scope] += 1
+                for directory in {posixpath.dirname(path) for path in files}:
+                    counts = path_scopes.setdefault(directory, {})
+                    counts[scope] = counts.get(scope, 0) + 1
+
+            bucket = examples.setdefault(scope, [])
+            bucket.append(subject)
+            del bucket[:-MAX_EXAMPLES_PER_SCOPE]
+
+        delta["types"] = dict(types)
+        delta["scopes"] = dict(scopes)
+        delta["tickets"] = dict(tickets)
+        return delta
+
+    def merge(self, state: Dict[str, Any], delta: Dict[str, Any]) -> None:
+        state["commits"] = state.get("commits", 0) + delta.get("commits", 0)
+
+        for key in ("types", "scopes", "tickets"):
+            counts = state.setdefault(key, {})
+            for name, count in delta.get(key, {}).items():
+                counts[name] = counts.get(name, 0) + count
+
+        path_scopes = state.setdefault("path_scopes", {})
+        for directory, scopes in delta.get("path_scopes", {}).items():
+            counts = path_scopes.setdefault(directory, {})
+            for scope, count in scopes.items():
+                counts[scope] = counts.get(scope, 0) + count
+
+        examples = state.setdefault("examples", {})
+        for scope, messages in delta.get("examples", {}).items():
+            bucket = examples.setdefault(scope, [])
+            bucket.extend(messages)
+            del bucket[:-MAX_EXAMPLES_PER_SCOPE]
+
+    def scopes_for_paths(self, paths: Sequence[str], limit: int = 2) -> List[str]:
+        path_scopes: Dict[str, Dict[str, int]] = self.data.get("path_scopes", {})
+        scores: Counter[str] = Counter()
+
+        for path in paths:
+            directory = posixpath.dirname(path)
+            while True:
+                if directory in path_scopes:
+                    scores.update(path_scopes[directory])
+                    break
+                if not directory:
+                    break
+                directory = posixpath.dirname(directory)
+
+        return [scope for scope, _ in scores.most_common(limit)]
+
+    def relevant_examples(self, paths: Sequence[str], limit: int = 3) -> List[str]:
+        examples: Dict[str, List[str]] = self.data.get("examples", {})
+        selected: List[str] = []
+
+        for scope in self.scopes_for_paths(paths):
+            selected.extend(reversed(examples.get(scope, [])))
+
+        if len(selected) < limit:
+            recent = [msg for bucket in examples.values() for msg in bucket[-1:]]
+            selected.extend(msg for msg in recent if msg not in selected)
+
+        return selected[:limit]
+
+    def conventions(self, paths: Sequence[str]) -> str:
+        lines = ["Follow this repository's commit conventions:"]
+
+        types = Counter(self.data.get("types", {}))
+        if types:
+            common = ", ".join(name for name, _ in types.most_common(5))
+            lines.append(f"- Common types: {common}")
+
+        scopes = self.scopes_for_paths(paths)
+        if scopes:
+            lines.append(f"- Preferred scope for these paths: {', '.join(scopes)}")
+
+        tickets = Counter(self.data.get("tickets", {}))
+        if tickets and sum(tickets.values()) * 5 >= self.total:
+            lines.append(f"- Reference tickets like {tickets.most_common(1)[0][0]}")
+
+        examples = self.relevant_examples(paths)
+        if examples:
+            lines.append("Recent examples:")
+            lines.extend(examples)
+
+        return "\n".join(lines) if len(lines) > 1 else ""
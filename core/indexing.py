@@ -0,0 +1,155 @@
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config.backends import RecordLog, get_backend
+from core.exceptions import CacheFileError
+from core.runner import SafeGitRunner
+
+
+def find_repository_root(start: Optional[Path] = None) -> Optional[Path]:
+    current = (start or Path.cwd()).absolute()
+    for directory in (current, *current.parents):
+        if (directory / ".git").exists():
+            return directory
+    return None
+
+
+def repository_key(root: Path) -> str:
+    digest = hashlib.sha1(str(root).encode("utf-8"), usedforsecurity=False)
+    return f"{root.name}-{digest.hexdigest()[:12]}"
+
+
+class IncrementalIndex(ABC):
+    name: str = ""
+
+    def empty_state(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def scan(
+        self, runner: SafeGitRunner, revision_range: str, root: Path
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def merge(self, state: Dict[str, Any], delta: Dict[str, Any]) -> None: ...
+
+
+@dataclass
+class IndexSnapshot:
+    head: Optional[str] = None
+    state: Dict[str, Any] = field(default_factory=dict)
+    records: int = 0
+    delta: Optional[Dict[str, Any]] = None
+
+
+class IndexStore:
+    # One append-only record log per repository. Each refresh appends the
+    # delta for old..new; a reset record marks a rewritten history.
+    COMPACT_AFTER = 32
+
+    def __init__(self, root: Path, log: Optional[RecordLog] = None) -> None:
+        self.root = root
+        self.log = log or get_backend().log(repository_key(root))
+
+    def load(self, index: IncrementalIndex) -> IndexSnapshot:
+        try:
+            return self._replay(index, self.log.read())
+        except OSError as e:
+            raise CacheFileError("OS error reading index file", cause=e) from e
+
+    def refresh(
+        self, index: IncrementalIndex, runner: SafeGitRunner, rebuild: bool = False
+    ) -> IndexSnapshot:
+        head = self._resolve_head(runner)
+
+        try:
+            with self.log.lock():
+                records = self.log.read()
+                snapshot = self._replay(index, records)
+
+                if head is None or (snapshot.head == head and not rebuild):
+                    return snapshot
+
+                if rebuild or not self._is_ancestor(runner, snapshot.head, head):
+                    self.log.append({"index": index.name, "reset": True})
+                    snapshot = IndexSnapshot(state=index.empty_state())
+                    revision_range = head
+                else:
+                    revision_range = f"{snapshot.head}..{head}"
+
+                delta = index.scan(runner, revision_range, self.root)
+                index.merge(snapshot.state, delta)
+                self.log.append({"index": index.name, "head": head, "delta": delta})
+
+                snapshot.head = head
+                snapshot.delta = delta
+                if snapshot.records + 1 >= self.COMPACT_AFTER:
+                    self._compact(index, records, snapshot)
+                return snapshot
+
+        except PermissionError as e:
+            raise CacheFileError(
+                f"Permission denied writing index for {self.root}"
+            ) from e
+        except OSError as e:
+            raise CacheFileError("OS error writing index file", cause=e) from e
+
+    def _resolve_head(self, runner: SafeGitRunner) -> Optional[str]:
+        result = runner.run(
+            ["rev-parse", "--verify", "-q", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=self.root,
+        )
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
+
+    def _is_ancestor(self, runner: SafeGitRunner, old: Optional[str], new: str) -> bool:
+        if not old:
+            return False
+        result = runner.run(
+            ["merge-base", "--is-ancestor", old, new],
+            capture_output=True,
+            cwd=self.root,
+        )
+        return result.returncode == 0
+
+    def _replay(
+        self, index: IncrementalIndex, records: List[Dict[str, Any]]
+    ) -> IndexSnapshot:
+        snapshot = IndexSnapshot(state=index.empty_state())
+
+        for record in records:
+            if record.get("index") != index.name:
+                continue
+            snapshot.records += 1
+
+            if record.get("reset"):
+                snapshot.head = None
+                snapshot.state = index.empty_state()
+            elif "snapshot" in record:
+                snapshot.head = record.get("head")
+                snapshot.state = record["snapshot"]
+            elif "delta" in record:
+                snapshot.head = record.get("head")
+                index.merge(snapshot.state, record["delta"])
+
+        return snapshot
+
+    def _compact(
+        self,
+        index: IncrementalIndex,
+        records: List[Dict[str, Any]],
+        snapshot: IndexSnapshot,
+    ) -> None:
+        others = [record for record in records if record.get("index") != index.name]
+        others.append(
+            {"index": index.name, "head": snapshot.head, "snapshot": snapshot.state}
+        )
+
+        self.log.rewrite(others)
+        snapshot.records = 1
@@ -0,0 +1,53 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+WHITESPACE_PATTERN = re.compile(r"[\s,]*")
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Dict[str, Any]]:
+    # Yields the objects of `{"<key>": [ {...}, ... ]}` as soon as each one is
+    # complete, without holding the whole document in memory.
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    start_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+
+    buffer = ""
+    in_array = False
+    finished = False
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+
+        if not in_array:
+            match = start_pattern.search(buffer)
+            if match is None:
+                continue
+            buffer = buffer[match.end() :]
+            in_array = True
+
+        position = 0
+        while True:
+            position = WHITESPACE_PATTERN.match(buffer, position).end()  # type: ignore[union-attr]
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                finished = True
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The object is split across chunks; wait for the rest.
+                break
+            if isinstance(item, dict):
+                yield item
+
+        if finished:
+            return
+        buffer = buffer[position:]
+
+    if in_array and buffer.strip():
+        raise ValueError("Truncated JSON array in response")
+    if not in_array:
+        raise ValueError(f'Response has no "{key}" array')
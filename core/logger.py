@@ -1,6 +1,48 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from io import TextIOWrapper
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    # Opened with delay=True; the log directory is only created alongside
+    # the file, on the first record that actually reaches it.
+
+    def _open(self) -> TextIOWrapper:
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class BackgroundQueueHandler(QueueHandler):
+    # The caller only pays for a queue put; the listener thread does the disk
+    # IO. It is started on the first record and drained at exit.
+
+    def __init__(
+        self, records: "queue.SimpleQueue[logging.LogRecord]", listener: QueueListener
+    ) -> None:
+        super().__init__(records)
+        self._listener = listener
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if not self._started:
+            with self._start_lock:
+                if not self._started:
+                    self._listener.start()
+                    atexit.register(self.stop)
+                    self._started = True
+        super().enqueue(record)
+
+    def stop(self) -> None:
+        with self._start_lock:
+            if self._started:
+                self._listener.stop()
+                self._started = False
 
 
 class GitkLogger:
@@ -14,23 +56,21 @@ class GitkLogger:
         log_level: int = logging.INFO,
         max_bytes: int = 5 * 1024 * 1024,
         backup_count: int = 3,
+        log_file: Optional[Path] = None,
     ) -> None:
         self.name = name
         self.log_level = log_level
+        self.log_file = log_file or Path.home() / ".gitk_config" / "logs" / "gitk.log"
 
         self._setup_logger(max_bytes, backup_count)
 
     def _setup_logger(self, max_bytes: int, backup_count: int) -> None:
-        log_dir = Path.home() / ".gitk_config" / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
-
-        log_file = log_dir / "gitk.log"
-
-        self.file_handler = RotatingFileHandler(
-            filename=log_file,
+        self.file_handler = LazyRotatingFileHandler(
+            filename=self.log_file,
             maxBytes=max_bytes,
             backupCount=backup_count,
             encoding="utf-8",
+            delay=True,
         )
 
         formatter = logging.Formatter(
@@ -38,6 +78,14 @@ class GitkLogger:
         )
         self.file_handler.setFormatter(formatter)
 
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        listener = QueueListener(records, self.file_handler, respect_handler_level=True)
+        self.queue_handler = BackgroundQueueHandler(records, listener)
+
         self.logger = logging.getLogger(self.name)
-        self.logger.addHandler(self.file_handler)
+        self.logger.addHandler(self.queue_handler)
         self.logger.setLevel(self.log_level)
+
+    def flush(self) -> None:
+        self.queue_handler.stop()
+        self.file_handler.flush()
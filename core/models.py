@@ -1,6 +1,10 @@
+import atexit
+import heapq
+import logging
 import re
 import sys
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import (
     Any,
@@ -8,6 +12,8 @@ from typing import (
     Dict,
     Generator,
     Generic,
+    Iterable,
+    Iterator,
     List,
     Optional,
     Protocol,
@@ -19,7 +25,8 @@ import requests
 import yaml
 from pydantic import BaseModel, ValidationError, field_validator
 
-from core.config.files import CacheFile
+from core.config.backends import ModelsCache
+from core.config.files import atomic_write
 from core.constants import (
     CONTEXT_SCORE_HIGH,
     CONTEXT_SCORE_LARGE,
@@ -27,16 +34,38 @@ from core.constants import (
     CONTEXT_SCORE_MEDIUM,
     LOW_QUALITY_INDICATOR_PENALTY,
     LOW_QUALITY_INDICATORS,
+    MODELS_CACHE_MAX_AGE,
+    MODELS_CACHE_SIZE,
+    MODELS_REFRESH_EXIT_WAIT,
+    PROVIDER_API_BASES,
+    ROUTING_FAST_MAX_TOKENS,
+    ROUTING_OUTPUT_TOKENS,
     SIZE_INDICATORS,
     TOP_TIER_MODELS,
 )
-from core.exceptions import APIError, ModelConfigError
+from core.exceptions import APIError, CacheFileError, ModelConfigError
+from core.jsonstream import iter_json_array
+from core.telemetry import ModelTelemetry
 
 if sys.version_info >= (3, 11):
     from typing import Self
 else:
     from typing_extensions import Self
 
+logger = logging.getLogger("gitk")
+
+FREE_PATTERN = re.compile(r"\bfree\b", re.IGNORECASE)
+STREAM_CHUNK_SIZE = 16384
+
+
+class RoutingPolicy(BaseModel):
+    fast_model_id: Optional[str] = None
+    fast_max_tokens: int = ROUTING_FAST_MAX_TOKENS
+    fast_context_length: Optional[int] = None
+    large_model_id: Optional[str] = None
+    large_context_length: Optional[int] = None
+    output_tokens: int = ROUTING_OUTPUT_TOKENS
+
 
 class ModelConfig(BaseModel):
     name: str
@@ -47,6 +76,10 @@ class ModelConfig(BaseModel):
     context_length: int
     temperature: float = 0.4
     description: str = ""
+    fallback_model_id: Optional[str] = None
+    num_threads: Optional[int] = None
+    keep_alive: Optional[str] = None
+    routing: Optional[RoutingPolicy] = None
 
     @field_validator("name", "provider", "api_base", "model_id")
     def strip_strings(cls, v: str) -> str:
@@ -120,7 +153,7 @@ class Config(BaseModel):
 
     def save_to_file(self, file_path: Path) -> None:
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
+            with atomic_write(file_path) as f:
                 yaml.safe_dump(
                     self.model_dump(), f, sort_keys=False, allow_unicode=True
                 )
@@ -137,13 +170,26 @@ class Config(BaseModel):
         validate_assignment = True
 
 
-class RawModel(Protocol):
+class ModelSummary(Protocol):
+    @property
+    def name(self) -> str: ...
+    @property
+    def model_id(self) -> str: ...
+    @property
+    def context_length(self) -> int: ...
+
+
+class RawModel(ModelSummary, Protocol):
     @classmethod
     def from_dict(cls, data: Dict) -> Self: ...
     def to_model_config(self) -> ModelConfig: ...
+    def is_free(self) -> bool: ...
+    @staticmethod
+    def is_free_candidate(data: Dict) -> bool: ...
 
 
 T = TypeVar("T", bound=RawModel)
+S = TypeVar("S", bound=ModelSummary)
 
 
 @dataclass
@@ -152,24 +198,41 @@ class Provider(Generic[T]):
     api_base: str
     api_key: str
     raw_model_cls: Type[T]
-    cache_file: CacheFile
+    cache_file: ModelsCache
+    telemetry: Optional[ModelTelemetry] = None
+    refresh_thread: Optional[threading.Thread] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def fetch_models(
-        self, filter_fn: Optional[Callable[[ModelConfig], bool]] = None
+        self,
+        filter_fn: Optional[Callable[[ModelConfig], bool]] = None,
+        prefilter: Optional[Callable[[Dict], bool]] = None,
     ) -> Generator[ModelConfig, None, None]:
         cached_models = self.cache_file.load_models()
 
         if cached_models:
-            models = cached_models
-        else:
-            models = list(self._fetch_models_from_api())
-            self.cache_file.save_models(models)
-
-        for model in models:
+            self._revalidate(lambda: self._rank_catalogue(None))
+            for model in cached_models:
+                if not filter_fn or filter_fn(model):
+                    yield model
+            return
+
+        # The cache only holds the ranked finalists from refresh_models; the
+        # full, unranked stream is not written back.
+        for model in self._fetch_models_from_api(prefilter):
             if not filter_fn or filter_fn(model):
                 yield model
 
-    def _fetch_models_from_api(self) -> Generator[ModelConfig, None, None]:
+    def _fetch_models_from_api(
+        self, prefilter: Optional[Callable[[Dict], bool]] = None
+    ) -> Generator[ModelConfig, None, None]:
+        for raw in self._fetch_raw_models(prefilter):
+            yield raw.to_model_config()
+
+    def _fetch_raw_models(
+        self, prefilter: Optional[Callable[[Dict], bool]] = None
+    ) -> Generator[T, None, None]:
         try:
             response = requests.get(
                 f"{self.api_base}/models",
@@ -178,6 +241,7 @@ class Provider(Generic[T]):
                     "Content-Type": "application/json",
                 },
                 timeout=30,
+                stream=True,
             )
 
             if response.status_code == 401:
@@ -185,13 +249,6 @@ class Provider(Generic[T]):
 
             response.raise_for_status()
 
-            try:
-                response_data = response.json()
-            except ValueError as e:
-                raise APIError("Invalid JSON response", cause=e) from e
-
-            models_data = response_data.get("data", [])
-
         except requests.ConnectTimeout as e:
             raise APIError("Connection timeout - API server is not responding") from e
         except requests.ConnectionError as e:
@@ -201,28 +258,98 @@ class Provider(Generic[T]):
         except Exception as e:
             raise APIError("Unexpected error during API request", cause=e) from e
 
-        for model_dict in models_data:
-            raw = self.raw_model_cls.from_dict(model_dict)
-            yield raw.to_model_config()
+        with response:
+            for model_dict in self._iter_model_dicts(response):
+                if prefilter is not None and not prefilter(model_dict):
+                    continue
+                yield self.raw_model_cls.from_dict(model_dict)
+
+    def _iter_model_dicts(self, response: requests.Response) -> Iterator[Dict]:
+        try:
+            yield from iter_json_array(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE), "data"
+            )
+        except ValueError as e:
+            raise APIError("Invalid JSON response", cause=e) from e
+        except requests.ConnectionError as e:
+            raise APIError("Connection error - unable to reach API server") from e
+        except requests.RequestException as e:
+            raise APIError("Request failed", cause=e) from e
 
     def get_top_models(
         self,
-        filter_fn: Optional[Callable[[ModelConfig], bool]] = None,
+        filter_fn: Optional[Callable[[ModelSummary], bool]] = None,
         free_count: int = 8,
     ) -> Dict[str, List[ModelConfig]]:
-        free_models = []
+        cached_models = self.cache_file.load_models()
 
-        for model_config in self.fetch_models(filter_fn):
-            if model_config.is_free:
-                free_models.append(model_config)
+        if cached_models:
+            self._revalidate(lambda: self._rank_catalogue(filter_fn))
+            free_models = [model for model in cached_models if model.is_free]
+            return {"free": self._shortlist(free_models, filter_fn, free_count)}
+
+        return {"free": self.refresh_models(filter_fn)[:free_count]}
+
+    def refresh_models(
+        self, filter_fn: Optional[Callable[[ModelSummary], bool]] = None
+    ) -> List[ModelConfig]:
+        models = self._rank_catalogue(filter_fn)
+        self.cache_file.save_models(models)
+        return models
+
+    def _rank_catalogue(
+        self, filter_fn: Optional[Callable[[ModelSummary], bool]]
+    ) -> List[ModelConfig]:
+        # Filter, score and rank the lightweight raw records while the
+        # catalogue streams in; only the finalists become ModelConfig. The
+        # cache always holds the same number so any --top can be served.
+        raw_models = self._fetch_raw_models(self.raw_model_cls.is_free_candidate)
+        finalists = self._shortlist(
+            (raw for raw in raw_models if raw.is_free()), filter_fn, MODELS_CACHE_SIZE
+        )
+        return [raw.to_model_config() for raw in finalists]
 
-        free_models.sort(key=self._calculate_model_score, reverse=True)
+    def _revalidate(self, fetch: Callable[[], List[ModelConfig]]) -> None:
+        age = self.cache_file.age()
+        if age is not None and age < MODELS_CACHE_MAX_AGE:
+            return
+        if self.refresh_thread is not None and self.refresh_thread.is_alive():
+            return
+
+        def refresh() -> None:
+            try:
+                models = fetch()
+                if models:
+                    self.cache_file.save_models(models)
+            except (APIError, CacheFileError, ValueError) as e:
+                # The stale catalogue stays in place for the next run.
+                logger.info("Background refresh of %s models failed: %s", self.name, e)
+
+        self.refresh_thread = threading.Thread(
+            target=refresh, name=f"gitk-refresh-{self.name}", daemon=True
+        )
+        self.refresh_thread.start()
+        # Give a refresh that is still streaming the chance to save before
+        # the interpreter kills daemon threads.
+        atexit.unregister(self.wait_for_refresh)
+        atexit.register(self.wait_for_refresh, MODELS_REFRESH_EXIT_WAIT)
 
-        return {
-            "free": free_models[:free_count],
-        }
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> None:
+        if self.refresh_thread is not None:
+            self.refresh_thread.join(timeout)
 
-    def _calculate_model_score(self, model: ModelConfig) -> float:
+    def _shortlist(
+        self,
+        models: Iterable[S],
+        filter_fn: Optional[Callable[[ModelSummary], bool]],
+        count: int,
+    ) -> List[S]:
+        if filter_fn:
+            models = (model for model in models if filter_fn(model))
+        # Same order as a stable sort, without keeping every model around.
+        return heapq.nlargest(count, models, key=self._calculate_model_score)
+
+    def _calculate_model_score(self, model: ModelSummary) -> float:
         score = 0.0
 
         if model.context_length:
@@ -255,10 +382,13 @@ class Provider(Generic[T]):
                 score -= LOW_QUALITY_INDICATOR_PENALTY
                 break
 
+        if self.telemetry is not None:
+            score += self.telemetry.score_adjustment(self.name, model.model_id)
+
         return score
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenRouterRawModel:
     id: str
     name: str
@@ -279,8 +409,17 @@ class OpenRouterRawModel:
         except (ValueError, TypeError, KeyError) as e:
             raise ValueError(f"Invalid model data: {e}") from e
 
+    @staticmethod
+    def is_free_candidate(data: Dict) -> bool:
+        model_id = data.get("id")
+        return isinstance(model_id, str) and FREE_PATTERN.search(model_id) is not None
+
+    @property
+    def model_id(self) -> str:
+        return self.id
+
     def is_free(self) -> bool:
-        return re.search(r"\bfree\b", self.id.lower()) is not None
+        return FREE_PATTERN.search(self.id) is not None
 
     def to_model_config(self) -> ModelConfig:
         return ModelConfig(
@@ -293,3 +432,51 @@ class OpenRouterRawModel:
             temperature=0.4,
             description=self.description.strip(),
         )
+
+
+@dataclass(slots=True)
+class LocalRawModel:
+    id: str
+    owned_by: str = ""
+    context_length: int = 8192
+
+    @property
+    def name(self) -> str:
+        return self.id.rsplit("/", 1)[-1]
+
+    @property
+    def model_id(self) -> str:
+        return self.id
+
+    @staticmethod
+    def is_free_candidate(data: Dict) -> bool:
+        return True
+
+    def is_free(self) -> bool:
+        return True
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Self:
+        try:
+            meta = data.get("meta") or {}
+            return cls(
+                id=data["id"],
+                owned_by=data.get("owned_by", ""),
+                context_length=int(
+                    data.get("context_length") or meta.get("n_ctx_train") or 8192
+                ),
+            )
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"Invalid model data: {e}") from e
+
+    def to_model_config(self) -> ModelConfig:
+        return ModelConfig(
+            name=self.name,
+            provider="local",
+            api_base=PROVIDER_API_BASES["local"],
+            model_id=self.id,
+            is_free=True,
+            context_length=self.context_length,
+            temperature=0.4,
+            description=f"Served locally{f' by {self.owned_by}' if self.owned_by else ''}",
+        )
@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from core.batch import BatchItem
+from core.constants import MAX_PARALLEL_REPOS
+from core.diff import RENAME_FLAGS
+from core.runner import SafeGitRunner
+
+
+def display_path(root: Path) -> str:
+    try:
+        return os.path.relpath(root) or "."
+    except ValueError:
+        return str(root)
+
+
+def _submodule_paths(runner: SafeGitRunner, root: Path) -> List[Path]:
+    # foreach only visits initialized submodules and prints each path whole,
+    # spaces included, unlike the columns of `git submodule status`.
+    result = runner.run(
+        ["submodule", "foreach", "--quiet", "--recursive", 'echo "$displaypath"'],
+        capture_output=True,
+        text=True,
+        cwd=root,
+    )
+    if result.returncode != 0:
+        return []
+
+    paths = [root / line for line in result.stdout.splitlines() if line]
+    # Deepest first, so each submodule is committed before its superproject.
+    return sorted(paths, key=lambda path: len(path.parts), reverse=True)
+
+
+def discover_repositories(
+    runner: SafeGitRunner,
+    root: Optional[Path],
+    recursive: bool = False,
+    patterns: Sequence[str] = (),
+    base: Optional[Path] = None,
+) -> List[Path]:
+    candidates: List[Path] = []
+    if root is not None and (recursive or not patterns):
+        if recursive:
+            candidates.extend(_submodule_paths(runner, root))
+        candidates.append(root)
+
+    base = base or Path.cwd()
+    for pattern in patterns:
+        candidates.extend(
+            path for path in sorted(base.glob(pattern)) if (path / ".git").exists()
+        )
+
+    repos: List[Path] = []
+    for path in candidates:
+        resolved = path.resolve()
+        if resolved not in repos:
+            repos.append(resolved)
+    return repos
+
+
+def find_superproject(
+    runner: SafeGitRunner, repo: Path, repos: Sequence[Path]
+) -> Optional[Path]:
+    result = runner.run(
+        ["rev-parse", "--show-superproject-working-tree"],
+        capture_output=True,
+        text=True,
+        cwd=repo,
+    )
+    superproject = result.stdout.strip()
+    if result.returncode != 0 or not superproject:
+        return None
+
+    parent = Path(superproject).resolve()
+    return parent if parent in repos else None
+
+
+def stage_gitlinks(
+    runner: SafeGitRunner, superproject: Path, submodules: Sequence[Path]
+) -> None:
+    # Staged right before the superproject's own commit records the new
+    # submodule commits. A superproject that is never committed, because it
+    # has nothing of its own staged or was skipped, keeps a clean index.
+    runner.run(
+        [
+            "add",
+            "--",
+            *(os.path.relpath(s.resolve(), superproject) for s in submodules),
+        ],
+        check=True,
+        cwd=superproject,
+    )
+
+
+def collect_staged_changes(
+    runner: SafeGitRunner, repos: Sequence[Path]
+) -> List[BatchItem]:
+    def staged_diff(root: Path) -> BatchItem:
+        result = runner.run(
+            ["diff", "--cached", *RENAME_FLAGS],
+            capture_output=True,
+            text=True,
+            cwd=root,
+        )
+        item = BatchItem(label=display_path(root), diff="", cwd=root)
+        if result.returncode != 0:
+            item.error = result.stderr.strip()
+        else:
+            item.diff = result.stdout.strip()
+        return item
+
+    if not repos:
+        return []
+
+    workers = max(1, min(len(repos), MAX_PARALLEL_REPOS))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        changes = list(executor.map(staged_diff, repos))
+    return [change for change in changes if change.diff or change.error]
@@ -5,25 +5,36 @@ from core.constants import (
     DETAILED_INSTRUCTIONS,
     SINGLE_INSTRUCTIONS,
 )
+from core.templates import CompiledTemplate, TemplateLike, compile_template
+
+
+def _resolve_template(commit_template: Optional[TemplateLike]) -> CompiledTemplate:
+    if isinstance(commit_template, CompiledTemplate):
+        return commit_template
+    return compile_template(commit_template or _DEFAULT_COMMIT_TEMPLATE)
 
 
 def get_commit_instruction(
     diff: str,
     detailed: bool = False,
-    commit_template: Optional[str] = None,
+    commit_template: Optional[TemplateLike] = None,
     instruction: Optional[str] = None,
 ) -> str:
-    if not diff.strip():
+    if not diff or diff.isspace():
         raise ValueError("Empty diff. No changes to analyze.")
 
-    _commit_template: str = commit_template or _DEFAULT_COMMIT_TEMPLATE
+    template = _resolve_template(commit_template)
+
+    parts = [DETAILED_INSTRUCTIONS if detailed else SINGLE_INSTRUCTIONS]
+    parts.extend(
+        template.render_parts({"diff": diff, "instruction": instruction or ""})
+    )
 
-    if detailed:
-        result = DETAILED_INSTRUCTIONS + _commit_template + diff
-    else:
-        result = SINGLE_INSTRUCTIONS + _commit_template + diff
+    # Templates without explicit slots keep the historical layout.
+    if not template.has_placeholder("diff"):
+        parts.append(diff)
 
-    if instruction:
-        result += f"\n\nUser instruction: {instruction}"
+    if instruction and not template.has_placeholder("instruction"):
+        parts.append(f"\n\nUser instruction: {instruction}")
 
-    return result
+    return "".join(parts)
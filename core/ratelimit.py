@@ -0,0 +1,143 @@
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+from core.config.backends import StateStore, get_backend
+from core.constants import DEADLINE_MIN_ATTEMPT
+from core.deadline import Deadline
+from core.exceptions import CacheFileError, DeadlineExceededError, RateLimitError
+
+logger = logging.getLogger("gitk")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    # Token bucket shared by all local processes via a locked state file;
+    # the refill rate grows additively on success and halves on every 429.
+
+    def __init__(
+        self,
+        state_file: StateStore,
+        initial_rate: float = 1.0,
+        min_rate: float = 0.05,
+        max_rate: float = 10.0,
+        burst: float = 4.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        max_wait: float = 60.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.state_file = state_file
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+
+    @classmethod
+    def for_provider(cls, provider: str, **kwargs: Any) -> "RateLimiter":
+        return cls(get_backend().state(f"{provider}_ratelimit"), **kwargs)
+
+    def acquire(self, deadline: Optional[Deadline] = None) -> float:
+        waited = 0.0
+
+        while True:
+            try:
+                wait = self._try_take()
+            except CacheFileError:
+                return waited
+
+            if wait <= 0:
+                return waited
+
+            if waited + wait > self.max_wait:
+                raise RateLimitError(f"Rate limit exceeded - next slot in {wait:.1f}s")
+            if deadline is not None and not deadline.fits(wait + DEADLINE_MIN_ATTEMPT):
+                raise DeadlineExceededError(
+                    f"Request budget exhausted - next rate-limit slot in {wait:.1f}s"
+                )
+
+            self._sleep(wait)
+            waited += wait
+
+    def try_acquire(self) -> bool:
+        try:
+            return self._try_take() <= 0
+        except CacheFileError:
+            return True
+
+    def record_success(self) -> None:
+        try:
+            with self.state_file.transaction() as state:
+                self._refill(state, self._clock())
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+        except CacheFileError:
+            pass
+
+    def record_throttle(self, retry_after: Optional[float] = None) -> None:
+        try:
+            with self.state_file.transaction() as state:
+                now = self._clock()
+                self._refill(state, now)
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+                state["tokens"] = 0.0
+                if retry_after:
+                    state["blocked_until"] = max(
+                        state["blocked_until"], now + retry_after
+                    )
+                logger.info(
+                    "Throttled by provider, rate lowered to %.2f req/s", state["rate"]
+                )
+        except CacheFileError:
+            pass
+
+    def _try_take(self) -> float:
+        with self.state_file.transaction() as state:
+            now = self._clock()
+            self._refill(state, now)
+
+            blocked = state["blocked_until"] - now
+            if blocked > 0:
+                return blocked
+
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return 0.0
+
+            return (1.0 - state["tokens"]) / state["rate"]
+
+    def _refill(self, state: Dict[str, Any], now: float) -> None:
+        state.setdefault("rate", self.initial_rate)
+        state.setdefault("tokens", self.burst)
+        state.setdefault("blocked_until", 0.0)
+        last = state.setdefault("updated_at", now)
+
+        elapsed = max(0.0, now - last)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["updated_at"] = now
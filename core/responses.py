@@ -0,0 +1,71 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from core.config.backends import CacheBackend, get_backend
+from core.constants import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from core.exceptions import CacheFileError
+from core.indexing import find_repository_root, repository_key
+from core.templates import TemplateLike, compile_template
+
+
+class ResponseCache:
+    # Generated messages keyed by everything that shapes the prompt, so a
+    # message pre-generated by `gitk watch` is reused by `gitk commit`.
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        ttl: float = RESPONSE_CACHE_TTL,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+    ) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @classmethod
+    def for_repository(cls, root: Path) -> "ResponseCache":
+        return cls(get_backend(), f"responses/{repository_key(root)}")
+
+    @classmethod
+    def for_cwd(cls, cwd: Optional[Path] = None) -> Optional["ResponseCache"]:
+        root = find_repository_root(cwd)
+        return cls.for_repository(root) if root else None
+
+    @staticmethod
+    def make_key(
+        model_id: str,
+        detailed: bool,
+        template: Optional[TemplateLike],
+        instruction: Optional[str],
+        diff: str,
+    ) -> str:
+        if isinstance(template, str):
+            template = compile_template(template)
+        digest = hashlib.sha256()
+        for part in (
+            model_id,
+            "detailed" if detailed else "short",
+            template.render() if template else "",
+            instruction or "",
+            diff,
+        ):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            message = self.backend.get(self.namespace, key, max_age=self.ttl)
+        except CacheFileError:
+            return None
+        return message if isinstance(message, str) else None
+
+    def put(self, key: str, message: str) -> None:
+        try:
+            self.backend.put(self.namespace, key, message)
+            self.backend.evict(self.namespace, self.max_entries, max_age=self.ttl)
+        except CacheFileError:
+            pass
@@ -0,0 +1,117 @@
+import logging
+import math
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from core.constants import ROUTING_OUTPUT_TOKENS
+from core.models import ModelConfig
+from core.prompt import get_commit_instruction
+from core.templates import TemplateLike
+from core.tokens import bytes_per_token, estimate_tokens
+from core.utils import clean_diff
+
+logger = logging.getLogger("gitk")
+
+
+@dataclass
+class Route:
+    model: ModelConfig
+    prompt_tokens: int = 0
+    reason: str = "configured"
+
+    @property
+    def output_tokens(self) -> int:
+        policy = self.model.routing
+        return policy.output_tokens if policy else ROUTING_OUTPUT_TOKENS
+
+    @property
+    def overflow_tokens(self) -> int:
+        return max(
+            0, self.prompt_tokens + self.output_tokens - self.model.context_length
+        )
+
+    def max_diff_length(self, diff: str) -> Optional[int]:
+        # How far the diff must shrink for the prompt to fit the window.
+        if not self.overflow_tokens:
+            return None
+        excess = self.overflow_tokens * bytes_per_token(self.model.model_id)
+        size = len(diff.encode("utf-8", "surrogatepass"))
+        if not size:
+            return 0
+        # Tokens are estimated from bytes, clean_diff cuts characters.
+        return max(0, len(diff) - math.ceil(excess * len(diff) / size))
+
+
+def route_model(
+    config: ModelConfig,
+    diff: str,
+    detailed: bool = False,
+    template: Optional[TemplateLike] = None,
+    instruction: Optional[str] = None,
+) -> Route:
+    try:
+        prompt = get_commit_instruction(diff, detailed, template, instruction)
+    except ValueError:
+        return Route(config)
+
+    policy = config.routing
+    if policy and policy.fast_model_id:
+        tokens = estimate_tokens(prompt, policy.fast_model_id)
+        if tokens <= policy.fast_max_tokens:
+            # The configured model stays behind it as the fallback.
+            fast = config.model_copy(
+                update={
+                    "model_id": policy.fast_model_id,
+                    "fallback_model_id": config.model_id,
+                    "context_length": policy.fast_context_length
+                    or policy.fast_max_tokens + policy.output_tokens,
+                }
+            )
+            route = Route(fast, tokens, "fast")
+            if not route.overflow_tokens:
+                return _log(route)
+
+    tokens = estimate_tokens(prompt, config.model_id)
+    route = Route(config, tokens)
+    if route.overflow_tokens and policy and policy.large_model_id:
+        large = config.model_copy(
+            update={
+                "model_id": policy.large_model_id,
+                "context_length": policy.large_context_length or config.context_length,
+            }
+        )
+        return _log(
+            Route(large, estimate_tokens(prompt, policy.large_model_id), "large")
+        )
+    return route
+
+
+def fit_diff(
+    route: Route,
+    diff: str,
+    detailed: bool = False,
+    template: Optional[TemplateLike] = None,
+    instruction: Optional[str] = None,
+) -> str:
+    # The estimate is approximate and clean_diff cuts at line boundaries, so
+    # re-estimate after each cut until the prompt fits or cannot shrink.
+    while route.overflow_tokens:
+        trimmed = clean_diff(diff, route.max_diff_length(diff) or 0)
+        if len(trimmed) >= len(diff):
+            break
+        diff = trimmed
+        prompt = get_commit_instruction(diff, detailed, template, instruction)
+        route = replace(
+            route, prompt_tokens=estimate_tokens(prompt, route.model.model_id)
+        )
+    return diff
+
+
+def _log(route: Route) -> Route:
+    logger.info(
+        "Routing ~%d-token prompt to %s (%s)",
+        route.prompt_tokens,
+        route.model.model_id,
+        route.reason,
+    )
+    return route
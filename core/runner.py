@@ -1,7 +1,7 @@
 import os
 import shutil
 import subprocess
-from typing import Any, List
+from typing import Any, Iterator, List
 
 
 class SafeGitRunner:
@@ -66,3 +66,27 @@ class SafeGitRunner:
             )
 
         return result
+
+    def stream_lines(self, command: List[str], **kwargs: Any) -> Iterator[str]:
+        full_command = [self.git_path] + command
+
+        with subprocess.Popen(  # noqa: S603
+            full_command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            **kwargs,
+        ) as process:
+            if process.stdout is None:
+                raise RuntimeError("git output is not captured")
+            try:
+                for line in process.stdout:
+                    yield line.rstrip("\n")
+            except GeneratorExit:
+                process.kill()
+                raise
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, full_command)
@@ -0,0 +1,178 @@
+import ast
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.diff import SYMBOL_PATTERN, FileDiff, Hunk
+
+SourceLoader = Callable[[str], Optional[str]]
+
+CONFIG_EXTENSIONS = {"toml", "ini", "cfg", "yaml", "yml", "json", "env"}
+CONFIG_KEY_PATTERN = re.compile(r'^\s*"?(?P<key>[A-Za-z_][\w.-]*)"?\s*[:=]')
+CONFIG_SECTION_PATTERN = re.compile(r"^\s*\[+(?P<section>[^\]]+)\]+\s*$")
+
+
+@dataclass
+class FileSymbols:
+    path: str
+    status: str
+    additions: int
+    deletions: int
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    keys: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified or self.keys)
+
+
+def _append_unique(target: List[str], name: str) -> None:
+    if name and name not in target:
+        target.append(name)
+
+
+def _python_scopes(source: str) -> List[Tuple[int, int, str]]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    scopes: List[Tuple[int, int, str]] = []
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{prefix}{child.name}"
+                scopes.append((child.lineno, child.end_lineno or child.lineno, name))
+                visit(child, f"{name}.")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return scopes
+
+
+def _innermost(scopes: Sequence[Tuple[int, int, str]], line: int) -> Optional[str]:
+    best: Optional[Tuple[int, int, str]] = None
+    for start, end, name in scopes:
+        if start <= line <= end and (best is None or start >= best[0]):
+            best = (start, end, name)
+    return best[2] if best else None
+
+
+def _context_symbol(hunk: Hunk) -> str:
+    match = SYMBOL_PATTERN.match(hunk.context)
+    return match.group("name") if match else ""
+
+
+def _hunk_symbols(hunk: Hunk, scopes: Sequence[Tuple[int, int, str]]) -> List[str]:
+    touched: List[str] = []
+    current = _context_symbol(hunk)
+    new_line = hunk.new_start
+
+    for line in hunk.lines:
+        marker, text = line[:1], line[1:]
+        match = SYMBOL_PATTERN.match(text)
+        if match:
+            current = match.group("name")
+
+        if marker in ("+", "-"):
+            _append_unique(touched, _innermost(scopes, new_line) or current)
+
+        if marker in ("+", " ", ""):
+            new_line += 1
+
+    return touched
+
+
+def _config_keys(hunk: Hunk) -> List[str]:
+    keys: List[str] = []
+    section = ""
+
+    context = CONFIG_SECTION_PATTERN.match(hunk.context)
+    if context:
+        section = context.group("section").strip()
+
+    for line in hunk.lines:
+        marker, text = line[:1], line[1:]
+        header = CONFIG_SECTION_PATTERN.match(text)
+        if header:
+            section = header.group("section").strip()
+            if marker in ("+", "-"):
+                _append_unique(keys, f"[{section}]")
+            continue
+
+        if marker not in ("+", "-"):
+            continue
+        match = CONFIG_KEY_PATTERN.match(text)
+        if match:
+            key = match.group("key")
+            _append_unique(keys, f"{section}.{key}" if section else key)
+
+    return keys
+
+
+def extract_file_symbols(
+    file_diff: FileDiff, source: Optional[str] = None
+) -> FileSymbols:
+    symbols = FileSymbols(
+        path=file_diff.path,
+        status=file_diff.status,
+        additions=file_diff.additions,
+        deletions=file_diff.deletions,
+    )
+
+    if file_diff.extension in CONFIG_EXTENSIONS:
+        for hunk in file_diff.hunks:
+            for key in _config_keys(hunk):
+                _append_unique(symbols.keys, key)
+        return symbols
+
+    added = file_diff.added_symbols()
+    removed = file_diff.removed_symbols()
+    symbols.added = [name for name in added if name not in removed]
+    symbols.removed = [name for name in removed if name not in added]
+
+    scopes = _python_scopes(source) if source and file_diff.extension == "py" else []
+    for hunk in file_diff.hunks:
+        for name in _hunk_symbols(hunk, scopes):
+            short_name = name.rsplit(".", 1)[-1]
+            if short_name not in symbols.added and short_name not in symbols.removed:
+                _append_unique(symbols.modified, name)
+
+    return symbols
+
+
+def extract_symbol_changes(
+    files: Sequence[FileDiff], source_loader: Optional[SourceLoader] = None
+) -> List[FileSymbols]:
+    result = []
+    for file_diff in files:
+        source = None
+        if (
+            source_loader
+            and file_diff.extension == "py"
+            and file_diff.status != "deleted"
+        ):
+            source = source_loader(file_diff.path)
+        result.append(extract_file_symbols(file_diff, source))
+    return result
+
+
+def format_symbol_summary(changes: Sequence[FileSymbols]) -> str:
+    lines = ["Symbol-level summary of staged changes:"]
+    markers: Dict[str, str] = {"added": "+", "removed": "-", "modified": "~"}
+
+    for change in changes:
+        lines.append(
+            f"{change.path} ({change.status}, +{change.additions}/-{change.deletions})"
+        )
+        for attribute, marker in markers.items():
+            for name in getattr(change, attribute):
+                lines.append(f"  {marker} {name}")
+        for key in change.keys:
+            lines.append(f"  ~ key {key}")
+
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from core.config.backends import StateStore, get_backend
+from core.constants import (
+    TELEMETRY_ACCEPTANCE_WEIGHT,
+    TELEMETRY_ERROR_WEIGHT,
+    TELEMETRY_LATENCY_TARGET,
+    TELEMETRY_LATENCY_WEIGHT,
+    TELEMETRY_MAX_MODELS,
+    TELEMETRY_MIN_SAMPLES,
+    TELEMETRY_SMOOTHING,
+    TELEMETRY_THROTTLE_WEIGHT,
+    TELEMETRY_TTFT_TARGET,
+    TELEMETRY_TTFT_WEIGHT,
+)
+from core.exceptions import CacheFileError
+
+
+def _clamp(value: float, low: float = -1.0, high: float = 1.0) -> float:
+    return max(low, min(high, value))
+
+
+@dataclass
+class ModelStats:
+    requests: int = 0
+    latency: Optional[float] = None
+    ttft: Optional[float] = None
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    outcomes: int = 0
+    acceptance: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelStats":
+        return cls(
+            requests=int(data.get("requests", 0)),
+            latency=data.get("latency"),
+            ttft=data.get("ttft"),
+            error_rate=float(data.get("error_rate", 0.0)),
+            throttle_rate=float(data.get("throttle_rate", 0.0)),
+            outcomes=int(data.get("outcomes", 0)),
+            acceptance=data.get("acceptance"),
+        )
+
+    def score(self) -> float:
+        score = 0.0
+
+        if self.requests:
+            if self.latency is not None:
+                speed = (TELEMETRY_LATENCY_TARGET - self.latency) / (
+                    TELEMETRY_LATENCY_TARGET
+                )
+                score += TELEMETRY_LATENCY_WEIGHT * _clamp(speed)
+            if self.ttft is not None:
+                speed = (TELEMETRY_TTFT_TARGET - self.ttft) / TELEMETRY_TTFT_TARGET
+                score += TELEMETRY_TTFT_WEIGHT * _clamp(speed)
+            score -= TELEMETRY_ERROR_WEIGHT * self.error_rate
+            score -= TELEMETRY_THROTTLE_WEIGHT * self.throttle_rate
+            # A couple of lucky or unlucky requests shouldn't reorder the list.
+            score *= min(1.0, self.requests / TELEMETRY_MIN_SAMPLES)
+
+        if self.outcomes and self.acceptance is not None:
+            confidence = min(1.0, self.outcomes / TELEMETRY_MIN_SAMPLES)
+            score += (
+                TELEMETRY_ACCEPTANCE_WEIGHT * (2 * self.acceptance - 1) * confidence
+            )
+
+        return score
+
+
+class ModelTelemetry:
+    # Per-model observations as exponentially weighted averages, so recent
+    # behaviour dominates and the state file stays a fixed size per model.
+
+    def __init__(
+        self,
+        state_file: StateStore,
+        smoothing: float = TELEMETRY_SMOOTHING,
+        max_models: int = TELEMETRY_MAX_MODELS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.state_file = state_file
+        self.smoothing = smoothing
+        self.max_models = max_models
+        self._clock = clock
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def default(cls) -> "ModelTelemetry":
+        return cls(get_backend().state("model_telemetry"))
+
+    @staticmethod
+    def _key(provider: str, model_id: str) -> str:
+        return f"{provider}/{model_id}"
+
+    def _average(self, current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
+
+    def record_request(
+        self,
+        provider: str,
+        model_id: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        error: bool = False,
+        throttled: bool = False,
+    ) -> None:
+        def update(entry: Dict[str, Any]) -> None:
+            entry["requests"] = entry.get("requests", 0) + 1
+            if not error:
+                entry["latency"] = self._average(entry.get("latency"), latency)
+                if ttft is not None:
+                    entry["ttft"] = self._average(entry.get("ttft"), ttft)
+            entry["error_rate"] = self._average(
+                entry.get("error_rate"), 1.0 if error else 0.0
+            )
+            entry["throttle_rate"] = self._average(
+                entry.get("throttle_rate"), 1.0 if throttled else 0.0
+            )
+
+        self._update(provider, model_id, update)
+
+    def record_outcome(self, provider: str, model_id: str, accepted: bool) -> None:
+        def update(entry: Dict[str, Any]) -> None:
+            entry["outcomes"] = entry.get("outcomes", 0) + 1
+            entry["acceptance"] = self._average(
+                entry.get("acceptance"), 1.0 if accepted else 0.0
+            )
+
+        self._update(provider, model_id, update)
+
+    def _update(
+        self, provider: str, model_id: str, update: Callable[[Dict[str, Any]], None]
+    ) -> None:
+        try:
+            with self.state_file.transaction() as state:
+                models = state.setdefault("models", {})
+                entry = models.setdefault(self._key(provider, model_id), {})
+                update(entry)
+                entry["updated_at"] = self._clock()
+
+                overflow = len(models) - self.max_models
+                if overflow > 0:
+                    oldest = sorted(models, key=lambda k: models[k]["updated_at"])
+                    for stale in oldest[:overflow]:
+                        del models[stale]
+                self._snapshot = state
+        except CacheFileError:
+            pass
+
+    def stats(self, provider: str, model_id: str) -> Optional[ModelStats]:
+        if self._snapshot is None:
+            try:
+                self._snapshot = self.state_file.load()
+            except CacheFileError:
+                self._snapshot = {}
+
+        entry = self._snapshot.get("models", {}).get(self._key(provider, model_id))
+        return ModelStats.from_dict(entry) if entry else None
+
+    def score_adjustment(self, provider: str, model_id: str) -> float:
+        stats = self.stats(provider, model_id)
+        return stats.score() if stats else 0.0
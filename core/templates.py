@@ -1,10 +1,64 @@
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
 
 from core.config.paths import ConfigDirectory
 from core.constants import _DEFAULT_COMMIT_TEMPLATE
 from core.exceptions import TemplateError, TemplateLoadError, TemplateSaveError
 
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CompiledTemplate:
+    __slots__ = ("_literals", "_slots", "_raw_slots", "_placeholders")
+
+    def __init__(self, source: str) -> None:
+        literals: List[str] = []
+        slots: List[str] = []
+        raw_slots: List[str] = []
+        position = 0
+
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            literals.append(source[position : match.start()])
+            slots.append(match.group(1))
+            raw_slots.append(match.group(0))
+            position = match.end()
+        literals.append(source[position:])
+
+        self._literals: Tuple[str, ...] = tuple(literals)
+        self._slots: Tuple[str, ...] = tuple(slots)
+        self._raw_slots: Tuple[str, ...] = tuple(raw_slots)
+        self._placeholders: FrozenSet[str] = frozenset(slots)
+
+    @property
+    def placeholders(self) -> FrozenSet[str]:
+        return self._placeholders
+
+    def has_placeholder(self, name: str) -> bool:
+        return name in self._placeholders
+
+    def render_parts(self, values: Mapping[str, str]) -> List[str]:
+        # Unknown placeholders are kept verbatim so foreign templates survive.
+        parts = [self._literals[0]]
+        for slot, raw, literal in zip(
+            self._slots, self._raw_slots, self._literals[1:], strict=True
+        ):
+            parts.append(values.get(slot, raw))
+            parts.append(literal)
+        return parts
+
+    def render(self, **values: str) -> str:
+        return "".join(self.render_parts(values))
+
+
+@lru_cache(maxsize=32)
+def compile_template(source: str) -> CompiledTemplate:
+    return CompiledTemplate(source)
+
+
+TemplateLike = Union[str, CompiledTemplate]
+
 
 class Template:
 
@@ -57,6 +111,9 @@ class Template:
             return self.load()
         return self._content
 
+    def compile(self) -> CompiledTemplate:
+        return compile_template(self.get_content())
+
     def save(self, content: Optional[str] = None) -> None:
         content_to_save = content or self._content
         if content_to_save is None:
@@ -92,6 +149,8 @@ class Template:
 
 
 class TemplateDirectory:
+    _compiled_cache: Dict[Path, Tuple[int, CompiledTemplate]] = {}
+
     def __init__(self) -> None:
         self.config_dir = ConfigDirectory().config_dir()
         try:
@@ -126,6 +185,23 @@ class TemplateDirectory:
                 f"Failed to create template '{name}'", cause=e
             ) from e
 
+    def compiled(self, file_path: Union[str, Path]) -> CompiledTemplate:
+        path = Path(file_path).absolute()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError as e:
+            raise TemplateLoadError(
+                f"Provided path is not a file or does not exist: {file_path}"
+            ) from e
+
+        cached = self._compiled_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        compiled = Template.from_file(path).compile()
+        self._compiled_cache[path] = (mtime, compiled)
+        return compiled
+
     def default_template(self) -> Template:
         template = self.get_template("default_template")
         if template.exists():
@@ -0,0 +1,19 @@
+import math
+
+from core.constants import BYTES_PER_TOKEN, DEFAULT_BYTES_PER_TOKEN
+
+
+def bytes_per_token(model_id: str) -> float:
+    model_id = model_id.lower()
+    for family, ratio in BYTES_PER_TOKEN.items():
+        if family in model_id:
+            return ratio
+    return DEFAULT_BYTES_PER_TOKEN
+
+
+def estimate_tokens(text: str, model_id: str = "") -> int:
+    # Byte length rather than characters: non-ASCII text splits into more
+    # tokens, roughly in proportion to its UTF-8 size.
+    return math.ceil(
+        len(text.encode("utf-8", "surrogatepass")) / bytes_per_token(model_id)
+    )
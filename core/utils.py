@@ -2,21 +2,20 @@ import re
 
 import questionary
 
-from core.models import ModelConfig
+from core.constants import MAX_DIFF_LENGTH, TRUNCATION_RESERVE
+from core.models import ModelSummary
 
 
-def clean_diff(diff: str) -> str:
-    MAX_DIFF_LENGTH = 3000
-
-    if len(diff) > MAX_DIFF_LENGTH:
+def clean_diff(diff: str, max_length: int = MAX_DIFF_LENGTH) -> str:
+    if len(diff) > max_length:
         lines = diff.split("\n")
         truncated_lines = []
         count = 0
         for line in lines:
-            if count + len(line) > MAX_DIFF_LENGTH - 200:
+            if count + len(line) + 1 > max_length - TRUNCATION_RESERVE:
                 break
             truncated_lines.append(line)
-            count += len(line)
+            count += len(line) + 1
         diff = "\n".join(truncated_lines) + "\n\n[... diff truncated for length ...]"
 
     return diff
@@ -32,7 +31,7 @@ def qprint(content: str) -> None:
     questionary.print(content, style="bold")
 
 
-def is_chat_model(model: ModelConfig) -> bool:
+def is_chat_model(model: ModelSummary) -> bool:
     name = model.name.lower()
 
     include = [
@@ -0,0 +1,212 @@
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from core.config.backends import get_backend
+from core.constants import (
+    WATCH_BURST,
+    WATCH_DEBOUNCE,
+    WATCH_MIN_INTERVAL,
+    WATCH_POLL_INTERVAL,
+)
+from core.diff import RENAME_FLAGS, DiffBuffer
+from core.indexing import repository_key
+from core.ratelimit import RateLimiter
+from core.runner import SafeGitRunner
+
+logger = logging.getLogger("gitk")
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatchBackend(ABC):
+    @abstractmethod
+    def wait_event(self, timeout: Optional[float]) -> bool: ...
+
+    @abstractmethod
+    def close(self) -> None: ...
+
+
+class PollingBackend(WatchBackend):
+
+    def __init__(
+        self, index_path: Path, poll_interval: float = WATCH_POLL_INTERVAL
+    ) -> None:
+        self.index_path = index_path
+        self.poll_interval = poll_interval
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def wait_event(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+
+            if deadline is None:
+                time.sleep(self.poll_interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self) -> None:
+        self._signature = None
+
+
+class InotifyBackend(WatchBackend):
+    # git rewrites the index via index.lock + rename, so watch the directory
+    # and match events whose name is the index file itself.
+
+    def __init__(self, index_path: Path) -> None:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._name = index_path.name.encode()
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        directory = os.fsencode(index_path.parent)
+        if self._libc.inotify_add_watch(self._fd, directory, mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, "inotify_add_watch failed")
+
+    def wait_event(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                continue
+            if self._matches(data):
+                return True
+
+    def _matches(self, data: bytes) -> bool:
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            start = offset + EVENT_HEADER.size
+            name = data[start : start + length].rstrip(b"\0")
+            if name == self._name:
+                return True
+            offset = start + length
+        return False
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def create_backend(index_path: Path) -> WatchBackend:
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyBackend(index_path)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify unavailable, polling the index instead: %s", e)
+    return PollingBackend(index_path)
+
+
+class IndexWatcher:
+
+    def __init__(self, backend: WatchBackend, debounce: float = WATCH_DEBOUNCE) -> None:
+        self.backend = backend
+        self.debounce = debounce
+
+    @classmethod
+    def for_repository(
+        cls, runner: SafeGitRunner, root: Path, debounce: float = WATCH_DEBOUNCE
+    ) -> "IndexWatcher":
+        result = runner.run(
+            ["rev-parse", "--absolute-git-dir"],
+            capture_output=True,
+            text=True,
+            cwd=root,
+            check=True,
+        )
+        index_path = Path(result.stdout.strip()) / "index"
+        return cls(create_backend(index_path), debounce)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if not self.backend.wait_event(timeout):
+            return False
+        # `git add -p` writes the index once per hunk; wait for it to settle.
+        while self.backend.wait_event(self.debounce):
+            pass
+        return True
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+class PreGenerator:
+
+    def __init__(
+        self,
+        runner: SafeGitRunner,
+        root: Path,
+        generate: Callable[[DiffBuffer], str],
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.runner = runner
+        self.root = root
+        self.generate = generate
+        self.limiter = limiter or RateLimiter(
+            get_backend().state(f"{repository_key(root)}_watch"),
+            initial_rate=1.0 / WATCH_MIN_INTERVAL,
+            max_rate=1.0 / WATCH_MIN_INTERVAL,
+            burst=WATCH_BURST,
+        )
+        self._last_digest: Optional[str] = None
+
+    def run_once(self) -> str:
+        # Read exactly as `gitk commit` does, so both build the same prompt
+        # and the cached message is found again.
+        result = self.runner.run(
+            ["diff", "--cached", *RENAME_FLAGS], capture_output=True, cwd=self.root
+        )
+        diff = DiffBuffer(result.stdout)
+        if result.returncode != 0 or not diff:
+            return "empty"
+
+        digest = hashlib.sha256(result.stdout).hexdigest()
+        if digest == self._last_digest:
+            return "unchanged"
+        if not self.limiter.try_acquire():
+            return "throttled"
+
+        self.generate(diff)
+        self._last_digest = digest
+        return "generated"
@@ -0,0 +1,49 @@
+import pytest
+
+import core.config.backends as backends
+from core.config.backends import FileBackend
+from core.config.files import StateFile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    # Caches, telemetry and circuit state default to ~/.gitk_config; keep
+    # every test away from the developer's real one.
+    home = tmp_path_factory.mktemp("home")
+    # As left behind by `gitk init`.
+    (home / ".gitk_config" / "templates").mkdir(parents=True)
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.delenv(backends.CACHE_BACKEND_ENV, raising=False)
+    monkeypatch.setattr(backends, "_backend", None)
+    return home
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return StateFile("test_state", path=tmp_path / "test_state.json")
+
+
+@pytest.fixture
+def tmp_backend(tmp_path, monkeypatch):
+    # State that adapters open on their own (breakers, rate limits, telemetry).
+    backend = FileBackend(tmp_path)
+    monkeypatch.setattr(backends, "_backend", backend)
+    return backend
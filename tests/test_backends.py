@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+
+import pytest
+
+from core.config.backends import FileBackend, SQLiteBackend, create_backend
+from tests.test_cache_file import make_dummy_model
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def backend(request, tmp_path, clock):
+    if request.param == "file":
+        yield FileBackend(tmp_path, clock=clock)
+    else:
+        backend = SQLiteBackend(tmp_path / "cache.sqlite3", clock=clock)
+        yield backend
+        backend.close()
+
+
+def test_entries_expire_after_max_age(backend, clock):
+    backend.put("responses", "key", {"message": "feat: add"})
+    clock.now += 30
+
+    assert backend.get("responses", "key") == {"message": "feat: add"}
+    assert backend.get("responses", "key", max_age=60) == {"message": "feat: add"}
+    assert backend.get("responses", "key", max_age=10) is None
+    assert backend.age("responses", "key") == 30
+
+
+def test_evict_keeps_newest_entries(backend, clock):
+    for name in ("a", "b", "c", "d"):
+        clock.now += 1
+        backend.put("responses", name, name)
+    backend.put("other", "a", "kept")
+
+    backend.evict("responses", max_entries=2)
+
+    assert [backend.get("responses", n) for n in "abcd"] == [None, None, "c", "d"]
+    assert backend.get("other", "a") == "kept"
+
+
+def test_evict_drops_expired_entries(backend, clock):
+    backend.put("responses", "old", "old")
+    clock.now += 100
+    backend.put("responses", "new", "new")
+
+    backend.evict("responses", max_entries=10, max_age=50)
+
+    assert backend.get("responses", "old") is None
+    assert backend.get("responses", "new") == "new"
+
+
+def test_file_entries_leave_no_lock_files(tmp_path, clock):
+    backend = FileBackend(tmp_path, clock=clock)
+    for name in ("a", "b", "c"):
+        backend.put("responses", name, name)
+
+    backend.evict("responses", max_entries=1)
+
+    assert [p.name for p in (tmp_path / "responses").iterdir()] == ["c.json"]
+
+
+def test_delete_removes_entry(backend):
+    backend.put("responses", "key", "value")
+    backend.delete("responses", "key")
+    backend.delete("responses", "missing")
+
+    assert backend.get("responses", "key") is None
+    assert backend.age("responses", "key") is None
+
+
+def test_state_transactions(backend):
+    state = backend.state("openrouter_ratelimit")
+
+    with state.transaction() as data:
+        data["tokens"] = 3
+    with state.transaction(readonly=True) as data:
+        data["tokens"] = 99
+
+    assert state.name == "openrouter_ratelimit"
+    assert state.load() == {"tokens": 3}
+
+
+def test_concurrent_state_updates_are_not_lost(backend):
+    state = backend.state("counter")
+
+    def bump():
+        for _ in range(20):
+            with state.transaction() as data:
+                data["count"] = data.get("count", 0) + 1
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state.load() == {"count": 80}
+
+
+def test_models_cache_round_trip(backend, clock):
+    cache = backend.models("openrouter")
+    assert cache.load_models() == []
+    assert cache.age() is None
+
+    cache.save_models([make_dummy_model()])
+
+    assert cache.load_models() == [make_dummy_model()]
+    assert cache.age() is not None
+
+    cache.delete_cache()
+    assert cache.load_models() == []
+
+
+def test_record_log_append_and_rewrite(backend):
+    log = backend.log("repo")
+    other = backend.log("other-repo")
+
+    with log.lock():
+        log.append({"head": "a"})
+        log.append({"head": "b"})
+    other.append({"head": "x"})
+
+    assert log.read() == [{"head": "a"}, {"head": "b"}]
+
+    log.rewrite([{"snapshot": "b"}])
+    assert log.read() == [{"snapshot": "b"}]
+    assert other.read() == [{"head": "x"}]
+
+
+def test_sqlite_backend_uses_wal(tmp_path):
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    backend.put("responses", "key", "value")
+    backend.close()
+
+    with sqlite3.connect(tmp_path / "cache.sqlite3") as connection:
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+
+    assert mode == "wal"
+
+
+def test_sqlite_rolls_back_failed_state_update(tmp_path):
+    state = SQLiteBackend(tmp_path / "cache.sqlite3").state("counter")
+    with state.transaction() as data:
+        data["count"] = 1
+
+    with pytest.raises(RuntimeError):
+        with state.transaction() as data:
+            data["count"] = 2
+            raise RuntimeError
+
+    assert state.load() == {"count": 1}
+
+
+def test_unknown_backend_falls_back_to_files():
+    assert isinstance(create_backend("redis"), FileBackend)
+    assert isinstance(create_backend("file"), FileBackend)
@@ -0,0 +1,48 @@
+import threading
+
+from core.batch import BatchItem, generate_all, generate_pipelined
+from core.cli.cli import ReviewCLI
+
+
+def make_items(count):
+    return [BatchItem(label=f"file{i}.py", diff=f"+{i}") for i in range(count)]
+
+
+def test_pipeline_yields_in_order_while_generating_ahead():
+    items = make_items(3)
+    release_first = threading.Event()
+    started = []
+
+    def generate(item):
+        started.append(item.label)
+        if item.label == "file0.py":
+            release_first.wait(timeout=5)
+        return f"feat: {item.label}"
+
+    pipeline = generate_pipelined(items, generate, max_workers=2)
+    threading.Timer(0.2, release_first.set).start()
+
+    first = next(pipeline)
+    assert first.label == "file0.py"
+    assert "file1.py" in started
+
+    rest = list(pipeline)
+    assert [item.message for item in rest] == ["feat: file1.py", "feat: file2.py"]
+
+
+def test_generation_errors_stay_on_their_item():
+    items = make_items(2)
+
+    def generate(item):
+        if item.label == "file0.py":
+            raise RuntimeError("provider down")
+        return "feat: ok\n\nbody"
+
+    generate_all(items, generate)
+
+    assert items[0].error == "provider down"
+    assert items[1].title == "feat: ok"
+
+
+def test_review_of_empty_batch_selects_nothing():
+    assert ReviewCLI().review([]) == []
@@ -0,0 +1,55 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from core.bench import BenchResult, bench_model, pick_winner, race_models
+from core.exceptions import ProviderUnavailableError
+from tests.test_cache_file import make_dummy_model
+
+
+def test_bench_model_measures_ttft_and_output():
+    ticks = iter([0.0, 0.4, 2.4])
+    adapter = MagicMock()
+    adapter.stream_commit_message.return_value = iter(["feat: add ", "sessions"])
+
+    with patch("core.bench.ModelFactory.create_adapter", return_value=adapter):
+        result = bench_model(make_dummy_model(), "+diff", clock=lambda: next(ticks))
+
+    assert result.error is None
+    assert result.output == "feat: add sessions"
+    assert result.ttft == 0.4
+    assert result.latency == 2.4
+    assert result.tokens_per_second == len("feat: add sessions") / 4 / 2.0
+
+
+def test_bench_model_reports_errors():
+    adapter = MagicMock()
+    adapter.stream_commit_message.side_effect = ProviderUnavailableError("down")
+
+    with patch("core.bench.ModelFactory.create_adapter", return_value=adapter):
+        result = bench_model(make_dummy_model(), "+diff")
+
+    assert result.error == "down"
+    assert result.tokens_per_second is None
+
+
+def test_race_models_runs_concurrently_and_keeps_order():
+    models = [make_dummy_model(model_id=f"m{i}") for i in range(3)]
+    barrier = threading.Barrier(3, timeout=5)
+
+    def bench(model, diff, template):
+        barrier.wait()
+        return BenchResult(model, latency=1.0, output=diff)
+
+    results = race_models(models, "+diff", bench=bench)
+
+    assert [r.model.model_id for r in results] == ["m0", "m1", "m2"]
+
+
+def test_pick_winner_prefers_fastest_successful_model():
+    fast_failure = BenchResult(make_dummy_model(model_id="a"), error="boom")
+    empty = BenchResult(make_dummy_model(model_id="b"), latency=0.1, output="")
+    slow = BenchResult(make_dummy_model(model_id="c"), latency=3.0, output="fix: x")
+    fast = BenchResult(make_dummy_model(model_id="d"), latency=1.0, output="fix: y")
+
+    assert pick_winner([fast_failure, empty, slow, fast]) is fast
+    assert pick_winner([fast_failure]) is None
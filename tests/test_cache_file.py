@@ -21,17 +21,42 @@ def make_dummy_model(model_id: str = "id1", name: str = "model1"):
     )
 
 
-def test_save_models_success():
+def test_save_models_success(tmp_path):
     dummy_models = [make_dummy_model()]
     m_dump = [m.model_dump() for m in dummy_models]
 
-    m_open = mock_open()
-    with patch("builtins.open", m_open), patch("json.dump") as mock_json_dump:
-        cache = CacheFile("testprovider")
+    cache = CacheFile("testprovider")
+    cache._file_path = tmp_path / "testprovider.json"
+    with patch("core.config.files.os.fsync") as mock_fsync:
         cache.save_models(dummy_models)
-        mock_json_dump.assert_called_once_with(
-            m_dump, m_open(), ensure_ascii=False, indent=2
-        )
+
+    mock_fsync.assert_called_once()
+    assert json.loads(cache.file_path.read_text(encoding="utf-8")) == m_dump
+
+
+def test_save_models_replaces_cache_atomically(tmp_path):
+    cache = CacheFile("testprovider")
+    cache._file_path = tmp_path / "testprovider.json"
+
+    cache.save_models([make_dummy_model()])
+    cache.save_models([make_dummy_model(model_id="id2")])
+
+    assert [m.model_id for m in cache.load_models()] == ["id2"]
+    assert [m.model_id for m in cache.load_models()] == ["id2"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_save_keeps_previous_cache(tmp_path):
+    cache = CacheFile("testprovider")
+    cache._file_path = tmp_path / "testprovider.json"
+    cache.save_models([make_dummy_model()])
+
+    with patch("json.dump", side_effect=OSError):
+        with pytest.raises(CacheFileError):
+            cache.save_models([make_dummy_model(model_id="id2")])
+
+    assert [m.model_id for m in cache.load_models()] == ["id1"]
+    assert not list(tmp_path.glob("*.tmp"))
 
 
 def test_save_models_permission_error():
@@ -56,14 +81,12 @@ def test_save_models_os_error():
             cache.save_models(dummy_models)
 
 
-def test_save_models_json_decode_error():
+def test_save_models_json_decode_error(tmp_path):
     dummy_models = [make_dummy_model()]
 
-    with (
-        patch("builtins.open", mock_open()),
-        patch("json.dump", side_effect=json.JSONDecodeError("msg", "doc", 0)),
-    ):
+    with patch("json.dump", side_effect=json.JSONDecodeError("msg", "doc", 0)):
         cache = CacheFile("testprovider")
+        cache._file_path = tmp_path / "testprovider.json"
         with pytest.raises(CacheFileError, match="JSON encoding error"):
             cache.save_models(dummy_models)
 
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from core.adapters import OpenRouterAdapter
+from core.circuit import CircuitBreaker, CircuitState
+from core.exceptions import CircuitOpenError, ProviderUnavailableError
+from core.models import ModelConfig
+
+
+def test_breaker_opens_after_threshold(state_file, clock):
+    breaker = CircuitBreaker(state_file, failure_threshold=2, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_half_open_probe_after_cooldown(state_file, clock):
+    breaker = CircuitBreaker(state_file, failure_threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 11
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_circuit(state_file, clock):
+    breaker = CircuitBreaker(
+        state_file, failure_threshold=3, cooldown=10, probe_timeout=5, clock=clock
+    )
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 11
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 6
+    assert not breaker.allow_request()
+
+
+@pytest.fixture
+def adapter(monkeypatch, tmp_backend):
+    monkeypatch.setenv("GITK_OPENROUTER_API_KEY", "key")
+    config = ModelConfig(
+        name="m",
+        provider="openrouter",
+        api_base="https://openrouter.ai/api/v1",
+        model_id="primary:free",
+        is_free=True,
+        context_length=4096,
+        fallback_model_id="fallback:free",
+    )
+    adapter = OpenRouterAdapter(config)
+    adapter.rate_limiter = MagicMock()
+    adapter.session = MagicMock()
+    return adapter
+
+
+def test_adapter_fails_over_to_fallback_model(adapter):
+    primary = MagicMock()
+    primary.allow_request.return_value = True
+    fallback = MagicMock()
+    fallback.allow_request.return_value = True
+    adapter._breakers = {"primary:free": primary, "fallback:free": fallback}
+
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": "fix: y"}}]}
+    unavailable = MagicMock(status_code=503)
+    unavailable.raise_for_status.side_effect = requests.HTTPError(
+        response=MagicMock(status_code=503)
+    )
+    adapter.session.post.side_effect = [unavailable, ok]
+
+    assert adapter.generate_commit_message("+diff") == "fix: y"
+    primary.record_failure.assert_called_once()
+    fallback.record_success.assert_called_once()
+    assert adapter.session.post.call_args.kwargs["json"]["model"] == "fallback:free"
+
+
+def test_adapter_fails_fast_when_circuits_open(adapter):
+    closed = MagicMock()
+    closed.allow_request.return_value = False
+    adapter._breakers = {"primary:free": closed, "fallback:free": closed}
+
+    with pytest.raises(CircuitOpenError):
+        adapter.generate_commit_message("+diff")
+    adapter.session.post.assert_not_called()
+
+
+def test_adapter_surfaces_last_failure(adapter):
+    breaker = MagicMock()
+    breaker.allow_request.return_value = True
+    adapter._breakers = {"primary:free": breaker, "fallback:free": breaker}
+    adapter.config.fallback_model_id = None
+    adapter.session.post.side_effect = requests.ConnectionError()
+
+    with pytest.raises(ProviderUnavailableError, match="Network error"):
+        adapter.generate_commit_message("+diff")
+    breaker.record_failure.assert_called_once()
@@ -5,6 +5,7 @@ import pytest
 from click.testing import CliRunner
 
 from core.cli.commands import cli
+from tests.test_cache_file import make_dummy_model
 
 
 @pytest.fixture
@@ -15,13 +16,21 @@ def runner():
 @patch("core.cli.commands.GitkConfig")
 @patch("core.cli.commands.TemplatesCLI")
 @patch("core.cli.commands.ModelsCLI")
+@patch("core.cli.commands.ProvidersCLI")
 @patch("core.cli.commands.ApiKeyCLI")
 def test_init_command(
-    mock_api_key_cli, mock_models_cli, mock_templates_cli, mock_config_cls, runner
+    mock_api_key_cli,
+    mock_providers_cli,
+    mock_models_cli,
+    mock_templates_cli,
+    mock_config_cls,
+    runner,
 ):
     mock_config = MagicMock()
     mock_config_cls.return_value = mock_config
 
+    mock_providers_cli.return_value.select_provider.return_value = "openrouter"
+
     mock_models = mock_models_cli.return_value
     mock_models.select_model.return_value = "mock-model"
 
@@ -34,6 +43,7 @@ def test_init_command(
     result = runner.invoke(cli, ["init"])
 
     assert result.exit_code == 0
+    mock_models_cli.assert_called_once_with("openrouter")
     mock_models.select_model.assert_called_once()
     mock_api_key.setup_api_key.assert_called_once_with("mock-model")
     mock_templates.setup_interactive.assert_called_once()
@@ -43,6 +53,7 @@ def test_init_command(
     assert "GitK initialized." in result.output
 
 
+@patch("core.cli.commands.ModelTelemetry")
 @patch("core.runner.SafeGitRunner.run")
 @patch("core.cli.commands.os.remove")
 @patch("core.cli.commands.tempfile.NamedTemporaryFile")
@@ -60,6 +71,7 @@ def test_commit_command_no_split_confirm(
     mock_tempfile,
     mock_remove,
     mock_run,
+    mock_telemetry_cls,
     runner,
 ):
     mock_config = MagicMock()
@@ -70,9 +82,18 @@ def test_commit_command_no_split_confirm(
     )
 
     mock_run.return_value = subprocess.CompletedProcess(
-        args=["git", "diff", "--cached"], returncode=0, stdout="diff content", stderr=""
+        args=["git", "diff", "--cached"],
+        returncode=0,
+        stdout=b"diff content",
+        stderr="",
     )
-    mock_generate_commit_message.return_value = "Commit message"
+    model = make_dummy_model(model_id="fallback:free")
+
+    def generate(args, config, diff, on_model, **kwargs):
+        on_model(model)
+        return "Commit message"
+
+    mock_generate_commit_message.side_effect = generate
     mock_confirm.return_value = True
 
     mock_tmp_file = MagicMock()
@@ -90,6 +111,9 @@ def test_commit_command_no_split_confirm(
     mock_run.assert_called()
     mock_remove.assert_called_once_with(ANY)
     mock_generate_commit_message.assert_called_once()
+    mock_telemetry_cls.default.return_value.record_outcome.assert_called_once_with(
+        "test", "fallback:free", True
+    )
 
 
 @patch("core.utils.is_safe_filename", return_value=True)
@@ -105,9 +129,9 @@ def test_commit_command_split(
 ):
     def run_side_effect(cmd, *args, **kwargs):
         print(f"DEBUG: git command run: {cmd}")
-        if "--name-only" in cmd:
+        if "--name-status" in cmd:
             return subprocess.CompletedProcess(
-                cmd, 0, stdout="file1.py\nfile2.py", stderr=""
+                cmd, 0, stdout="M\tfile1.py\nM\tfile2.py", stderr=""
             )
         elif "--" in cmd and cmd[-1] in ["file1.py", "file2.py"]:
             file = cmd[-1]
@@ -127,11 +151,31 @@ def test_commit_command_split(
     )
 
     assert result.exit_code == 0
-    mock_echo.assert_any_call("\n--- Generating commit message for file: file1.py ---")
-    mock_echo.assert_any_call("\n--- Generating commit message for file: file2.py ---")
+    mock_echo.assert_any_call("Committing file1.py...")
+    mock_echo.assert_any_call("Committing file2.py...")
     assert mock_generate_commit_message.call_count == 2
 
 
+@patch("core.runner.SafeGitRunner.run")
+@patch("core.cli.commands.click.echo")
+@patch("core.cli.commands.generate_commit_message")
+def test_commit_command_split_without_diffs(
+    mock_generate_commit_message, mock_echo, mock_run, runner
+):
+    def run_side_effect(cmd, *args, **kwargs):
+        if "--name-status" in cmd:
+            return subprocess.CompletedProcess(cmd, 0, stdout="M\tfile1.py")
+        return subprocess.CompletedProcess(cmd, 0, stdout="")
+
+    mock_run.side_effect = run_side_effect
+
+    result = runner.invoke(cli, ["commit", "--split"])
+
+    assert result.exit_code == 0
+    mock_echo.assert_any_call("Nothing to commit.")
+    mock_generate_commit_message.assert_not_called()
+
+
 @patch("core.cli.commands.ModelsCLI")
 @patch("core.cli.commands.click.secho")
 def test_update_models(mock_secho, mock_models_cli, runner):
@@ -142,3 +186,122 @@ def test_update_models(mock_secho, mock_models_cli, runner):
     assert result.exit_code == 0
     mock_models.refresh_models_list.assert_called_once()
     mock_secho.assert_called_with("Models list updated.", fg="green")
+
+
+@patch("core.cli.commands.ModelTelemetry")
+@patch("core.cli.commands.GitkConfig")
+@patch("core.cli.commands.ReviewCLI")
+@patch("core.runner.SafeGitRunner.run")
+@patch("core.cli.commands.click.echo")
+@patch("core.cli.commands.generate_commit_message")
+def test_commit_command_split_review(
+    mock_generate_commit_message,
+    mock_echo,
+    mock_run,
+    mock_review_cli,
+    mock_config_cls,
+    mock_telemetry_cls,
+    runner,
+):
+    def run_side_effect(cmd, *args, **kwargs):
+        if "--name-status" in cmd:
+            return subprocess.CompletedProcess(
+                cmd, 0, stdout="M\tfile1.py\nM\tfile2.py", stderr=""
+            )
+        if "diff" in cmd:
+            return subprocess.CompletedProcess(cmd, 0, stdout=f"+{cmd[-1]}", stderr="")
+        return subprocess.CompletedProcess(cmd, 0)
+
+    mock_run.side_effect = run_side_effect
+
+    def generate(args, config, diff, on_model, **kwargs):
+        # file1.py comes from the response cache, so no model is credited.
+        if diff != "+file1.py":
+            on_model(make_dummy_model(model_id=f"model-{diff[1:]}"))
+        return f"feat: {diff[1:]}"
+
+    mock_generate_commit_message.side_effect = generate
+    mock_review_cli.return_value.review.side_effect = lambda items: items[1:]
+
+    result = runner.invoke(cli, ["commit", "--split"])
+
+    assert result.exit_code == 0
+    reviewed = mock_review_cli.return_value.review.call_args.args[0]
+    assert [item.message for item in reviewed] == ["feat: file1.py", "feat: file2.py"]
+    commits = [
+        call.args[0] for call in mock_run.call_args_list if "commit" in call.args[0]
+    ]
+    assert len(commits) == 1
+    assert commits[0][-2:] == ["--", "file2.py"]
+    record = mock_telemetry_cls.default.return_value.record_outcome
+    record.assert_called_once_with("test", "model-file2.py", True)
+
+
+@patch("core.cli.commands.race_models")
+@patch("core.cli.commands.ModelsCLI")
+@patch("core.cli.commands.GitkConfig")
+@patch("core.cli.commands.click.confirm")
+def test_models_bench_saves_winner(
+    mock_confirm, mock_config_cls, mock_models_cli, mock_race, runner
+):
+    from core.bench import SAMPLE_DIFF, BenchResult
+    from core.utils import clean_diff
+
+    mock_config = mock_config_cls.return_value
+    mock_config.load_config.side_effect = FileNotFoundError
+    candidates = [make_dummy_model(model_id="a"), make_dummy_model(model_id="b")]
+    mock_models_cli.return_value.top_models.return_value = candidates
+    mock_race.return_value = [
+        BenchResult(candidates[0], latency=3.0, ttft=1.0, output="feat: slow"),
+        BenchResult(candidates[1], latency=1.0, ttft=0.2, output="feat: fast"),
+    ]
+    mock_confirm.return_value = True
+
+    result = runner.invoke(
+        cli, ["models", "bench", "--provider", "local", "--builtin", "--top", "2"]
+    )
+
+    assert result.exit_code == 0, result.output
+    mock_models_cli.assert_called_once_with("local")
+    mock_models_cli.return_value.top_models.assert_called_once_with(2)
+    assert mock_race.call_args.args[1] == clean_diff(SAMPLE_DIFF)
+    assert "<- fastest" in result.output
+    mock_config.save_config.assert_called_once_with(
+        candidates[1], mock_config.templates_dir.default_template.return_value
+    )
+
+
+@patch("core.cli.commands.race_models")
+@patch("core.cli.commands.ModelsCLI")
+@patch("core.cli.commands.click.confirm", return_value=True)
+def test_models_bench_keeps_routing_and_fallback(
+    mock_confirm, mock_models_cli, mock_race, runner
+):
+    from core.bench import BenchResult
+    from core.config.config import GitkConfig
+    from core.models import RoutingPolicy
+
+    config = GitkConfig()
+    current = make_dummy_model(model_id="old").model_copy(
+        update={
+            "provider": "local",
+            "fallback_model_id": "backup",
+            "routing": RoutingPolicy(fast_model_id="tiny"),
+        }
+    )
+    config.save_config(current, config.templates_dir.default_template())
+    winner = make_dummy_model(model_id="new", name="New").model_copy(
+        update={"provider": "local"}
+    )
+    mock_models_cli.return_value.top_models.return_value = [winner]
+    mock_race.return_value = [
+        BenchResult(winner, latency=1.0, ttft=0.2, output="feat: fast")
+    ]
+
+    result = runner.invoke(cli, ["models", "bench", "--builtin"])
+
+    assert result.exit_code == 0, result.output
+    saved = config.load_config().model_config_data
+    assert (saved.model_id, saved.name) == ("new", "New")
+    assert saved.fallback_model_id == "backup"
+    assert saved.routing == RoutingPolicy(fast_model_id="tiny")
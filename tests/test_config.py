@@ -1,8 +1,13 @@
+import multiprocessing
 import os
+import stat
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from core.config.config import EnvFile, GitkConfig
 from core.config.files import CacheFile
 from core.models import OpenRouterRawModel, Provider
@@ -29,30 +34,32 @@ def test_envfile_save_and_read():
 @patch("core.config.config.EnvFile")
 @patch("core.config.config.Config")
 def test_save_config(ConfigMock, EnvFileMock):
+    cache_file = MagicMock(spec=CacheFile)
+    cache_file.load_models.return_value = []
     provider = Provider[OpenRouterRawModel](
         name="openrouter",
         api_base="https://openrouter.ai/api/v1",
         api_key="dummy_api_key",
         raw_model_cls=OpenRouterRawModel,
-        cache_file=CacheFile("openrouter"),
+        cache_file=cache_file,
     )
 
-    provider.fetch_models = MagicMock(
+    provider._fetch_raw_models = MagicMock(
         return_value=[
             OpenRouterRawModel(
                 id="free-model",
-                name="Free Model",
+                name="Free Chat Model",
                 description="Free model",
                 context_length=4096,
                 pricing_prompt=0.0,
-            ).to_model_config(),
+            ),
             OpenRouterRawModel(
                 id="paid-model",
-                name="Paid Model",
+                name="Paid Chat Model",
                 description="Paid model",
                 context_length=4096,
                 pricing_prompt=0.1,
-            ).to_model_config(),
+            ),
         ]
     )
 
@@ -71,3 +78,41 @@ def test_save_config(ConfigMock, EnvFileMock):
 
     config_obj.save_to_file.assert_called_once()
     envfile_instance.save_key.assert_called_once_with(top_model.provider, "some-key")
+
+
+def _save_key(env_path, provider):
+    env = EnvFile()
+    env._file_path = Path(env_path)
+    env.save_key(provider, f"key-{provider}")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="relies on fork")
+def test_envfile_concurrent_saves_keep_every_key(tmp_path):
+    env_path = tmp_path / ".env"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_save_key, args=(str(env_path), f"p{i}"))
+        for i in range(8)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+
+    env = EnvFile()
+    env._file_path = env_path
+    assert env._read_env_file() == {f"GITK_P{i}_API_KEY": f"key-p{i}" for i in range(8)}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_atomic_write_keeps_file_permissions(tmp_path):
+    env = EnvFile()
+    env._file_path = tmp_path / ".env"
+    env.save_key("openai", "first")
+    env.file_path.chmod(0o600)
+
+    env.save_key("openai", "second")
+
+    assert stat.S_IMODE(env.file_path.stat().st_mode) == 0o600
+    assert env.read_key("GITK_OPENAI_API_KEY") == "second"
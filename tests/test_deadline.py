@@ -0,0 +1,213 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError
+
+import core.generator as generator
+from core.adapters import OpenRouterAdapter
+from core.deadline import Deadline, DeadlineRetry
+from core.exceptions import DeadlineExceededError, ProviderAPIError
+from core.models import ModelConfig
+from core.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def adapter(monkeypatch, tmp_backend):
+    monkeypatch.setenv("GITK_OPENROUTER_API_KEY", "key")
+    adapter = OpenRouterAdapter(
+        ModelConfig(
+            name="m",
+            provider="openrouter",
+            api_base="https://openrouter.ai/api/v1",
+            model_id="primary:free",
+            is_free=True,
+            context_length=4096,
+            fallback_model_id="fallback:free",
+        )
+    )
+    adapter.rate_limiter = MagicMock()
+    adapter.session = MagicMock()
+    adapter.telemetry = MagicMock()
+    breaker = MagicMock()
+    breaker.allow_request.return_value = True
+    adapter._breakers = {"primary:free": breaker, "fallback:free": breaker}
+    return adapter
+
+
+def test_deadline_caps_attempt_timeouts(clock):
+    deadline = Deadline(10.0, clock=clock)
+
+    assert deadline.timeout(30.0) == 10.0
+    clock.now += 7
+    assert deadline.timeout(30.0) == 3.0
+    assert not deadline.fits(5.0)
+
+    clock.now += 2
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout(30.0)
+
+    clock.now += 5
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+
+
+@pytest.mark.parametrize("budget", [None, 0])
+def test_missing_budget_is_unbounded(budget, clock):
+    deadline = Deadline(budget, clock=clock)
+    clock.now += 10**6
+
+    assert deadline.remaining() is None
+    assert deadline.timeout(30.0) == 30.0
+    assert not deadline.expired()
+
+
+def test_retry_stops_when_backoff_overruns_deadline(clock):
+    deadline = Deadline(5.0, clock=clock)
+    retry = DeadlineRetry(total=5, backoff_factor=4, deadline=lambda: deadline)
+    error = ConnectionResetError()
+
+    # The first retry has no backoff, the second would sleep 8s.
+    retry = retry.increment("POST", "/chat", error=error)
+    assert retry.deadline is not None
+
+    with pytest.raises(MaxRetryError):
+        retry.increment("POST", "/chat", error=error)
+
+
+def test_retry_needs_room_for_a_full_attempt(clock):
+    deadline = Deadline(40.0, clock=clock)
+    retry = DeadlineRetry(total=5, deadline=lambda: deadline, attempt_timeout=30.0)
+    retry = retry.new()
+    clock.now += 5
+
+    retry = retry.increment("POST", "/chat", error=ConnectionResetError())
+    assert retry.attempt_timeout == 30.0
+
+    clock.now += 10
+    with pytest.raises(MaxRetryError):
+        retry.increment("POST", "/chat", error=ConnectionResetError())
+
+
+def test_retry_without_deadline_behaves_like_retry():
+    retry = DeadlineRetry(total=1, backoff_factor=100)
+    retry = retry.increment("POST", "/chat", error=ConnectionResetError())
+
+    with pytest.raises(MaxRetryError):
+        retry.increment("POST", "/chat", error=ConnectionResetError())
+
+
+def test_adapter_caps_request_timeout(adapter):
+    adapter.deadline = Deadline(12.0)
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": "fix: y"}}]}
+    adapter.session.post.return_value = ok
+
+    assert adapter.generate_commit_message("+diff") == "fix: y"
+    assert adapter.session.post.call_args.kwargs["timeout"] <= 12.0
+    adapter.rate_limiter.acquire.assert_called_once_with(deadline=adapter.deadline)
+
+
+def test_adapter_skips_fallback_when_budget_is_spent(adapter, clock):
+    adapter.deadline = Deadline(10.0, clock=clock)
+
+    def slow_timeout(*args, **kwargs):
+        clock.now += 9
+        raise requests.ReadTimeout()
+
+    adapter.session.post.side_effect = slow_timeout
+
+    with pytest.raises(DeadlineExceededError):
+        adapter.generate_commit_message("+diff")
+
+    assert adapter.session.post.call_count == 1
+    adapter._breakers["primary:free"].record_failure.assert_not_called()
+
+
+def test_uncapped_timeout_still_opens_the_circuit(adapter):
+    adapter.deadline = Deadline(None)
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": "fix: y"}}]}
+    adapter.session.post.side_effect = [requests.ReadTimeout(), ok]
+
+    assert adapter.generate_commit_message("+diff") == "fix: y"
+    assert adapter._breakers["primary:free"].record_failure.call_count == 1
+
+
+def test_rate_limit_wait_respects_deadline(state_file, clock):
+    limiter = RateLimiter(state_file, clock=clock, sleep=clock.sleep)
+    limiter.record_throttle(retry_after=20.0)
+
+    with pytest.raises(DeadlineExceededError):
+        limiter.acquire(deadline=Deadline(10.0, clock=clock))
+    assert limiter.acquire(deadline=Deadline(30.0, clock=clock)) == 20.0
+
+
+def test_generator_falls_back_when_deadline_expires(monkeypatch):
+    adapter = MagicMock()
+    adapter.generate_commit_message.side_effect = DeadlineExceededError("budget")
+    monkeypatch.setattr(
+        generator.ModelFactory, "create_adapter", lambda config: adapter
+    )
+    config = MagicMock()
+    config.load_config.return_value = MagicMock()
+    config.load_model_config.return_value = ModelConfig(
+        name="m",
+        provider="openrouter",
+        api_base="https://openrouter.ai/api/v1",
+        model_id="m:free",
+        is_free=True,
+        context_length=4096,
+    )
+    args = MagicMock(detailed=False, instruction=None, template="{{diff}}", timeout=5.0)
+    diff = (
+        "diff --git a/docs/usage.md b/docs/usage.md\n"
+        "--- a/docs/usage.md\n"
+        "+++ b/docs/usage.md\n"
+        "@@ -1 +1 @@\n"
+        "-old\n"
+        "+new\n"
+    )
+
+    assert generator.generate_commit_message(args, config, diff) == (
+        "docs: update usage.md"
+    )
+    assert adapter.deadline.budget == 5.0
+
+
+def test_adapter_reports_the_fallback_that_answered(adapter):
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": "fix: y"}}]}
+    adapter.session.post.side_effect = [requests.ConnectionError(), ok]
+
+    assert adapter.generate_commit_message("+diff") == "fix: y"
+    assert adapter.last_model_id == "fallback:free"
+
+
+def test_latency_covers_only_the_http_attempt(adapter, clock, monkeypatch):
+    monkeypatch.setattr("core.adapters.time.monotonic", clock)
+    adapter.rate_limiter.acquire.side_effect = lambda **kwargs: clock.sleep(10)
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": "fix: y"}}]}
+
+    def post(*args, **kwargs):
+        clock.sleep(1.5)
+        return ok
+
+    adapter.session.post.side_effect = post
+
+    adapter.generate_commit_message("+diff")
+
+    record = adapter.telemetry.record_request
+    assert record.call_args.kwargs["latency"] == 1.5
+
+
+def test_auth_failures_are_not_charged_to_the_model(adapter):
+    denied = MagicMock(status_code=401)
+    denied.raise_for_status.side_effect = requests.HTTPError(response=denied)
+    adapter.session.post.return_value = denied
+
+    with pytest.raises(ProviderAPIError):
+        adapter.generate_commit_message("+diff")
+
+    adapter.telemetry.record_request.assert_not_called()
@@ -0,0 +1,75 @@
+import core.generator as generator
+from core.dedup import deduplicate_hunks, hunk_fingerprint
+from core.diff import DiffBuffer, parse_diff
+
+
+def file_diff(path, removed, added, context="    value = compute()"):
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        "index 1111111..2222222 100644\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        "@@ -1,2 +1,2 @@\n"
+        f"{context}\n"
+        f"-{removed}\n"
+        f"+{added}\n"
+    )
+
+
+def codemod_diff(count):
+    return "".join(
+        file_diff(
+            f"pkg/module{i}.py",
+            f"    log.warn(value{i},  'msg')",
+            f"    log.warning(value{i}, 'msg')",
+        )
+        for i in range(count)
+    )
+
+
+def test_fingerprint_ignores_shared_identifiers_and_whitespace():
+    first, second, other = (
+        parse_diff(file_diff(path, removed, added))[0].hunks[0]
+        for path, removed, added in (
+            ("a.py", "log.warn(a)", "log.warning(a)"),
+            ("b.py", "  log.warn(b,   c)", "log.warning(b, c)"),
+            ("c.py", "log.warn(a)", "log.error(a)"),
+        )
+    )
+
+    assert hunk_fingerprint(first) == hunk_fingerprint(second)
+    assert hunk_fingerprint(first) != hunk_fingerprint(other)
+
+
+def test_repeated_hunks_collapse_to_one_with_note():
+    files = parse_diff(codemod_diff(4) + file_diff("README.md", "old", "new"))
+
+    kept, collapsed = deduplicate_hunks(files)
+
+    assert collapsed == 3
+    assert [f.path for f in kept] == ["pkg/module0.py", "README.md"]
+    assert kept[0].hunks[0].lines[-1] == (
+        "[same change applied in 4 hunks across 4 files: pkg/module0.py, "
+        "pkg/module1.py, pkg/module2.py, pkg/module3.py]"
+    )
+    assert "[same change" not in "\n".join(files[0].hunks[0].lines)
+
+
+def test_below_threshold_is_left_alone():
+    files = parse_diff(codemod_diff(2))
+
+    kept, collapsed = deduplicate_hunks(files)
+
+    assert collapsed == 0
+    assert kept == files
+
+
+def test_buffer_path_collapses_codemods():
+    buffer = DiffBuffer(codemod_diff(300).encode())
+
+    prompt, files = generator._prepare_buffer(buffer)
+
+    assert len(files) == 300
+    assert prompt.count("diff --git") == 1
+    assert "applied in 300 hunks across 300 files" in prompt
+    assert "and 295 more]" in prompt
@@ -0,0 +1,157 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import core.generator as generator
+from core.constants import MAX_DIFF_LENGTH
+from core.diff import DiffBuffer, compact_renames, parse_diff, parse_name_status
+from core.exceptions import MissingAPIKeyError
+from core.models import ModelConfig
+from tests.test_dedup import codemod_diff
+
+PURE_RENAME = """diff --git a/core/old.py b/core/cli/old.py
+similarity index 100%
+rename from core/old.py
+rename to core/cli/old.py
+"""
+
+NEAR_RENAME = """diff --git a/core/utils.py b/core/helpers.py
+similarity index 94%
+rename from core/utils.py
+rename to core/helpers.py
+index 1111111..2222222 100644
+--- a/core/utils.py
++++ b/core/helpers.py
+@@ -1,2 +1,2 @@
+-import re
++import os
+ import json
+"""
+
+MODIFIED = """diff --git a/README.md b/README.md
+index 1111111..2222222 100644
+--- a/README.md
++++ b/README.md
+@@ -1,2 +1,2 @@
+-# gitk
++# GitK
+ A commit message generator.
+"""
+
+
+def test_compact_renames_collapses_to_single_lines():
+    files = parse_diff(PURE_RENAME + NEAR_RENAME + MODIFIED)
+
+    compacted = compact_renames(files)
+
+    assert compacted.startswith(
+        "Renamed or copied files:\n"
+        "rename core/old.py -> core/cli/old.py\n"
+        "rename core/utils.py -> core/helpers.py (94% similar, +1/-1)\n\n"
+    )
+    assert "similarity index" not in compacted
+    assert compacted.endswith(MODIFIED.rstrip("\n"))
+
+
+def test_low_similarity_rename_keeps_hunks():
+    files = parse_diff(NEAR_RENAME.replace("94%", "60%"))
+
+    assert not files[0].is_near_rename()
+    assert compact_renames(files) == NEAR_RENAME.replace("94%", "60%").rstrip("\n")
+
+
+def test_parse_name_status_tracks_rename_sources():
+    output = "M\tREADME.md\nR097\tcore/a.py\tcore/b.py\nC100\tcore/c.py\tcore/d.py\n"
+
+    assert parse_name_status(output) == [
+        ("README.md", None),
+        ("core/b.py", "core/a.py"),
+        ("core/d.py", None),
+    ]
+
+
+def test_diff_buffer_locates_file_sections_without_decoding():
+    raw = ("\n" + PURE_RENAME + MODIFIED + "\n\n").encode()
+    buffer = DiffBuffer(raw)
+
+    spans = list(buffer.file_spans())
+
+    assert len(buffer) == len((PURE_RENAME + MODIFIED).rstrip())
+    assert [buffer.decode(*span).split("\n", 1)[0] for span in spans] == [
+        "diff --git a/core/old.py b/core/cli/old.py",
+        "diff --git a/README.md b/README.md",
+    ]
+    assert [f.path for f, _ in buffer.iter_files()] == ["core/cli/old.py", "README.md"]
+
+
+def test_diff_buffer_head_cuts_at_line_boundary():
+    buffer = DiffBuffer(MODIFIED.encode())
+
+    head = buffer.head(0, len(buffer), 40)
+
+    assert head == "diff --git a/README.md b/README.md"
+    assert buffer.head(0, len(buffer), 20) == ""
+    assert not DiffBuffer(b" \n\t")
+
+
+def large_diff(with_rename=False, text="x"):
+    sections = [
+        MODIFIED.replace("README.md", f"docs/page{i}.md").replace(
+            "# GitK", f"# GitK page{i} " + text * 200
+        )
+        for i in range(40)
+    ]
+    return "".join([NEAR_RENAME, *sections] if with_rename else sections)
+
+
+@pytest.mark.parametrize(
+    "diff",
+    [
+        large_diff(),
+        large_diff(with_rename=True),
+        large_diff(text="é"),
+        codemod_diff(300),
+    ],
+    ids=["plain", "rename", "non-ascii", "codemod"],
+)
+def test_buffer_path_matches_text_path(diff):
+    buffer = DiffBuffer(diff.encode())
+
+    prompt, files = generator._prepare_buffer(buffer)
+    expected, expected_files = generator._prepare_text(buffer.text())
+
+    assert len(buffer) > MAX_DIFF_LENGTH
+    assert prompt == expected
+    assert len(prompt) <= MAX_DIFF_LENGTH
+    assert [f.path for f in files] == [f.path for f in expected_files]
+    assert all(not f.hunks for f in files)
+
+
+def test_buffer_fallback_sees_every_file(monkeypatch):
+    sections = [
+        MODIFIED.replace("README.md", f"docs/page{i}.md").replace(
+            "# GitK", f"# GitK page{i} " + "x" * 200
+        )
+        for i in range(80)
+    ]
+    buffer = DiffBuffer("".join(sections).encode())
+    config = MagicMock()
+    config.load_model_config.return_value = ModelConfig(
+        name="m",
+        provider="openrouter",
+        api_base="https://api.example.com",
+        model_id="m:free",
+        is_free=True,
+        context_length=8192,
+    )
+    monkeypatch.setattr(
+        generator.ModelFactory,
+        "create_adapter",
+        MagicMock(side_effect=MissingAPIKeyError("no key")),
+    )
+    args = MagicMock(detailed=True, instruction=None, template="{{diff}}", timeout=None)
+
+    message = generator.generate_commit_message(args, config, buffer)
+
+    assert len(buffer) > MAX_DIFF_LENGTH
+    assert "docs/page79.md" in message
@@ -3,22 +3,26 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 import core.generator as generator
+from core.exceptions import MissingAPIKeyError
 from core.models import Config, ModelConfig
+from core.templates import compile_template
 
 
 @pytest.fixture
 def dummy_args():
     return MagicMock(
-        detailed=False, instruction=None, template=None, template_file=None
+        detailed=False,
+        instruction=None,
+        template=None,
+        template_file=None,
+        timeout=None,
     )
 
 
 @patch("core.generator.clean_diff", side_effect=lambda x: x)
 @patch("core.generator.clean_message", side_effect=lambda x: x)
 @patch("core.generator.ModelFactory.create_adapter")
-@patch("core.generator.Template")
 def test_generate_commit_message_success(
-    mock_template,
     mock_adapter_factory,
     mock_clean_message,
     mock_clean_diff,
@@ -43,9 +47,8 @@ def test_generate_commit_message_success(
     mock_config.load_config.return_value = Config(**config_data)
     mock_config.load_model_config.return_value = config_data["model_config_data"]
 
-    template_instance_mock = MagicMock()
-    template_instance_mock.get_content.return_value = "Commit template content"
-    mock_template.from_file.return_value = template_instance_mock
+    compiled_template = compile_template("{{diff}}")
+    mock_config.templates_dir.compiled.return_value = compiled_template
 
     adapter_mock = MagicMock()
     adapter_mock.generate_commit_message.return_value = "Generated commit message"
@@ -56,13 +59,82 @@ def test_generate_commit_message_success(
     result = generator.generate_commit_message(dummy_args, mock_config, diff_input)
 
     mock_clean_diff.assert_called_once_with(diff_input)
-    mock_template.from_file.assert_called_once_with("./templates/template.tpl")
-    template_instance_mock.get_content.assert_called_once()
+    mock_config.templates_dir.compiled.assert_called_once_with(
+        "./templates/template.tpl"
+    )
     adapter_mock.generate_commit_message.assert_called_once_with(
         diff=diff_input,
         detailed=dummy_args.detailed,
-        commit_template="Commit template content",
+        commit_template=compiled_template,
         instruction=dummy_args.instruction,
     )
     mock_clean_message.assert_called_once_with("Generated commit message")
     assert result == "Generated commit message"
+
+
+@patch("core.generator.ModelFactory.create_adapter")
+def test_generate_commit_message_falls_back_to_heuristic(
+    mock_adapter_factory, dummy_args
+):
+    mock_config = MagicMock()
+    mock_config.load_config.return_value = MagicMock()
+    mock_config.load_model_config.return_value = ModelConfig(
+        name="test-model",
+        provider="openrouter",
+        api_base="https://api.example.com",
+        model_id="test-id",
+        is_free=False,
+        context_length=2048,
+    )
+    mock_config.templates_dir.compiled.return_value = compile_template("{{diff}}")
+    mock_adapter_factory.side_effect = MissingAPIKeyError("no key")
+
+    diff_input = (
+        "diff --git a/docs/usage.md b/docs/usage.md\n"
+        "--- a/docs/usage.md\n"
+        "+++ b/docs/usage.md\n"
+        "@@ -1 +1 @@\n"
+        "-old\n"
+        "+new\n"
+    )
+
+    result = generator.generate_commit_message(dummy_args, mock_config, diff_input)
+
+    assert result == "docs: update usage.md"
+
+
+@patch("core.generator.ModelFactory.create_adapter")
+def test_on_model_reports_the_model_that_answered(mock_adapter_factory, dummy_args):
+    mock_config = MagicMock()
+    mock_config.load_model_config.return_value = ModelConfig(
+        name="test-model",
+        provider="openrouter",
+        api_base="https://api.example.com",
+        model_id="primary:free",
+        is_free=True,
+        context_length=2048,
+    )
+    mock_config.templates_dir.compiled.return_value = compile_template("{{diff}}")
+    adapter = mock_adapter_factory.return_value
+    adapter.generate_commit_message.return_value = "feat: x"
+    adapter.last_model_id = "fallback:free"
+    cache = MagicMock()
+    cache.get.return_value = None
+    produced = []
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n-x\n+y\n"
+
+    generator.generate_commit_message(
+        dummy_args, mock_config, diff, cache=cache, on_model=produced.append
+    )
+    cache.get.return_value = "feat: cached"
+    generator.generate_commit_message(
+        dummy_args, mock_config, diff, cache=cache, on_model=produced.append
+    )
+    mock_adapter_factory.side_effect = MissingAPIKeyError("no key")
+    generator.generate_commit_message(
+        dummy_args, mock_config, diff, on_model=produced.append
+    )
+
+    assert [(m.provider, m.model_id) for m in produced] == [
+        ("openrouter", "fallback:free")
+    ]
@@ -0,0 +1,109 @@
+import subprocess
+
+from core.diff import parse_diff
+from core.grouping import (
+    co_change_ratios,
+    estimate_similarity,
+    group_files,
+    minhash_signature,
+)
+from core.runner import SafeGitRunner
+
+
+def file_diff(path, *lines):
+    body = "\n".join(lines)
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        "index 1111111..2222222 100644\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        f"@@ -1,{len(lines)} +1,{len(lines)} @@\n"
+        f"{body}\n"
+    )
+
+
+def paths_by_group(diff, co_changes=None):
+    return [
+        [f.path for f in g.files] for g in group_files(parse_diff(diff), co_changes)
+    ]
+
+
+def test_module_and_its_test_are_grouped():
+    diff = (
+        file_diff("core/parser.py", "+def parse_header(line):", "+    return line")
+        + file_diff("tests/test_parser.py", "+def test_header():", "+    assert True")
+        + file_diff("docs/usage.md", "+Run gitk commit --group")
+    )
+
+    assert paths_by_group(diff) == [
+        ["core/parser.py", "tests/test_parser.py"],
+        ["docs/usage.md"],
+    ]
+
+
+def test_import_and_shared_symbol_link_files():
+    diff = file_diff(
+        "core/cli/commands.py",
+        " from core.grouping import group_files",
+        "+groups = group_files(files)",
+    ) + file_diff("core/grouping.py", "+def group_files(files):", "+    return []")
+
+    assert paths_by_group(diff) == [["core/cli/commands.py", "core/grouping.py"]]
+
+
+def test_imports_link_only_the_imported_module():
+    def pair(*imports):
+        return file_diff("api/views.py", *imports, "+ROUTES = []") + file_diff(
+            "core/grouping/cluster.py", "+WEIGHTS = {}"
+        )
+
+    assert len(paths_by_group(pair(" import core.grouping"))) == 2
+    assert len(paths_by_group(pair(" from core import grouping"))) == 2
+    assert len(paths_by_group(pair(" import core.grouping.cluster"))) == 1
+    assert len(paths_by_group(pair(" from core.grouping import cluster as c"))) == 1
+
+
+def test_repetitive_hunks_are_grouped_by_minhash():
+    change = ("-logger.warn(message_text)", "+logger.warning(message_text)")
+    diff = file_diff("api/views.py", *change) + file_diff("worker/jobs.py", *change)
+
+    assert paths_by_group(diff) == [["api/views.py", "worker/jobs.py"]]
+
+
+def test_co_change_history_links_files():
+    diff = file_diff("api/routes.py", "+ROUTES = []") + file_diff(
+        "web/client.js", "+const routes = [];"
+    )
+
+    assert len(paths_by_group(diff)) == 2
+    ratios = {frozenset(("api/routes.py", "web/client.js")): 1.0}
+    assert len(paths_by_group(diff, ratios)) == 1
+
+
+def test_minhash_estimates_jaccard():
+    left = minhash_signature({"alpha", "beta", "gamma", "delta"})
+
+    assert estimate_similarity(left, left) == 1.0
+    assert estimate_similarity(left, minhash_signature({"x", "y", "z"})) < 0.5
+    assert estimate_similarity(left, ()) == 0.0
+
+
+def test_co_change_ratios_from_history(tmp_path):
+    def git(*args):
+        subprocess.run(  # noqa: S603
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+
+    git("init", "-q")
+    for version in range(2):
+        (tmp_path / "a.py").write_text(f"a = {version}\n")
+        (tmp_path / "b.py").write_text(f"b = {version}\n")
+        git("add", "a.py", "b.py")
+        git("commit", "-q", "-m", f"change {version}")
+
+    ratios = co_change_ratios(SafeGitRunner(), ["a.py", "b.py"], cwd=tmp_path)
+
+    assert ratios == {frozenset(("a.py", "b.py")): 1.0}
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from core.adapters import HeuristicAdapter, ModelFactory
+from core.diff import parse_diff
+from core.heuristic import classify_path, generate_heuristic_message
+from core.models import ModelConfig
+
+ADDED_FUNCTION_DIFF = """diff --git a/core/utils.py b/core/utils.py
+index 83db48f..f7353d7 100644
+--- a/core/utils.py
++++ b/core/utils.py
+@@ -10,3 +10,7 @@ def clean_diff(diff: str) -> str:
+     return diff
++
++
++def clean_whitespace(text: str) -> str:
++    return text.strip()
+"""
+
+RENAME_DIFF = """diff --git a/core/old.py b/core/cli/old.py
+similarity index 100%
+rename from core/old.py
+rename to core/cli/old.py
+"""
+
+NEW_FILE_DIFF = """diff --git a/tests/test_utils.py b/tests/test_utils.py
+new file mode 100644
+index 0000000..e69de29
+--- /dev/null
++++ b/tests/test_utils.py
+@@ -0,0 +1,2 @@
++def test_clean():
++    assert True
+"""
+
+
+def make_config(provider="heuristic"):
+    return ModelConfig(
+        name="offline",
+        provider=provider,
+        api_base="",
+        model_id="heuristic",
+        is_free=True,
+        context_length=0,
+    )
+
+
+def test_parse_diff_collects_structure():
+    files = parse_diff(ADDED_FUNCTION_DIFF + RENAME_DIFF + NEW_FILE_DIFF)
+
+    assert [f.path for f in files] == [
+        "core/utils.py",
+        "core/cli/old.py",
+        "tests/test_utils.py",
+    ]
+    assert files[0].additions == 4 and files[0].deletions == 0
+    assert files[0].added_symbols() == ["clean_whitespace"]
+    assert files[0].touched_symbols() == ["clean_diff"]
+    assert files[1].status == "renamed"
+    assert files[1].old_path == "core/old.py"
+    assert files[1].similarity == 100
+    assert files[2].status == "added"
+
+
+@pytest.mark.parametrize(
+    "path,kind",
+    [
+        ("tests/test_utils.py", "test"),
+        ("src/app.spec.ts", "test"),
+        ("README.md", "docs"),
+        ("docs/guide.rst", "docs"),
+        (".github/workflows/tests.yaml", "chore"),
+        ("pyproject.toml", "chore"),
+        ("core/utils.py", "code"),
+    ],
+)
+def test_classify_path(path, kind):
+    assert classify_path(path) == kind
+
+
+@pytest.mark.parametrize(
+    "diff,expected",
+    [
+        (ADDED_FUNCTION_DIFF, "feat: add clean_whitespace to utils.py"),
+        (RENAME_DIFF, "refactor: move old.py to core/cli"),
+        (NEW_FILE_DIFF, "test: add test_utils.py"),
+    ],
+)
+def test_heuristic_titles(diff, expected):
+    assert generate_heuristic_message(parse_diff(diff), detailed=False) == expected
+
+
+def test_heuristic_detailed_body_and_title_length():
+    message = generate_heuristic_message(
+        parse_diff(ADDED_FUNCTION_DIFF + NEW_FILE_DIFF), detailed=True
+    )
+    title, _, body = message.partition("\n\n")
+
+    assert len(title) <= 50
+    assert "- core/utils.py: modified (+4/-0), adds clean_whitespace" in body
+    assert "- tests/test_utils.py: added" in body
+
+
+def test_heuristic_adapter_needs_no_api_key(monkeypatch):
+    monkeypatch.delenv("GITK_HEURISTIC_API_KEY", raising=False)
+
+    adapter = ModelFactory.create_adapter(make_config())
+
+    assert isinstance(adapter, HeuristicAdapter)
+    assert "GITK_HEURISTIC_API_KEY" not in os.environ
+    assert adapter.generate_commit_message(RENAME_DIFF).startswith("refactor:")
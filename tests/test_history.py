@@ -0,0 +1,74 @@
+import subprocess
+
+import pytest
+
+from core.config.files import JsonLinesFile
+from core.history import HistoryIndex
+from core.indexing import IndexStore
+from core.runner import SafeGitRunner
+
+
+def git(repo, *args):
+    subprocess.run(  # noqa: S603
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def commit_file(repo, path, message):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(message)
+    git(repo, "add", path)
+    git(repo, "commit", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    git(root, "init", "-q")
+    commit_file(root, "core/cli/commands.py", "feat(cli): add index command")
+    commit_file(root, "core/cli/cli.py", "fix(cli): handle cancelled prompt GITK-12")
+    commit_file(root, "docs/usage.md", "docs: describe index command")
+    return root
+
+
+@pytest.fixture
+def history(repo, tmp_path):
+    return HistoryIndex(IndexStore(repo, log=JsonLinesFile(tmp_path / "history.jsonl")))
+
+
+def test_refresh_is_incremental(repo, history):
+    runner = SafeGitRunner()
+
+    assert history.refresh(runner) == 3
+    assert history.refresh(runner) == 0
+
+    commit_file(repo, "core/cli/args_parser.py", "refactor(cli): simplify parser")
+    assert history.refresh(runner) == 1
+    assert history.total == 4
+    assert history.data["scopes"] == {"cli": 3}
+
+
+def test_conventions_for_staged_paths(history):
+    history.refresh(SafeGitRunner())
+
+    conventions = history.conventions(["core/cli/new_module.py"])
+
+    assert "- Preferred scope for these paths: cli" in conventions
+    assert "- Reference tickets like GITK-123" in conventions
+    assert "fix(cli): handle cancelled prompt GITK-12" in conventions
+
+
+def test_refresh_rebuilds_after_history_rewrite(repo, history):
+    runner = SafeGitRunner()
+    history.refresh(runner)
+
+    git(repo, "reset", "--hard", "-q", "HEAD~1")
+    commit_file(repo, "core/utils.py", "perf(utils): faster diff cleanup")
+
+    assert history.refresh(runner) == 3
+    assert history.data["types"] == {"feat": 1, "fix": 1, "perf": 1}
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from core.config.files import JsonLinesFile
+from core.indexing import IncrementalIndex, IndexStore, find_repository_root
+from core.runner import SafeGitRunner
+from tests.test_history import commit_file, git
+
+
+class CommitCountIndex(IncrementalIndex):
+    name = "count"
+
+    def __init__(self):
+        self.ranges = []
+
+    def empty_state(self):
+        return {"commits": 0}
+
+    def scan(self, runner, revision_range, root):
+        self.ranges.append(revision_range)
+        result = runner.run(
+            ["rev-list", "--count", revision_range],
+            capture_output=True,
+            text=True,
+            cwd=root,
+        )
+        return {"commits": int(result.stdout.strip())}
+
+    def merge(self, state, delta):
+        state["commits"] += delta["commits"]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    git(root, "init", "-q")
+    commit_file(root, "a.txt", "first")
+    commit_file(root, "b.txt", "second")
+    return root
+
+
+@pytest.fixture
+def store(repo, tmp_path):
+    return IndexStore(repo, log=JsonLinesFile(tmp_path / "index.jsonl"))
+
+
+def test_refresh_scans_only_new_commits(repo, store):
+    index = CommitCountIndex()
+    runner = SafeGitRunner()
+
+    assert store.refresh(index, runner).state == {"commits": 2}
+    unchanged = store.refresh(index, runner)
+    assert unchanged.delta is None
+
+    commit_file(repo, "c.txt", "third")
+    snapshot = store.refresh(index, runner)
+
+    assert snapshot.state == {"commits": 3}
+    assert snapshot.delta == {"commits": 1}
+    assert len(index.ranges) == 2
+    assert index.ranges[1].endswith(f"..{snapshot.head}")
+    assert store.load(index).state == {"commits": 3}
+
+
+def test_refresh_resets_on_non_ancestor_head(repo, store):
+    index = CommitCountIndex()
+    runner = SafeGitRunner()
+    store.refresh(index, runner)
+
+    git(repo, "reset", "--hard", "-q", "HEAD~1")
+    commit_file(repo, "c.txt", "rewritten")
+
+    snapshot = store.refresh(index, runner)
+    assert snapshot.state == {"commits": 2}
+    assert ".." not in index.ranges[-1]
+
+
+def test_store_compacts_and_keeps_other_indexes(repo, store, monkeypatch):
+    monkeypatch.setattr(IndexStore, "COMPACT_AFTER", 3)
+    store.log.append({"index": "other", "head": "abc", "delta": {"x": 1}})
+    index = CommitCountIndex()
+    runner = SafeGitRunner()
+
+    for name in ("c.txt", "d.txt", "e.txt"):
+        store.refresh(index, runner)
+        commit_file(repo, name, name)
+    store.refresh(index, runner)
+
+    records = [
+        json.loads(line) for line in store.log.file_path.read_text().splitlines()
+    ]
+    assert records[0] == {"index": "other", "head": "abc", "delta": {"x": 1}}
+    assert any("snapshot" in record for record in records)
+    assert store.load(index).state == {"commits": 5}
+
+
+def test_store_ignores_torn_trailing_line(repo, store):
+    index = CommitCountIndex()
+    store.refresh(index, SafeGitRunner())
+    with open(store.log.file_path, "a", encoding="utf-8") as f:
+        f.write('{"index": "count", "he')
+
+    assert store.load(index).state == {"commits": 2}
+
+
+def test_append_after_torn_line_keeps_the_record(tmp_path):
+    log = JsonLinesFile(tmp_path / "index.jsonl")
+    log.append({"n": 1})
+    with open(log.file_path, "a", encoding="utf-8") as f:
+        f.write('{"n": 2, "he')
+
+    log.append({"n": 3})
+
+    assert log.read() == [{"n": 1}, {"n": 3}]
+
+
+def test_find_repository_root(repo):
+    nested = repo / "nested" / "dir"
+    nested.mkdir(parents=True)
+    assert find_repository_root(nested) == repo
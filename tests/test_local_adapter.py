@@ -0,0 +1,87 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from core.adapters import LocalAdapter, ModelFactory
+from core.exceptions import ProviderUnavailableError
+from core.models import LocalRawModel, ModelConfig
+
+
+def make_config(**kwargs):
+    return ModelConfig(
+        name="qwen2.5-coder",
+        provider="local",
+        api_base="http://localhost:8080/v1",
+        model_id="qwen2.5-coder",
+        is_free=True,
+        context_length=8192,
+        **kwargs,
+    )
+
+
+def sse_response(chunks, content_type="text/event-stream"):
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]})
+        for chunk in chunks
+    ]
+    lines.append("data: [DONE]")
+
+    response = MagicMock()
+    response.headers = {"Content-Type": content_type}
+    response.iter_lines.return_value = iter(lines)
+    response.__enter__.return_value = response
+    return response
+
+
+def test_factory_creates_local_adapter_without_key(monkeypatch):
+    monkeypatch.delenv("GITK_LOCAL_API_KEY", raising=False)
+
+    adapter = ModelFactory.create_adapter(make_config())
+
+    assert isinstance(adapter, LocalAdapter)
+    assert "Authorization" not in adapter.headers
+
+
+def test_local_adapter_streams_chunks():
+    adapter = LocalAdapter(make_config(num_threads=8, keep_alive="30m"))
+    adapter.session = MagicMock()
+    adapter.session.post.return_value = sse_response(["feat: ", "add ", "login"])
+
+    chunks = list(adapter.stream_commit_message("+diff"))
+
+    assert chunks == ["feat: ", "add ", "login"]
+    payload = adapter.session.post.call_args.kwargs["json"]
+    assert payload["stream"] is True
+    assert payload["keep_alive"] == "30m"
+    assert payload["options"] == {"num_thread": 8}
+
+
+def test_local_adapter_joins_stream_into_message():
+    adapter = LocalAdapter(make_config())
+    adapter.session = MagicMock()
+    adapter.session.post.return_value = sse_response([" fix: ", "typo "])
+
+    assert adapter.generate_commit_message("+diff") == "fix: typo"
+
+
+def test_local_adapter_unreachable_server():
+    adapter = LocalAdapter(make_config())
+    adapter.session = MagicMock()
+    adapter.session.post.side_effect = requests.ConnectionError()
+
+    with pytest.raises(ProviderUnavailableError, match="unreachable"):
+        adapter.generate_commit_message("+diff")
+
+
+def test_local_raw_model_to_config():
+    raw = LocalRawModel.from_dict(
+        {"id": "models/llama-3-8b.gguf", "owned_by": "llamacpp", "meta": {}}
+    )
+    config = raw.to_model_config()
+
+    assert config.provider == "local"
+    assert config.model_id == "models/llama-3-8b.gguf"
+    assert config.name == "llama-3-8b.gguf"
+    assert config.is_free
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from core.exceptions import APIError
+from core.logger import GitkLogger
+
+
+@pytest.fixture
+def gitk_logger(tmp_path):
+    gitk_logger = GitkLogger(name="gitk-test", log_file=tmp_path / "logs" / "gitk.log")
+    yield gitk_logger
+    gitk_logger.flush()
+    gitk_logger.logger.removeHandler(gitk_logger.queue_handler)
+    gitk_logger.file_handler.close()
+
+
+def test_logger_without_records_touches_nothing(gitk_logger, tmp_path):
+    assert not (tmp_path / "logs").exists()
+    assert gitk_logger.file_handler.stream is None
+    assert not gitk_logger.queue_handler._started
+
+
+def test_records_are_written_by_listener(gitk_logger):
+    gitk_logger.logger.info("first")
+    gitk_logger.logger.error("second")
+
+    assert gitk_logger.queue_handler._started
+    gitk_logger.flush()
+
+    lines = gitk_logger.log_file.read_text(encoding="utf-8").splitlines()
+    assert [line.split(" | ")[1:] for line in lines] == [
+        ["INFO", "gitk-test", "first"],
+        ["ERROR", "gitk-test", "second"],
+    ]
+
+
+def test_listener_restarts_after_flush(gitk_logger):
+    gitk_logger.logger.info("before")
+    gitk_logger.flush()
+    gitk_logger.logger.info("after")
+    gitk_logger.flush()
+
+    assert "after" in gitk_logger.log_file.read_text(encoding="utf-8")
+
+
+def test_errors_are_queued_not_written_inline(tmp_path, monkeypatch):
+    gitk_logger = GitkLogger(name="gitk", log_file=tmp_path / "gitk.log")
+    writes = []
+    monkeypatch.setattr(
+        gitk_logger.file_handler,
+        "emit",
+        lambda record: writes.append(threading.current_thread()),
+    )
+
+    try:
+        APIError("upstream failed")
+        gitk_logger.flush()
+    finally:
+        gitk_logger.logger.removeHandler(gitk_logger.queue_handler)
+
+    assert writes
+    assert threading.main_thread() not in writes
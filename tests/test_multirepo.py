@@ -0,0 +1,179 @@
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from core.batch import generate_all
+from core.cli.commands import cli
+from core.multirepo import (
+    collect_staged_changes,
+    discover_repositories,
+    find_superproject,
+    stage_gitlinks,
+)
+from core.runner import SafeGitRunner
+
+
+def git(repo, *args):
+    subprocess.run(  # noqa: S603
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    for name in ("api", "web", "docs"):
+        repo = tmp_path / name
+        repo.mkdir()
+        git(repo, "init", "-q")
+        (repo / "README.md").write_text(f"# {name}\n")
+        git(repo, "add", "README.md")
+        git(repo, "commit", "-q", "-m", "init")
+
+    for name in ("api", "web"):
+        (tmp_path / name / "main.py").write_text("print('hi')\n")
+        git(tmp_path / name, "add", "main.py")
+    return tmp_path
+
+
+def test_discover_repositories_by_glob(workspace):
+    (workspace / "notes").mkdir()
+
+    repos = discover_repositories(SafeGitRunner(), None, patterns=["*"], base=workspace)
+
+    assert [repo.name for repo in repos] == ["api", "docs", "web"]
+
+
+def test_discover_includes_initialized_submodules(tmp_path):
+    runner = MagicMock()
+    runner.run.return_value = subprocess.CompletedProcess(
+        [], 0, stdout="libs/core\nlibs/core/vendor/my lib\n", stderr=""
+    )
+
+    repos = discover_repositories(runner, tmp_path, recursive=True)
+
+    assert repos == [
+        (tmp_path / "libs/core/vendor/my lib").resolve(),
+        (tmp_path / "libs/core").resolve(),
+        tmp_path.resolve(),
+    ]
+
+
+@pytest.fixture
+def superproject(workspace):
+    root = workspace / "api"
+    git(
+        root,
+        "-c",
+        "protocol.file.allow=always",
+        "submodule",
+        "add",
+        "-q",
+        str(workspace / "docs"),
+        "my docs",
+    )
+    git(root, "commit", "-q", "-m", "add docs")
+    submodule = root / "my docs"
+    (submodule / "guide.md").write_text("# guide\n")
+    git(submodule, "add", "guide.md")
+    return root
+
+
+def staged_paths(repo):
+    result = SafeGitRunner().run(
+        ["diff", "--cached", "--name-only"], capture_output=True, text=True, cwd=repo
+    )
+    return result.stdout.splitlines()
+
+
+def test_submodule_commits_are_staged_in_the_superproject(superproject):
+    root = superproject
+    submodule = root / "my docs"
+    runner = SafeGitRunner()
+    repos = discover_repositories(runner, root, recursive=True)
+    assert repos == [submodule.resolve(), root.resolve()]
+
+    git(submodule, "commit", "-q", "-m", "docs: add guide")
+    assert find_superproject(runner, submodule, repos) == root.resolve()
+    assert find_superproject(runner, submodule, repos[:1]) is None
+    stage_gitlinks(runner, root.resolve(), [submodule])
+
+    assert staged_paths(root) == ["my docs"]
+
+
+@pytest.fixture
+def commit_recursive(monkeypatch):
+    for name in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(name, "t")
+    for name in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(name, "t@t")
+
+    def run(root):
+        monkeypatch.chdir(root)
+        with (
+            patch("core.cli.commands.GitkConfig"),
+            patch(
+                "core.cli.commands.generate_commit_message",
+                side_effect=lambda args, config, diff, cwd, **kwargs: (
+                    f"chore: update {cwd.name}"
+                ),
+            ),
+        ):
+            return CliRunner().invoke(cli, ["commit", "--recursive", "--yes"])
+
+    return run
+
+
+def log_subjects(repo):
+    result = SafeGitRunner().run(
+        ["log", "--format=%s"], capture_output=True, text=True, cwd=repo
+    )
+    return result.stdout.splitlines()
+
+
+def test_superproject_without_own_changes_keeps_a_clean_index(
+    superproject, commit_recursive
+):
+    result = commit_recursive(superproject)
+
+    assert result.exit_code == 0, result.output
+    assert log_subjects(superproject / "my docs")[0] == "chore: update my docs"
+    assert log_subjects(superproject)[0] == "add docs"
+    assert staged_paths(superproject) == []
+
+
+def test_superproject_commit_records_the_submodule(superproject, commit_recursive):
+    (superproject / "app.py").write_text("print('app')\n")
+    git(superproject, "add", "app.py")
+
+    result = commit_recursive(superproject)
+
+    assert result.exit_code == 0, result.output
+    assert log_subjects(superproject)[0] == "chore: update api"
+    assert staged_paths(superproject) == []
+    head = SafeGitRunner().run(
+        ["show", "--name-only", "--format=", "HEAD"],
+        capture_output=True,
+        text=True,
+        cwd=superproject,
+    )
+    assert sorted(head.stdout.splitlines()) == ["app.py", "my docs"]
+
+
+def test_collect_and_generate_skip_clean_repositories(workspace):
+    runner = SafeGitRunner()
+    repos = discover_repositories(runner, None, patterns=["*"], base=workspace)
+
+    changes = collect_staged_changes(runner, repos)
+    generate_all(changes, lambda change: f"feat: update {change.cwd.name}")
+
+    assert [change.cwd.name for change in changes] == ["api", "web"]
+    assert all("+print('hi')" in change.diff for change in changes)
+    assert [change.message for change in changes] == [
+        "feat: update api",
+        "feat: update web",
+    ]
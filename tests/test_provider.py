@@ -1,11 +1,15 @@
+import json
+import threading
 from typing import Any, Dict
 from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 
+from core.constants import MODELS_CACHE_MAX_AGE, MODELS_REFRESH_EXIT_WAIT
 from core.exceptions import APIError
-from core.models import ModelConfig, Provider
+from core.jsonstream import iter_json_array
+from core.models import ModelConfig, OpenRouterRawModel, Provider
 from tests.test_cache_file import make_dummy_model
 
 
@@ -23,6 +27,7 @@ def test_provider_uses_cache_file():
 
     mock_cache_file = MagicMock()
     mock_cache_file.load_models.return_value = cached_models
+    mock_cache_file.age.return_value = 0.0
 
     provider = Provider(
         name="test",
@@ -54,7 +59,7 @@ def test_provider_falls_back_to_api_when_cache_empty():
     with patch.object(provider, "_fetch_models_from_api", return_value=api_models):
         models = list(provider.fetch_models())
         assert models == api_models
-        mock_cache_file.save_models.assert_called_once_with(api_models)
+        assert not mock_cache_file.save_models.called
 
 
 def test_provider_api_error_handling():
@@ -82,6 +87,7 @@ def test_filter_fn_works_correctly():
 
     mock_cache_file = MagicMock()
     mock_cache_file.load_models.return_value = models
+    mock_cache_file.age.return_value = 0.0
 
     provider = Provider(
         name="test",
@@ -95,3 +101,197 @@ def test_filter_fn_works_correctly():
 
     assert len(filtered) == 1
     assert filtered[0].model_id == "chat-model"
+
+
+def _catalogue_chunks(models, chunk_size=7):
+    body = json.dumps({"data": models, "meta": {"count": len(models)}}).encode()
+    return [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+
+def test_iter_json_array_handles_objects_split_across_chunks():
+    models = [
+        {"id": "a:free", "name": "Ünïcode", "pricing": {"prompt": "0"}},
+        {"id": "b", "nested": {"list": [1, 2, {"x": "]"}]}},
+    ]
+
+    assert list(iter_json_array(_catalogue_chunks(models, 3), "data")) == models
+
+
+def test_iter_json_array_rejects_truncated_response():
+    chunks = _catalogue_chunks([{"id": "a"}, {"id": "b"}])
+    truncated = b"".join(chunks)[:-25]
+
+    with pytest.raises(ValueError, match="Truncated"):
+        list(iter_json_array([truncated], "data"))
+
+
+def _streaming_provider(models):
+    response = MagicMock()
+    response.status_code = 200
+    response.iter_content.return_value = _catalogue_chunks(models)
+    response.__enter__.return_value = response
+
+    mock_cache_file = MagicMock()
+    mock_cache_file.load_models.return_value = []
+    mock_cache_file.age.return_value = 0.0
+
+    provider = Provider(
+        name="openrouter",
+        api_base="https://api.test.com",
+        api_key="test_key",
+        raw_model_cls=OpenRouterRawModel,
+        cache_file=mock_cache_file,
+    )
+    return provider, response
+
+
+def test_prefilter_skips_records_before_materializing():
+    models = [
+        {"id": "vendor/paid-model", "pricing": {"prompt": "0.001"}},
+        {"id": "vendor/chat:free", "context_length": 32000},
+        {"id": "vendor/broken", "pricing": {"prompt": "not a number"}},
+    ]
+    provider, response = _streaming_provider(models)
+
+    with patch("requests.get", return_value=response) as mock_get:
+        fetched = list(
+            provider.fetch_models(prefilter=OpenRouterRawModel.is_free_candidate)
+        )
+
+    assert [m.model_id for m in fetched] == ["vendor/chat:free"]
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert not provider.cache_file.save_models.called
+
+
+def test_get_top_models_keeps_best_scores_in_stable_order():
+    models = [
+        {"id": f"vendor/model-{i}:free", "context_length": context}
+        for i, context in enumerate([4000, 1000000, 32000, 1000000, 8000])
+    ]
+    models.append({"id": "vendor/huge-paid", "context_length": 2000000})
+    provider, response = _streaming_provider(models)
+
+    with patch("requests.get", return_value=response):
+        top = provider.get_top_models(free_count=3)["free"]
+
+    assert [m.model_id for m in top] == [
+        "vendor/model-1:free",
+        "vendor/model-3:free",
+        "vendor/model-2:free",
+    ]
+
+
+def test_get_top_models_promotes_only_finalists():
+    models = [
+        {"id": f"vendor/chat-{i}:free", "context_length": 1000 * (i + 1)}
+        for i in range(20)
+    ]
+    provider, response = _streaming_provider(models)
+
+    with (
+        patch("requests.get", return_value=response),
+        patch.object(
+            OpenRouterRawModel,
+            "to_model_config",
+            autospec=True,
+            side_effect=OpenRouterRawModel.to_model_config,
+        ) as promote,
+        patch("core.models.MODELS_CACHE_SIZE", 4),
+    ):
+        top = provider.get_top_models(free_count=2)["free"]
+
+    assert [m.model_id for m in top] == ["vendor/chat-19:free", "vendor/chat-18:free"]
+    assert promote.call_count == 4
+    saved = provider.cache_file.save_models.call_args.args[0]
+    assert len(saved) == 4
+    assert saved[:2] == top
+
+
+def test_get_top_models_ranks_cached_models():
+    cached = [
+        make_dummy_model(model_id="small", name="Small Chat"),
+        make_dummy_model(model_id="large", name="Large Chat"),
+    ]
+    cached[1].context_length = 1000000
+    provider, _ = _streaming_provider([])
+    provider.cache_file.load_models.return_value = cached
+
+    with patch("requests.get") as mock_get:
+        top = provider.get_top_models(filter_fn=lambda m: "chat" in m.name.lower())
+
+    assert top["free"] == [cached[1], cached[0]]
+    mock_get.assert_not_called()
+
+
+def test_stale_cache_is_served_while_refreshing_in_background():
+    cached = [make_dummy_model(model_id="stale", name="Stale Chat")]
+    fresh = [{"id": "vendor/fresh-chat:free", "context_length": 8192}]
+    provider, response = _streaming_provider(fresh)
+    provider.cache_file.load_models.return_value = cached
+    provider.cache_file.age.return_value = MODELS_CACHE_MAX_AGE + 1
+
+    released = threading.Event()
+    response.iter_content.side_effect = lambda chunk_size: (
+        chunk for chunk in _catalogue_chunks(fresh) if released.wait(5)
+    )
+
+    with patch("requests.get", return_value=response):
+        top = provider.get_top_models()
+        assert top["free"] == cached
+        assert not provider.cache_file.save_models.called
+
+        released.set()
+        provider.refresh_thread.join(5)
+
+    saved = provider.cache_file.save_models.call_args.args[0]
+    assert [m.model_id for m in saved] == ["vendor/fresh-chat:free"]
+
+
+def test_fresh_cache_is_not_revalidated():
+    provider, _ = _streaming_provider([])
+    provider.cache_file.load_models.return_value = [make_dummy_model()]
+
+    with patch("requests.get") as mock_get:
+        list(provider.fetch_models())
+
+    assert provider.refresh_thread is None
+    mock_get.assert_not_called()
+
+
+def test_failed_background_refresh_keeps_stale_cache():
+    provider, _ = _streaming_provider([])
+    provider.cache_file.load_models.return_value = [make_dummy_model()]
+    provider.cache_file.age.return_value = None
+
+    with patch("requests.get", side_effect=requests.ConnectionError):
+        assert len(provider.get_top_models()["free"]) == 1
+        provider.refresh_thread.join(5)
+
+    assert not provider.cache_file.save_models.called
+
+
+def test_fetch_models_revalidates_with_the_ranked_finalists():
+    catalogue = [{"id": "vendor/paid-model", "pricing": {"prompt": "0.001"}}]
+    catalogue += [
+        {"id": f"vendor/chat-{i}:free", "context_length": 1000 * (i + 1)}
+        for i in range(6)
+    ]
+    provider, response = _streaming_provider(catalogue)
+    provider.cache_file.load_models.return_value = [make_dummy_model()]
+    provider.cache_file.age.return_value = MODELS_CACHE_MAX_AGE + 1
+
+    with (
+        patch("requests.get", return_value=response),
+        patch("core.models.MODELS_CACHE_SIZE", 4),
+        patch("atexit.register") as register,
+    ):
+        list(provider.fetch_models())
+        provider.refresh_thread.join(5)
+
+    saved = provider.cache_file.save_models.call_args.args[0]
+    assert [m.model_id for m in saved] == [
+        f"vendor/chat-{i}:free" for i in range(5, 1, -1)
+    ]
+    register.assert_called_once_with(
+        provider.wait_for_refresh, MODELS_REFRESH_EXIT_WAIT
+    )
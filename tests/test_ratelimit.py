@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.adapters import OpenRouterAdapter
+from core.exceptions import RateLimitError
+from core.models import ModelConfig
+from core.ratelimit import RateLimiter, parse_retry_after
+
+
+def make_limiter(state_file, clock, **kwargs):
+    return RateLimiter(state_file, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_acquire_consumes_burst_then_waits(state_file, clock):
+    limiter = make_limiter(state_file, clock, initial_rate=2.0, burst=2.0)
+
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_state_is_shared_between_limiters(state_file, clock):
+    first = make_limiter(state_file, clock, burst=1.0)
+    second = make_limiter(state_file, clock, burst=1.0)
+
+    first.acquire()
+    assert second.acquire() > 0
+
+
+def test_throttle_halves_rate_and_honours_retry_after(state_file, clock):
+    limiter = make_limiter(state_file, clock, initial_rate=4.0)
+
+    limiter.record_throttle(retry_after=3.0)
+
+    state = state_file.load()
+    assert state["rate"] == pytest.approx(2.0)
+    assert limiter.acquire() == pytest.approx(3.0)
+
+
+def test_success_increases_rate_additively(state_file, clock):
+    limiter = make_limiter(state_file, clock, initial_rate=1.0, increase=0.5)
+
+    limiter.record_success()
+    limiter.record_success()
+
+    assert state_file.load()["rate"] == pytest.approx(2.0)
+
+
+def test_acquire_raises_when_wait_exceeds_budget(state_file, clock):
+    limiter = make_limiter(state_file, clock, max_wait=5.0)
+
+    limiter.record_throttle(retry_after=30.0)
+
+    with pytest.raises(RateLimitError):
+        limiter.acquire()
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(None, None), ("", None), ("7", 7.0), ("-3", 0.0), ("garbage", None)],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_adapter_retries_throttled_request(monkeypatch, tmp_backend):
+    monkeypatch.setenv("GITK_OPENROUTER_API_KEY", "key")
+    config = ModelConfig(
+        name="m",
+        provider="openrouter",
+        api_base="https://openrouter.ai/api/v1",
+        model_id="m:free",
+        is_free=True,
+        context_length=4096,
+    )
+    adapter = OpenRouterAdapter(config)
+    adapter.rate_limiter = MagicMock()
+
+    throttled = MagicMock(status_code=429, headers={"Retry-After": "2"})
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"choices": [{"message": {"content": " feat: x "}}]}
+    adapter.session = MagicMock()
+    adapter.session.post.side_effect = [throttled, ok]
+
+    assert adapter.generate_commit_message("+diff") == "feat: x"
+    adapter.rate_limiter.record_throttle.assert_called_once_with(2.0)
+    adapter.rate_limiter.record_success.assert_called_once()
+    assert adapter.rate_limiter.acquire.call_count == 2
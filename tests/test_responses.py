@@ -0,0 +1,145 @@
+import argparse
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+
+import core.generator as generator
+from core.cli.commands import cli
+from core.config.backends import FileBackend
+from core.constants import MAX_DIFF_LENGTH
+from core.models import Config, ModelConfig
+from core.responses import ResponseCache
+from core.runner import SafeGitRunner
+from core.watcher import PreGenerator
+
+
+@pytest.fixture
+def backend(tmp_path, clock):
+    return FileBackend(tmp_path, clock=clock)
+
+
+def test_cache_round_trip_and_ttl(backend, clock):
+    cache = ResponseCache(backend, "responses", ttl=60)
+    key = ResponseCache.make_key("model", False, "{{diff}}", None, "+diff")
+
+    cache.put(key, "feat: add cache")
+    assert cache.get(key) == "feat: add cache"
+
+    clock.now += 61
+    assert cache.get(key) is None
+
+
+def test_cache_evicts_oldest_entries(backend, clock):
+    cache = ResponseCache(backend, "responses", max_entries=2)
+
+    for name in ("a", "b", "c"):
+        clock.now += 1
+        cache.put(name, f"msg {name}")
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "msg c"
+
+
+def test_key_depends_on_prompt_inputs():
+    base = ResponseCache.make_key("model", False, "{{diff}}", None, "+diff")
+
+    assert base == ResponseCache.make_key("model", False, "{{diff}}", None, "+diff")
+    assert base != ResponseCache.make_key("model", True, "{{diff}}", None, "+diff")
+    assert base != ResponseCache.make_key("other", False, "{{diff}}", None, "+diff")
+    assert base != ResponseCache.make_key("model", False, "{{diff}}", "x", "+diff")
+
+
+@pytest.fixture
+def gitk_config():
+    model_config = ModelConfig(
+        name="test-model",
+        provider="openrouter",
+        api_base="https://api.example.com",
+        model_id="test-id",
+        is_free=False,
+        context_length=2048,
+    )
+    config = MagicMock()
+    config.load_config.return_value = Config(
+        model="test-model",
+        provider="openrouter",
+        model_config_data=model_config,
+        commit_template_path="template.tpl",
+    )
+    config.load_model_config.return_value = model_config
+    config.templates_dir.compiled.return_value = "{{diff}}"
+    return config
+
+
+@patch("core.generator.ModelFactory.create_adapter")
+def test_generator_reuses_cached_message(mock_adapter_factory, backend, gitk_config):
+    config = gitk_config
+    mock_adapter_factory.return_value.generate_commit_message.return_value = (
+        "feat: pre-generated"
+    )
+
+    args = MagicMock(detailed=False, instruction=None, template=None, timeout=None)
+    args.template_file = None
+    cache = ResponseCache(backend, "responses")
+
+    first = generator.generate_commit_message(args, config, "+diff", cache=cache)
+    second = generator.generate_commit_message(args, config, "+diff", cache=cache)
+
+    assert first == second == "feat: pre-generated"
+    mock_adapter_factory.assert_called_once()
+
+
+@patch("core.generator.ModelFactory.create_adapter")
+def test_watch_then_commit_reuses_message_for_large_diff(
+    mock_adapter_factory, backend, gitk_config, tmp_path, monkeypatch
+):
+    def git(*args):
+        return subprocess.run(  # noqa: S603
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+            cwd=repo,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git("init", "-q")
+    lines = "".join(f"value_{i} = compute({i})\n" for i in range(400))
+    (repo / "values.py").write_text(lines)
+    git("add", "values.py")
+    assert len(git("diff", "--cached")) > MAX_DIFF_LENGTH
+    for name in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(name, "t")
+    for name in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(name, "t@t")
+    monkeypatch.chdir(repo)
+
+    cache = ResponseCache(backend, "responses")
+    monkeypatch.setattr(ResponseCache, "for_cwd", lambda cwd=None: cache)
+    monkeypatch.setattr("core.cli.commands.GitkConfig", lambda: gitk_config)
+    adapter = mock_adapter_factory.return_value
+    adapter.generate_commit_message.return_value = "feat: pre-generated"
+    adapter.last_model_id = "test-id"
+    args = argparse.Namespace(
+        detailed=False, instruction=None, template=None, template_file=None
+    )
+    args.timeout = None
+
+    pregenerator = PreGenerator(
+        SafeGitRunner(),
+        repo,
+        lambda diff: generator.generate_commit_message(
+            args, gitk_config, diff, cwd=repo, cache=cache
+        ),
+        limiter=MagicMock(),
+    )
+    assert pregenerator.run_once() == "generated"
+
+    result = CliRunner().invoke(cli, ["commit", "--yes"])
+
+    assert result.exit_code == 0, result.output
+    assert git("log", "-1", "--format=%s").strip() == "feat: pre-generated"
+    mock_adapter_factory.assert_called_once()
@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+import core.generator as generator
+from core.models import ModelConfig, RoutingPolicy
+from core.routing import fit_diff, route_model
+from core.tokens import bytes_per_token, estimate_tokens
+
+SMALL_DIFF = "diff --git a/a.py b/a.py\n@@ -1 +1 @@\n-x = 1\n+x = 2\n"
+LARGE_DIFF = "".join(f"+line {i} = compute(value_{i})\n" for i in range(400))
+
+
+def make_config(**kwargs):
+    data = {
+        "name": "Primary",
+        "provider": "openrouter",
+        "api_base": "https://api.example.com",
+        "model_id": "meta-llama/llama-3-8b-instruct",
+        "is_free": True,
+        "context_length": 8192,
+    }
+    data.update(kwargs)
+    return ModelConfig(**data)
+
+
+def test_estimates_are_calibrated_per_family():
+    text = "def handler(event):\n    return event['body']\n" * 20
+
+    assert bytes_per_token("openai/GPT-4o-mini") == 3.6
+    assert bytes_per_token("unknown/model") == 3.0
+    assert estimate_tokens(text, "openai/gpt-4o") < estimate_tokens(text, "other")
+    assert estimate_tokens("é" * 10) > estimate_tokens("e" * 10)
+
+
+def test_without_policy_the_configured_model_is_kept():
+    config = make_config()
+    route = route_model(config, SMALL_DIFF)
+
+    assert route.model is config
+    assert route.reason == "configured"
+    assert route.prompt_tokens > 0
+    assert route.max_diff_length(SMALL_DIFF) is None
+
+
+def test_small_prompts_go_to_the_fast_model():
+    config = make_config(
+        fallback_model_id="other:free",
+        routing=RoutingPolicy(fast_model_id="google/gemma-2-2b-it"),
+    )
+    route = route_model(config, SMALL_DIFF)
+
+    assert route.reason == "fast"
+    assert route.model.model_id == "google/gemma-2-2b-it"
+    assert route.model.fallback_model_id == config.model_id
+
+
+def test_fast_model_must_fit_its_own_window():
+    policy = RoutingPolicy(fast_model_id="google/gemma-2-2b-it", fast_context_length=64)
+    route = route_model(make_config(routing=policy), SMALL_DIFF)
+
+    assert route.reason == "configured"
+    assert route.model.model_id == "meta-llama/llama-3-8b-instruct"
+
+
+def test_overflowing_prompts_go_to_the_large_model():
+    config = make_config(
+        context_length=1024,
+        routing=RoutingPolicy(
+            fast_model_id="google/gemma-2-2b-it",
+            large_model_id="qwen/qwen-2.5-72b-instruct",
+            large_context_length=131072,
+        ),
+    )
+    route = route_model(config, LARGE_DIFF)
+
+    assert route.reason == "large"
+    assert route.model.model_id == "qwen/qwen-2.5-72b-instruct"
+    assert route.model.context_length == 131072
+    assert route.max_diff_length(LARGE_DIFF) is None
+
+
+def test_overflow_without_large_model_shrinks_the_diff():
+    route = route_model(make_config(context_length=1024), LARGE_DIFF)
+
+    assert route.overflow_tokens > 0
+    assert route.max_diff_length(LARGE_DIFF) < len(LARGE_DIFF)
+
+
+def test_fit_diff_rechecks_until_the_prompt_fits():
+    diff = "".join(f"+value_{i} = 'é'\n" for i in range(3000))
+    config = make_config(model_id="meta-llama/llama-3-8b", context_length=2048)
+    route = route_model(config, diff, template="{{diff}}")
+
+    fitted = fit_diff(route, diff, template="{{diff}}")
+
+    assert route_model(config, fitted, template="{{diff}}").overflow_tokens == 0
+    assert fitted.endswith("[... diff truncated for length ...]")
+
+
+@patch("core.generator.ModelFactory.create_adapter")
+def test_generator_sends_routed_model_a_fitting_prompt(mock_adapter_factory):
+    config = MagicMock()
+    config.load_model_config.return_value = make_config(context_length=1024)
+    mock_adapter_factory.return_value.generate_commit_message.return_value = "feat: x"
+    args = MagicMock(
+        detailed=False, instruction=None, template="{{diff}}", timeout=None
+    )
+
+    with patch("core.generator.MAX_DIFF_LENGTH", 10**6):
+        generator.generate_commit_message(args, config, LARGE_DIFF)
+
+    sent = mock_adapter_factory.return_value.generate_commit_message.call_args
+    routed = route_model(
+        make_config(context_length=1024), sent.kwargs["diff"], template="{{diff}}"
+    )
+    assert routed.overflow_tokens == 0
+    assert sent.kwargs["diff"].endswith("[... diff truncated for length ...]")
@@ -0,0 +1,101 @@
+from core.diff import parse_diff
+from core.symbols import (
+    extract_file_symbols,
+    extract_symbol_changes,
+    format_symbol_summary,
+)
+
+PYTHON_SOURCE = """class Parser:
+    def parse(self, text):
+        value = text.strip()
+        return value.lower()
+
+
+def helper():
+    return 1
+"""
+
+PYTHON_DIFF = """diff --git a/core/parser.py b/core/parser.py
+index 1111111..2222222 100644
+--- a/core/parser.py
++++ b/core/parser.py
+@@ -1,4 +1,4 @@ class Parser:
+ class Parser:
+     def parse(self, text):
+         value = text.strip()
+-        return value
++        return value.lower()
+@@ -5,3 +5,5 @@ class Parser:
+
+
++def helper():
++    return 1
+"""
+
+TOML_DIFF = """diff --git a/pyproject.toml b/pyproject.toml
+index 1111111..2222222 100644
+--- a/pyproject.toml
++++ b/pyproject.toml
+@@ -10,3 +10,3 @@ name = "gitk"
+ [tool.ruff]
+-line-length = 88
++line-length = 100
+ target-version = "py39"
+"""
+
+
+def test_python_symbols_use_qualified_names():
+    (file_diff,) = parse_diff(PYTHON_DIFF)
+
+    symbols = extract_file_symbols(file_diff, PYTHON_SOURCE)
+
+    assert symbols.added == ["helper"]
+    assert symbols.modified == ["Parser.parse"]
+    assert symbols.removed == []
+
+
+def test_symbols_fall_back_to_hunk_context_without_source():
+    (file_diff,) = parse_diff(PYTHON_DIFF)
+
+    symbols = extract_file_symbols(file_diff)
+
+    assert symbols.added == ["helper"]
+    assert "parse" in symbols.modified
+
+
+def test_config_keys_are_reported_with_section():
+    (file_diff,) = parse_diff(TOML_DIFF)
+
+    symbols = extract_file_symbols(file_diff)
+
+    assert symbols.keys == ["tool.ruff.line-length"]
+    assert symbols.modified == []
+
+
+def test_source_loader_only_called_for_python_files():
+    requested = []
+
+    def loader(path):
+        requested.append(path)
+        return PYTHON_SOURCE
+
+    extract_symbol_changes(parse_diff(PYTHON_DIFF + TOML_DIFF), loader)
+
+    assert requested == ["core/parser.py"]
+
+
+def test_format_symbol_summary():
+    changes = extract_symbol_changes(
+        parse_diff(PYTHON_DIFF + TOML_DIFF), lambda _: PYTHON_SOURCE
+    )
+
+    summary = format_symbol_summary(changes)
+
+    assert summary.splitlines() == [
+        "Symbol-level summary of staged changes:",
+        "core/parser.py (modified, +3/-1)",
+        "  + helper",
+        "  ~ Parser.parse",
+        "pyproject.toml (modified, +1/-1)",
+        "  ~ key tool.ruff.line-length",
+    ]
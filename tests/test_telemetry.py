@@ -0,0 +1,144 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from core.adapters import LocalAdapter
+from core.exceptions import ProviderUnavailableError
+from core.models import ModelConfig, Provider
+from core.telemetry import ModelStats, ModelTelemetry
+from tests.test_cache_file import make_dummy_model
+
+
+@pytest.fixture
+def telemetry(state_file, clock):
+    return ModelTelemetry(state_file, clock=clock)
+
+
+def _record(telemetry, model_id, count, **kwargs):
+    for _ in range(count):
+        telemetry.record_request("openrouter", model_id, **kwargs)
+
+
+def test_averages_are_smoothed_and_persisted(telemetry):
+    telemetry.record_request("openrouter", "m", latency=2.0, ttft=0.5)
+    telemetry.record_request("openrouter", "m", latency=7.0, error=True)
+    telemetry.record_request("openrouter", "m", latency=4.0, throttled=True)
+
+    stats = ModelTelemetry(telemetry.state_file).stats("openrouter", "m")
+
+    assert stats.requests == 3
+    assert stats.latency == pytest.approx(2.0 + 0.2 * (4.0 - 2.0))
+    assert stats.ttft == 0.5
+    assert stats.error_rate == pytest.approx(0.2 * 0.8)
+    assert stats.throttle_rate == pytest.approx(0.2)
+
+
+def test_fast_reliable_models_score_higher(telemetry):
+    _record(telemetry, "fast", 5, latency=1.0)
+    _record(telemetry, "slow", 5, latency=12.0)
+    _record(telemetry, "flaky", 5, latency=1.0, error=True)
+
+    scores = {
+        model: telemetry.score_adjustment("openrouter", model)
+        for model in ("fast", "slow", "flaky", "unknown")
+    }
+
+    assert scores["fast"] > scores["unknown"] == 0.0
+    assert scores["slow"] < 0
+    assert scores["flaky"] < scores["slow"]
+
+
+def test_few_samples_have_limited_weight():
+    single = ModelStats(requests=1, latency=1.0, error_rate=0.0)
+    settled = ModelStats(requests=10, latency=1.0, error_rate=0.0)
+
+    assert 0 < single.score() < settled.score()
+
+
+def test_acceptance_rate_moves_score(telemetry):
+    for _ in range(5):
+        telemetry.record_outcome("openrouter", "liked", accepted=True)
+        telemetry.record_outcome("openrouter", "skipped", accepted=False)
+
+    assert telemetry.score_adjustment("openrouter", "liked") > 0
+    assert telemetry.score_adjustment("openrouter", "skipped") < 0
+
+
+def test_store_keeps_most_recently_used_models(telemetry):
+    telemetry.max_models = 2
+    for model_id in ("a", "b", "c"):
+        telemetry._clock.now += 1
+        telemetry.record_request("openrouter", model_id, latency=1.0)
+
+    assert telemetry.stats("openrouter", "a") is None
+    assert telemetry.stats("openrouter", "c") is not None
+
+
+def test_provider_ranking_blends_observed_behaviour(telemetry):
+    provider = Provider(
+        name="openrouter",
+        api_base="https://api.test.com",
+        api_key="",
+        raw_model_cls=MagicMock(),
+        cache_file=MagicMock(),
+        telemetry=telemetry,
+    )
+    fast = make_dummy_model(model_id="fast", name="Fast Chat")
+    slow = make_dummy_model(model_id="slow", name="Slow Chat")
+    _record(telemetry, "fast", 5, latency=1.0)
+    _record(telemetry, "slow", 5, latency=20.0, throttled=True)
+
+    assert provider._shortlist([slow, fast], None, 2) == [fast, slow]
+
+
+def test_local_adapter_records_time_to_first_token(telemetry, monkeypatch):
+    adapter = LocalAdapter(
+        ModelConfig(
+            name="llama",
+            provider="local",
+            api_base="http://localhost:8080/v1",
+            model_id="llama",
+            is_free=True,
+            context_length=8192,
+        )
+    )
+    adapter.telemetry = telemetry
+    ticks = iter([10.0, 10.5, 12.0])
+    monkeypatch.setattr("core.adapters.time.monotonic", lambda: next(ticks))
+
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {"Content-Type": "text/event-stream"}
+    response.iter_lines.return_value = [
+        'data: {"choices": [{"delta": {"content": "feat: "}}]}',
+        'data: {"choices": [{"delta": {"content": "add"}}]}',
+        "data: [DONE]",
+    ]
+    adapter.session.post = MagicMock(return_value=response)
+
+    assert adapter.generate_commit_message("+diff") == "feat: add"
+
+    stats = telemetry.stats("local", "llama")
+    assert stats.ttft == 0.5
+    assert stats.latency == 2.0
+
+
+def test_local_adapter_records_unreachable_server(telemetry):
+    adapter = LocalAdapter(
+        ModelConfig(
+            name="llama",
+            provider="local",
+            api_base="http://localhost:8080/v1",
+            model_id="llama",
+            is_free=True,
+            context_length=8192,
+        )
+    )
+    adapter.telemetry = telemetry
+    adapter.session.post = MagicMock(side_effect=requests.ConnectionError)
+
+    with pytest.raises(ProviderUnavailableError):
+        adapter.generate_commit_message("+diff")
+
+    assert telemetry.stats("local", "llama").error_rate == 1.0
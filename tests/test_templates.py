@@ -1,7 +1,9 @@
+import os
 import tempfile
 from pathlib import Path
 
-from core.templates import Template, TemplateDirectory
+from core.prompt import get_commit_instruction
+from core.templates import CompiledTemplate, Template, TemplateDirectory
 
 
 def test_template_save_and_load():
@@ -27,3 +29,49 @@ def test_template_directory_create_and_get():
 
         loaded = td.get_template("my")
         assert loaded.exists()
+
+
+def test_compiled_template_renders_placeholders():
+    compiled = CompiledTemplate("Summary:\n{{ diff }}\nNote: {{instruction}} {{other}}")
+
+    assert compiled.placeholders == {"diff", "instruction", "other"}
+    assert (
+        compiled.render(diff="+a", instruction="be brief")
+        == "Summary:\n+a\nNote: be brief {{other}}"
+    )
+
+
+def test_template_directory_compiled_cache_tracks_mtime():
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = Path(tempdir) / "cached.tpl"
+        path.write_text("first {{diff}}")
+
+        td = TemplateDirectory()
+        first = td.compiled(path)
+        assert td.compiled(path) is first
+
+        path.write_text("second {{diff}}")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+
+        second = td.compiled(path)
+        assert second is not first
+        assert second.render(diff="x") == "second x"
+
+
+def test_commit_instruction_substitutes_slots():
+    prompt = get_commit_instruction(
+        diff="+line",
+        commit_template="Diff:\n{{diff}}\nHint: {{instruction}}",
+        instruction="mention tests",
+    )
+
+    assert prompt.endswith("Diff:\n+line\nHint: mention tests")
+    assert "User instruction" not in prompt
+
+
+def test_commit_instruction_appends_without_slots():
+    prompt = get_commit_instruction(
+        diff="+line", commit_template="Plain template\n", instruction="short"
+    )
+
+    assert prompt.endswith("Plain template\n+line\n\nUser instruction: short")
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.watcher import IndexWatcher, InotifyBackend, PollingBackend, PreGenerator
+
+
+class FakeBackend:
+    def __init__(self, events):
+        self.events = list(events)
+        self.timeouts = []
+
+    def wait_event(self, timeout):
+        self.timeouts.append(timeout)
+        return self.events.pop(0) if self.events else False
+
+    def close(self):
+        pass
+
+
+def touch_later(path, delay=0.1):
+    timer = threading.Timer(delay, lambda: path.write_text(path.read_text() + "x"))
+    timer.start()
+    return timer
+
+
+def test_polling_backend_detects_index_rewrite(tmp_path):
+    index = tmp_path / "index"
+    index.write_text("v1")
+    backend = PollingBackend(index, poll_interval=0.01)
+
+    assert backend.wait_event(0.05) is False
+    touch_later(index).join()
+    assert backend.wait_event(1.0) is True
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+def test_inotify_backend_matches_index_name_only(tmp_path):
+    index = tmp_path / "index"
+    index.write_text("v1")
+    backend = InotifyBackend(index)
+    try:
+        (tmp_path / "HEAD").write_text("ref")
+        assert backend.wait_event(0.1) is False
+
+        touch_later(index)
+        assert backend.wait_event(2.0) is True
+    finally:
+        backend.close()
+
+
+def test_watcher_debounces_bursts():
+    backend = FakeBackend([True, True, True, False])
+    watcher = IndexWatcher(backend, debounce=0.5)
+
+    assert watcher.wait() is True
+    assert backend.timeouts == [None, 0.5, 0.5, 0.5]
+
+
+def make_pregenerator(diff, allowed=True):
+    runner = MagicMock()
+    runner.run.return_value = subprocess.CompletedProcess([], 0, stdout=diff.encode())
+    limiter = MagicMock()
+    limiter.try_acquire.return_value = allowed
+    generate = MagicMock(return_value="feat: ready")
+    return PreGenerator(runner, MagicMock(), generate, limiter), generate
+
+
+def test_pregenerator_skips_unchanged_diff():
+    pregenerator, generate = make_pregenerator("+diff\n")
+
+    assert pregenerator.run_once() == "generated"
+    assert pregenerator.run_once() == "unchanged"
+    generate.assert_called_once()
+    assert generate.call_args.args[0].text() == "+diff"
+
+
+def test_pregenerator_respects_rate_limit():
+    pregenerator, generate = make_pregenerator("+diff\n", allowed=False)
+
+    assert pregenerator.run_once() == "throttled"
+    generate.assert_not_called()
+
+
+def test_pregenerator_ignores_empty_index():
+    pregenerator, generate = make_pregenerator("")
+
+    assert pregenerator.run_once() == "empty"
+    generate.assert_not_called()